@@ -0,0 +1,34 @@
+"""
+ModelBackend с кэшем пользователя.
+
+AuthenticationMiddleware на каждом запросе достаёт пользователя через
+backend.get_user(); здесь он берётся из общего кэша (CACHES["default"],
+USER_CACHE_TTL), SELECT идёт только при промахе. Запись сбрасывается сигналами
+User (accounts/signals.py) и после UPDATE счётчика уведомлений (forget_users),
+который сигналов не шлёт.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id) -> str:
+    return f"accounts:user:{user_id}"
+
+
+def forget_users(user_ids):
+    keys = [user_cache_key(pk) for pk in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TTL)
+            return user
+        return user if self.user_can_authenticate(user) else None
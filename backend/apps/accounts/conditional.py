@@ -0,0 +1,56 @@
+"""
+Условный GET для страниц, которые пользователи часто перезагружают.
+
+Валидатор страницы — один дешёвый запрос, возвращающий момент последнего
+изменения её данных. ETag дополнительно включает то, что у каждого пользователя
+своё: его id и роль, счётчик непрочитанных (бейдж в меню, из кэша пользователя)
+и csrf-cookie (формы на странице). Совпал If-None-Match — 304 без рендера
+и без запросов самой view. Слабый ETag: маскированный csrf-токен в HTML разный
+при каждом рендере, смысл страницы — нет.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def page_etag(request, last_modified) -> str:
+    user = request.user
+    raw = "|".join(str(part) for part in (
+        user.pk, user.role, user.unread_notifications_count,
+        request.META.get("CSRF_COOKIE", ""), last_modified.isoformat(),
+    ))
+    return f'W/"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def conditional_page(last_modified_func):
+    """
+    last_modified_func(request, *args, **kwargs) -> datetime | None. None —
+    страница рендерится как обычно (данных нет, нет доступа — ошибку отдаст view).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            # flash-сообщения показываются один раз: такую страницу рендерим заново
+            if request.method not in ("GET", "HEAD") or get_messages(request):
+                return view(request, *args, **kwargs)
+
+            last_modified = last_modified_func(request, *args, **kwargs)
+            if last_modified is None:
+                return view(request, *args, **kwargs)
+            etag = page_etag(request, last_modified)
+            timestamp = int(last_modified.timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(timestamp)
+            # страницы личные: общим кэшам хранить нельзя, браузеру — только с ревалидацией
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,68 @@
+"""
+Справочник ролей: роль -> упорядоченные id пользователей и короткие записи о них.
+
+Хранится в памяти процесса с TTL (ROLE_DIRECTORY_TTL). Сохранение/удаление
+пользователя сбрасывает справочник этого процесса сразу (и ещё раз после коммита,
+чтобы не закэшировать данные, прочитанные до него); остальные воркеры
+подхватят изменения не позже чем через TTL.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+@dataclass(frozen=True)
+class UserRecord:
+    id: int
+    username: str
+    fio: str
+    email: str
+    department: str
+
+    def display_name(self):
+        return self.fio or self.username
+
+
+class RoleDirectory:
+    fields = ("id", "username", "fio", "email", "department")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # role -> (expires_at, tuple[UserRecord])
+
+    @property
+    def ttl(self) -> int:
+        return getattr(settings, "ROLE_DIRECTORY_TTL", 300)
+
+    def users(self, role) -> tuple:
+        now = time.monotonic()
+        entry = self._entries.get(role)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        User = get_user_model()
+        records = tuple(
+            UserRecord(*row)
+            for row in User.objects.filter(role=role).order_by("id").values_list(*self.fields)
+        )
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[role] = (now + self.ttl, records)
+        return records
+
+    def user_ids(self, role) -> list:
+        return [r.id for r in self.users(role)]
+
+    def first_id(self, role):
+        records = self.users(role)
+        return records[0].id if records else None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+directory = RoleDirectory()
@@ -0,0 +1,344 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts.directory import directory
+from apps.notifications.models import ArchivedNotification, Notification, OutboxMessage
+from apps.notifications.utils import reconcile_unread_counts
+from apps.publications import queues
+from apps.publications.models import (
+    Council, Process, CoAuthor, ProcessDocuments, DocumentVersion,
+    LibraryDecision, ReviewerAssignment, OEKDecision, UploadPart, UploadSession,
+)
+
+
+User = get_user_model()
+
+PREFIX = "load_"
+
+# Доли статусов: основная масса заявок давно прошла весь цикл, очереди — небольшие.
+STATUS_WEIGHTS = {
+    Process.Status.DRAFT: 1,
+    Process.Status.WAITING_COAUTHOR_CONSENTS: 3,
+    Process.Status.LIBRARY_REVIEW: 4,
+    Process.Status.LIBRARY_NEEDS_FIX: 3,
+    Process.Status.INTERNAL_REVIEW: 4,
+    Process.Status.INTERNAL_REVIEW_NEEDS_FIX: 3,
+    Process.Status.OEK_REVIEW: 4,
+    Process.Status.OEK_NEEDS_FIX: 2,
+    Process.Status.READY_FOR_DEFENSE: 60,
+    Process.Status.REJECTED: 16,
+}
+
+# статусы, до которых можно дойти только через внутреннее рецензирование
+MIFI_ONLY = {Process.Status.INTERNAL_REVIEW, Process.Status.INTERNAL_REVIEW_NEEDS_FIX, Process.Status.REJECTED}
+AFTER_LIBRARY = {
+    Process.Status.INTERNAL_REVIEW, Process.Status.INTERNAL_REVIEW_NEEDS_FIX,
+    Process.Status.OEK_REVIEW, Process.Status.OEK_NEEDS_FIX,
+    Process.Status.READY_FOR_DEFENSE, Process.Status.REJECTED,
+}
+AT_OEK = {Process.Status.OEK_REVIEW, Process.Status.OEK_NEEDS_FIX, Process.Status.READY_FOR_DEFENSE}
+
+DOCUMENT_FIELDS = ("article_file", "bibliography_file", "filled_template_file")
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """
+    Временно отключает auto_now/auto_now_add, чтобы bulk_create сохранил
+    сгенерированные даты (заявки «растянуты» на несколько лет).
+    """
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует нагрузочный набор данных заданного масштаба (пользователи, советы, заявки во всех статусах, "
+        "соавторы, решения, рецензии, уведомления). Bulk-вставки, файлы пишутся параллельно."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=20)
+        parser.add_argument("--councils", type=int, default=3, help="Советов на кафедру.")
+        parser.add_argument("--authors", type=int, default=5000)
+        parser.add_argument("--reviewers", type=int, default=300)
+        parser.add_argument("--commission", type=int, default=50)
+        parser.add_argument("--processes", type=int, default=200000)
+        parser.add_argument("--years", type=int, default=4, help="На сколько лет назад растянуть created_at.")
+        parser.add_argument("--notifications-per-process", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--files",
+            choices=("none", "shared", "unique"),
+            default="shared",
+            help="shared: несколько общих файлов-заглушек; unique: отдельный файл на каждый документ.",
+        )
+        parser.add_argument("--file-workers", type=int, default=16)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--flush", action="store_true", help="Удалить ранее сгенерированные данные seed_load.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        started = time.monotonic()
+
+        if options["flush"]:
+            self.flush()
+        elif User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError("Нагрузочные данные уже есть. Используйте --flush для пересоздания.")
+
+        self.create_users_and_councils()
+        directory.invalidate()  # bulk_create не шлёт post_save
+        self.prepare_shared_files()
+
+        total = options["processes"]
+        batch_size = options["batch_size"]
+        done = 0
+        while done < total:
+            size = min(batch_size, total - done)
+            self.create_process_batch(size)
+            done += size
+            self.stdout.write(f"processes: {done}/{total} ({time.monotonic() - started:.0f}s)")
+
+        queues.invalidate_all()  # заявки создаются bulk_create в обход workflow
+        updated = reconcile_unread_counts(User.objects.filter(username__startswith=PREFIX))
+        self.stdout.write(self.style.SUCCESS(
+            f"seed_load done in {time.monotonic() - started:.0f}s: {total} processes, {updated} users."
+        ))
+
+    def flush(self):
+        users = User.objects.filter(username__startswith=PREFIX)
+        processes = Process.objects.filter(author__in=users)
+        # снизу вверх: у листовых таблиц нет каскадов, и Django удаляет их одним DELETE,
+        # не вытягивая миллион pk в память коллектором. ProcessDocuments, UploadSession,
+        # Process и User уже не листовые — их удаляет коллектор, но к этому моменту
+        # дочерние таблицы пусты и каскад сводится к пустым DELETE
+        DocumentVersion.objects.filter(documents__process__in=processes).delete()
+        for model in (
+            Notification, ArchivedNotification, OutboxMessage,
+            CoAuthor, LibraryDecision, ReviewerAssignment, OEKDecision,
+        ):
+            model.objects.filter(process__in=processes).delete()
+        ProcessDocuments.objects.filter(process__in=processes).delete()
+        processes.delete()
+        # рассылки по ролям идут без process
+        for model in (Notification, ArchivedNotification, OutboxMessage):
+            model.objects.filter(user__in=users).delete()
+        UploadPart.objects.filter(session__user__in=users).delete()
+        UploadSession.objects.filter(user__in=users).delete()
+        users.delete()
+        Council.objects.filter(council_number__startswith=PREFIX).delete()
+        self.stdout.write("Previous load data removed.")
+
+    def create_users_and_councils(self):
+        o = self.options
+        password = make_password("Passw0rd!234")
+        departments = [f"Кафедра №{i + 1}" for i in range(o["departments"])]
+
+        def make(role, count):
+            return [
+                User(
+                    username=f"{PREFIX}{role.lower()}_{i}",
+                    password=password,
+                    role=role,
+                    fio=f"{role.title()} {i}",
+                    department=departments[i % len(departments)],
+                    position="Сотрудник",
+                    email=f"{PREFIX}{role.lower()}_{i}@example.com",
+                )
+                for i in range(count)
+            ]
+
+        batch_size = o["batch_size"]
+        User.objects.bulk_create(make(User.Role.AUTHOR, o["authors"]), batch_size=batch_size)
+        User.objects.bulk_create(make(User.Role.REVIEWER, o["reviewers"]), batch_size=batch_size)
+        User.objects.bulk_create(make(User.Role.COMMISSION, o["commission"]), batch_size=batch_size)
+        User.objects.bulk_create(make(User.Role.LIBRARY_HEAD, 1) + make(User.Role.OEK, 2))
+
+        Council.objects.bulk_create([
+            Council(department=d, council_number=f"{PREFIX}{di + 1}-{c + 1}", members="Председатель; Секретарь; Член совета")
+            for di, d in enumerate(departments)
+            for c in range(o["councils"])
+        ])
+
+        load_users = User.objects.filter(username__startswith=PREFIX)
+        self.author_ids = list(load_users.filter(role=User.Role.AUTHOR).values_list("id", flat=True))
+        self.reviewer_ids = list(load_users.filter(role=User.Role.REVIEWER).values_list("id", flat=True))
+        self.librarian_id = load_users.filter(role=User.Role.LIBRARY_HEAD).values_list("id", flat=True).first()
+        self.oek_id = load_users.filter(role=User.Role.OEK).values_list("id", flat=True).first()
+        self.council_ids = list(Council.objects.filter(council_number__startswith=PREFIX).values_list("id", flat=True))
+        if len(self.reviewer_ids) < 3:
+            raise CommandError("Нужно как минимум 3 рецензента (--reviewers).")
+
+    def prepare_shared_files(self):
+        self.shared_files = {}
+        if self.options["files"] != "shared":
+            return
+        for field in DOCUMENT_FIELDS:
+            self.shared_files[field] = default_storage.save(
+                f"load/{field}.txt", ContentFile(f"LOAD PLACEHOLDER: {field}".encode())
+            )
+
+    def write_unique_files(self, processes):
+        """
+        Файлы-заглушки по одному на документ; запись в storage идёт пулом потоков,
+        т.к. это I/O, а не CPU. Каждый поток берёт свою долю файлов и в конце
+        закрывает своё соединение с БД (storage ведёт учёт blob'ов в таблице).
+        """
+        jobs = [(p.pk, field) for p in processes for field in DOCUMENT_FIELDS]
+        workers = self.options["file_workers"]
+
+        def save_slice(chunk):
+            try:
+                return [
+                    ((pk, field), default_storage.save(f"load/{field}/{pk}.txt", ContentFile(f"LOAD {field} #{pk}".encode())))
+                    for pk, field in chunk
+                ]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            slices = pool.map(save_slice, [jobs[i::workers] for i in range(workers)])
+            return {job: name for chunk in slices for job, name in chunk}
+
+    def random_created_at(self, now):
+        return now - timedelta(seconds=self.rng.randint(0, self.options["years"] * 365 * 24 * 3600))
+
+    def create_process_batch(self, size):
+        rng = self.rng
+        now = timezone.now()
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+
+        processes = []
+        for status in rng.choices(statuses, weights=weights, k=size):
+            created_at = self.random_created_at(now)
+            is_mifi = status in MIFI_ONLY or rng.random() < 0.4
+            ready = status == Process.Status.READY_FOR_DEFENSE
+            processes.append(Process(
+                author_id=rng.choice(self.author_ids),
+                title=f"Исследование {rng.randint(1, 10 ** 9)}",
+                journal=rng.choice(("Вестник МИФИ", "Ядерная физика", "Elsevier Journal", "Springer Letters")),
+                council_id=rng.choice(self.council_ids),
+                is_mifi=is_mifi,
+                status=status,
+                created_at=created_at,
+                updated_at=created_at + timedelta(days=rng.randint(0, 60)),
+                defense_datetime=created_at + timedelta(days=rng.randint(30, 90)) if ready else None,
+                defense_room=f"А-{rng.randint(100, 599)}" if ready else "",
+            ))
+
+        timestamps = (Process._meta.get_field("created_at"), Process._meta.get_field("updated_at"))
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # генератор данных: потеря последних транзакций при сбое не страшна
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL synchronous_commit TO OFF")
+            with explicit_timestamps(*timestamps):
+                Process.objects.bulk_create(processes)
+
+            if self.options["files"] == "unique":
+                files = self.write_unique_files(processes)
+            else:
+                files = {(p.pk, f): self.shared_files.get(f, "") for p in processes for f in DOCUMENT_FIELDS}
+
+            ProcessDocuments.objects.bulk_create([
+                ProcessDocuments(process=p, **{f: files[(p.pk, f)] for f in DOCUMENT_FIELDS})
+                for p in processes
+            ])
+
+            coauthors, library, assignments, oek, notifications = [], [], [], [], []
+            for p in processes:
+                for i in range(rng.choices((0, 1, 2, 3), weights=(40, 30, 20, 10))[0]):
+                    coauthors.append(CoAuthor(
+                        process=p,
+                        name=f"Соавтор {p.pk}-{i + 1}",
+                        email=f"coauthor{p.pk}_{i + 1}@example.com",
+                        consent_file=self.shared_files.get("filled_template_file", "")
+                        if p.status != Process.Status.WAITING_COAUTHOR_CONSENTS else None,
+                    ))
+                library.extend(self.library_decision(p))
+                assignments.extend(self.review_assignments(p))
+                oek.extend(self.oek_decision(p))
+                for i in range(self.options["notifications_per_process"]):
+                    notifications.append(Notification(
+                        user_id=p.author_id,
+                        message=f"Заявка #{p.pk}: событие {i + 1}",
+                        link=f"/process/{p.pk}/",
+                        process=p,
+                        is_read=rng.random() < 0.85,
+                        created_at=p.created_at + timedelta(days=i),
+                    ))
+
+            CoAuthor.objects.bulk_create(coauthors)
+            LibraryDecision.objects.bulk_create(library)
+            ReviewerAssignment.objects.bulk_create(assignments)
+            OEKDecision.objects.bulk_create(oek)
+            with explicit_timestamps(Notification._meta.get_field("created_at")):
+                Notification.objects.bulk_create(notifications)
+
+    def library_decision(self, p):
+        if p.status == Process.Status.LIBRARY_REVIEW:
+            return [LibraryDecision(process=p)]
+        decided = dict(librarian_id=self.librarian_id, decided_at=p.created_at + timedelta(days=3))
+        if p.status == Process.Status.LIBRARY_NEEDS_FIX:
+            return [LibraryDecision(process=p, decision=LibraryDecision.Decision.REJECTED, comment="Оформите по ГОСТ", **decided)]
+        if p.status in AFTER_LIBRARY:
+            return [LibraryDecision(process=p, decision=LibraryDecision.Decision.APPROVED, **decided)]
+        return []
+
+    def review_assignments(self, p):
+        if not p.is_mifi or p.status not in AFTER_LIBRARY:
+            return []
+        V = ReviewerAssignment.Verdict
+        if p.status == Process.Status.INTERNAL_REVIEW:
+            verdicts = [self.rng.choice((V.PENDING, V.RECOMMEND)) for _ in range(2)] + [V.PENDING]
+        elif p.status == Process.Status.INTERNAL_REVIEW_NEEDS_FIX:
+            verdicts = [V.RECOMMEND, V.RECOMMEND_AFTER_FIX, V.RECOMMEND]
+        elif p.status == Process.Status.REJECTED:
+            verdicts = [V.NOT_RECOMMEND, V.NOT_RECOMMEND, self.rng.choice((V.RECOMMEND, V.NOT_RECOMMEND))]
+        else:
+            verdicts = [V.RECOMMEND] * 3
+
+        reviewers = self.rng.sample(self.reviewer_ids, 3)
+        return [
+            ReviewerAssignment(
+                process=p,
+                reviewer_id=r,
+                verdict=v,
+                comment="" if v == V.PENDING else "Замечания рецензента",
+                decided_at=None if v == V.PENDING else p.created_at + timedelta(days=10),
+            )
+            for r, v in zip(reviewers, verdicts)
+        ]
+
+    def oek_decision(self, p):
+        if p.status not in AT_OEK:
+            return []
+        if p.status == Process.Status.OEK_REVIEW:
+            return [OEKDecision(process=p)]
+        decision = OEKDecision.Decision.APPROVED if p.status == Process.Status.READY_FOR_DEFENSE else OEKDecision.Decision.REJECTED
+        return [OEKDecision(
+            process=p,
+            oek_user_id=self.oek_id,
+            decision=decision,
+            comment="" if decision == OEKDecision.Decision.APPROVED else "Исправьте пакет документов",
+            decided_at=p.created_at + timedelta(days=20),
+        )]
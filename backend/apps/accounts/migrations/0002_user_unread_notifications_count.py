@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    Notification = apps.get_model("notifications", "Notification")
+    unread = (
+        Notification.objects
+        .filter(user=OuterRef("pk"), is_read=False)
+        .order_by()
+        .values("user")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    User.objects.update(unread_notifications_count=Coalesce(Subquery(unread), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="unread_notifications_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Непрочитанных уведомлений"),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
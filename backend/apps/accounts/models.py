@@ -20,6 +20,10 @@ class User(AbstractUser):
     position = models.CharField("Должность", max_length=255, blank=True)
     person_status = models.CharField("Статус", max_length=16, choices=PersonStatus.choices, default=PersonStatus.STAFF)
 
+    # денормализованный счётчик для бейджа; поддерживается apps.notifications.utils,
+    # сверяется командой reconcile_unread_notifications
+    unread_notifications_count = models.PositiveIntegerField("Непрочитанных уведомлений", default=0, editable=False)
+
     def display_name(self):
         if self.fio:
             return self.fio
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import forget_users
+from .directory import directory
+
+User = get_user_model()
+
+# служебные обновления пользователя, не влияющие на справочник ролей
+IGNORED_UPDATE_FIELDS = frozenset({"last_login", "unread_notifications_count"})
+
+
+@receiver(post_save, sender=User, dispatch_uid="accounts_directory_save")
+@receiver(post_delete, sender=User, dispatch_uid="accounts_directory_delete")
+def invalidate_role_directory(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IGNORED_UPDATE_FIELDS:
+        return
+    directory.invalidate()
+    transaction.on_commit(directory.invalidate)
+
+
+@receiver(post_save, sender=User, dispatch_uid="accounts_user_cache_save")
+@receiver(post_delete, sender=User, dispatch_uid="accounts_user_cache_delete")
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_users([instance.pk])
+    # запрос, прочитавший старую строку до коммита, мог успеть положить её в кэш
+    transaction.on_commit(lambda: forget_users([instance.pk]))
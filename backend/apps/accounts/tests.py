@@ -1,6 +1,129 @@
-from django.test import TestCase
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.accounts.directory import directory
+from apps.accounts.models import User
+from apps.notifications.models import ArchivedNotification, OutboxMessage
+from apps.notifications.utils import notify
+from apps.publications.models import (
+    Council, DocumentVersion, Process, ProcessDocuments, OEKDecision, ReviewerAssignment,
+)
+from apps.publications.services import library_apply_decision
 
 
 class AccountsSmokeTest(TestCase):
     def test_ok(self):
-        self.assertTrue(True)
\ No newline at end of file
+        self.assertTrue(True)
+
+
+class SeedLoadTest(TestCase):
+    def test_generates_consistent_workflow_data(self):
+        call_command(
+            "seed_load", processes=300, authors=20, reviewers=5, commission=2, departments=2,
+            batch_size=100, files="none", stdout=StringIO(),
+        )
+
+        self.assertEqual(Process.objects.count(), 300)
+        self.assertEqual(ProcessDocuments.objects.count(), 300)
+        ready = Process.objects.filter(status=Process.Status.READY_FOR_DEFENSE)
+        self.assertEqual(
+            OEKDecision.objects.filter(process__in=ready, decision=OEKDecision.Decision.APPROVED).count(),
+            ready.count(),
+        )
+        # в рецензирование попадают только заявки МИФИ
+        self.assertFalse(ReviewerAssignment.objects.filter(process__is_mifi=False).exists())
+
+    def test_flush_removes_everything_hanging_off_load_data(self):
+        options = dict(processes=20, authors=5, reviewers=3, commission=1, departments=1, files="none", stdout=StringIO())
+        call_command("seed_load", **options)
+        process = Process.objects.select_related("author", "documents").first()
+        author = process.author
+        DocumentVersion.objects.create(documents=process.documents, field="article_file", number=1, file="load/v1.txt")
+        ArchivedNotification.objects.create(id=1, user=author, process=process, message="старое", created_at=process.created_at)
+        OutboxMessage.objects.create(channel="inapp", user=author, message="рассылка без заявки")
+
+        call_command("seed_load", flush=True, **options)
+
+        self.assertEqual(Process.objects.count(), 20)
+        self.assertFalse(DocumentVersion.objects.exists())
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class RoleDirectoryTest(TestCase):
+    def setUp(self):
+        directory.invalidate()
+        self.oek = User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+
+    def test_cached_and_invalidated_by_user_changes(self):
+        self.assertEqual(directory.user_ids(User.Role.OEK), [self.oek.pk])
+        with self.assertNumQueries(0):
+            directory.first_id(User.Role.OEK)
+
+        second = User.objects.create_user(username="oek2", password="x", role=User.Role.OEK)
+        self.assertEqual(directory.user_ids(User.Role.OEK), [self.oek.pk, second.pk])
+
+        self.oek.role = User.Role.AUTHOR
+        self.oek.save()
+        self.assertEqual(directory.user_ids(User.Role.OEK), [second.pk])
+
+        second.delete()
+        self.assertEqual(directory.user_ids(User.Role.OEK), [])
+
+    def test_login_does_not_invalidate(self):
+        directory.users(User.Role.OEK)
+        self.client.force_login(self.oek)  # update_last_login -> save(update_fields=["last_login"])
+        with self.assertNumQueries(0):
+            directory.users(User.Role.OEK)
+
+    def test_transition_does_not_query_users(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        process = Process.objects.create(
+            author=author, council=council, title="Работа", journal="Журнал", status=Process.Status.LIBRARY_REVIEW,
+        )
+        directory.users(User.Role.OEK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            library_apply_decision(process, approved=True, comment="", librarian=None)
+
+        self.assertEqual(Process.objects.get(pk=process.pk).status, Process.Status.OEK_REVIEW)
+        # только UPDATE счётчика непрочитанных, без выборок пользователей по роли
+        user_selects = [q["sql"] for q in ctx.captured_queries if "accounts_user" in q["sql"] and q["sql"].startswith("SELECT")]
+        self.assertEqual(user_selects, [])
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        self.client.force_login(self.user)
+        self.url = reverse("notifications:list")
+        self.client.get(self.url)  # прогрев кэша
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        sql = [q["sql"] for q in ctx.captured_queries]
+        return response, [q for q in sql if "django_session" in q or 'FROM "accounts_user"' in q]
+
+    def test_session_and_user_come_from_cache(self):
+        response, queries = self.auth_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_counter_update_and_deactivation_invalidate_cache(self):
+        notify(self.user, "Новое уведомление")
+        response, _ = self.auth_queries()
+        self.assertEqual(response.context["unread_notifications_count"], 1)
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        response, _ = self.auth_queries()
+        self.assertEqual(response.status_code, 302)
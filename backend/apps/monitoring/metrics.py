@@ -0,0 +1,80 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+# верхние границы корзин гистограммы времени ответа, мс
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+# корзины по числу SQL-запросов
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, float("inf"))
+
+TOP_DUPLICATES = 5
+
+
+class RouteStats:
+    __slots__ = ("count", "total_ms", "max_ms", "db_ms", "queries", "duration_hist", "query_hist", "duplicates")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.duration_hist = [0] * len(DURATION_BUCKETS_MS)
+        self.query_hist = [0] * len(QUERY_BUCKETS)
+        self.duplicates = Counter()
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / count, 2),
+            "max_ms": round(self.max_ms, 2),
+            "avg_db_ms": round(self.db_ms / count, 2),
+            "avg_queries": round(self.queries / count, 2),
+            "duration_hist": dict(zip(map(_label, DURATION_BUCKETS_MS), self.duration_hist)),
+            "query_hist": dict(zip(map(_label, QUERY_BUCKETS), self.query_hist)),
+            "duplicates": [{"sql": sql, "count": c} for sql, c in self.duplicates.most_common(TOP_DUPLICATES)],
+        }
+
+
+def _label(bound):
+    return "+Inf" if bound == float("inf") else f"<={bound:g}"
+
+
+class MetricsRegistry:
+    """
+    Агрегаты по имени маршрута в памяти процесса: O(1) на запрос, без I/O.
+    Каждый gunicorn-воркер хранит свою статистику.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, duration_ms: float, db_ms: float, queries: int, duplicates: dict):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.db_ms += db_ms
+            stats.queries += queries
+            stats.duration_hist[bisect_left(DURATION_BUCKETS_MS, duration_ms)] += 1
+            stats.query_hist[bisect_left(QUERY_BUCKETS, queries)] += 1
+            stats.duplicates.update(duplicates)
+            # не даём счётчику отпечатков расти бесконечно
+            if len(stats.duplicates) > TOP_DUPLICATES * 20:
+                stats.duplicates = Counter(dict(stats.duplicates.most_common(TOP_DUPLICATES * 4)))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {route: stats.as_dict() for route, stats in sorted(self._routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
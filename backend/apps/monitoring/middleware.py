@@ -0,0 +1,68 @@
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+
+class QueryTracker:
+    """
+    execute_wrapper: считает запросы и их время без DEBUG и без хранения SQL целиком.
+    Текст запроса с плейсхолдерами (%s) уже является отпечатком — параметры в него не входят.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.fingerprints[sql] += 1
+
+    def duplicates(self) -> dict:
+        return {sql: c for sql, c in self.fingerprints.items() if c > 1}
+
+
+class RequestMetricsMiddleware:
+    """
+    Время ответа, число и суммарное время SQL, повторяющиеся запросы (сигнатура N+1).
+    Отдаёт заголовок Server-Timing и копит гистограммы по имени маршрута
+    (смотреть: monitoring:request_metrics).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "REQUEST_METRICS_ENABLED", True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        tracker = QueryTracker()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(tracker))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        duplicates = tracker.duplicates()
+        response["Server-Timing"] = ", ".join((
+            f"total;dur={duration_ms:.1f}",
+            f'db;dur={tracker.db_ms:.1f};desc="{tracker.count} queries"',
+            f'dup;desc="{sum(duplicates.values()) - len(duplicates)} repeated"',
+        ))
+
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "<unresolved>"
+        registry.record(route, duration_ms, tracker.db_ms, tracker.count, duplicates)
+        return response
@@ -0,0 +1,33 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.accounts.models import User
+
+from .metrics import registry
+
+
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+
+    def test_server_timing_header_and_route_stats(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("publications:process_list"))
+
+        self.assertIn("total;dur=", response["Server-Timing"])
+        self.assertIn("db;dur=", response["Server-Timing"])
+        stats = registry.snapshot()["publications:process_list"]
+        self.assertEqual(stats["count"], 1)
+        self.assertGreater(stats["avg_queries"], 0)
+
+    def test_endpoint_is_staff_only(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("monitoring:request_metrics"))
+        self.assertEqual(response.status_code, 302)
+
+        staff = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse("monitoring:request_metrics"), {"format": "json"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("monitoring:request_metrics", response.json())
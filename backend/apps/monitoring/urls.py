@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import request_metrics, reset_request_metrics
+
+app_name = "monitoring"
+
+urlpatterns = [
+    path("requests/", request_metrics, name="request_metrics"),
+    path("requests/reset/", reset_request_metrics, name="reset_request_metrics"),
+]
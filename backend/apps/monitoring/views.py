@@ -0,0 +1,26 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+
+from .metrics import DURATION_BUCKETS_MS, registry, _label
+
+
+@staff_member_required
+def request_metrics(request):
+    snapshot = registry.snapshot()
+    if request.GET.get("format") == "json":
+        return JsonResponse(snapshot, json_dumps_params={"ensure_ascii": False})
+
+    routes = sorted(snapshot.items(), key=lambda item: item[1]["avg_ms"] * item[1]["count"], reverse=True)
+    return render(request, "monitoring/request_metrics.html", {
+        "routes": routes,
+        "buckets": [_label(b) for b in DURATION_BUCKETS_MS],
+    })
+
+
+@staff_member_required
+@require_POST
+def reset_request_metrics(request):
+    registry.reset()
+    return redirect("monitoring:request_metrics")
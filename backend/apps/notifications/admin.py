@@ -1,9 +1,27 @@
 from django.contrib import admin
-from .models import Notification
+from .models import ArchivedNotification, Notification, OutboxMessage
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("user", "message", "is_read", "created_at")
     list_filter = ("is_read", "created_at")
-    search_fields = ("message", "user__username", "user__fio")
\ No newline at end of file
+    search_fields = ("message", "user__username", "user__fio")
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ("user", "message", "created_at", "archived_at")
+    list_filter = ("created_at",)
+    search_fields = ("message", "user__username", "user__fio")
+    readonly_fields = ("id", "user", "message", "link", "process", "created_at", "archived_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "channel", "user", "status", "attempts", "next_attempt_at", "created_at")
+    list_filter = ("status", "channel")
+    search_fields = ("message", "user__username")
@@ -0,0 +1,70 @@
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+
+class Channel:
+    """
+    Канал доставки outbox-сообщений. send_many возвращает {id сообщения: текст ошибки}
+    для неудачных; всё, чего нет в словаре, считается доставленным.
+    """
+    name = ""
+
+    def send(self, msg):
+        raise NotImplementedError
+
+    def send_many(self, messages) -> dict:
+        errors = {}
+        for msg in messages:
+            try:
+                self.send(msg)
+            except Exception as exc:  # канал не должен ронять весь батч
+                errors[msg.pk] = f"{type(exc).__name__}: {exc}"
+        return errors
+
+
+class InAppChannel(Channel):
+    name = "inapp"
+
+    def send_many(self, messages) -> dict:
+        # локальный импорт: utils импортирует outbox, а тот — каналы
+        from .utils import bump_unread_many
+
+        messages = [m for m in messages if m.user_id]
+        # уведомления и счётчики непрочитанных — вместе или никак
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                [Notification(user_id=m.user_id, message=m.message, link=m.link, process_id=m.process_id) for m in messages],
+                batch_size=getattr(settings, "NOTIFICATIONS_BULK_BATCH_SIZE", 500),
+            )
+            bump_unread_many(m.user_id for m in messages)
+        return {}
+
+
+class FileSinkChannel(Channel):
+    """
+    Внешний канал для локальной разработки и тестов: пишет JSON-строки в файл.
+    """
+    name = "file"
+
+    def send_many(self, messages) -> dict:
+        with open(settings.NOTIFICATIONS_FILE_SINK_PATH, "a", encoding="utf-8") as fh:
+            for m in messages:
+                fh.write(json.dumps({
+                    "id": m.pk,
+                    "user": m.user_id,
+                    "message": m.message,
+                    "link": m.link,
+                    "process": m.process_id,
+                }, ensure_ascii=False) + "\n")
+        return {}
+
+
+@lru_cache(maxsize=None)
+def get_channel(name: str) -> Channel:
+    return import_string(settings.NOTIFICATIONS_CHANNEL_BACKENDS[name])()
@@ -1,4 +1,11 @@
+from django.conf import settings
+
+
 def notifications_context(request):
     if not request.user.is_authenticated:
         return {"unread_notifications_count": 0}
-    return {"unread_notifications_count": request.user.notifications.filter(is_read=False).count()}
\ No newline at end of file
+    # счётчик хранится на пользователе: без отдельного COUNT(*) на каждый рендер
+    return {
+        "unread_notifications_count": request.user.unread_notifications_count,
+        "notifications_stream_url": settings.NOTIFICATIONS_STREAM_URL,
+    }
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Живые уведомления: Server-Sent Events поверх PostgreSQL LISTEN/NOTIFY.
+
+Новая строка Notification публикуется триггером в канал "notifications"
+(миграция 0005). В каждом ASGI-процессе одно соединение слушает канал через
+add_reader цикла событий — без опроса и без потока на клиента — и раскладывает
+события по очередям подключённых пользователей. Открытый поток держит только
+asyncio.Queue: соединение с БД после проверки пользователя закрывается.
+
+Поток живёт не дольше NOTIFICATIONS_STREAM_MAX_SECONDS (Django 4.2 не сообщает
+view об отключении клиента), потом EventSource переподключается сам
+и присылает Last-Event-ID — пропущенное за это время досылается из таблицы.
+"""
+import asyncio
+import json
+from collections import defaultdict
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from .models import Notification
+
+CHANNEL = "notifications"
+HEARTBEAT_SECONDS = 20
+RETRY_MILLISECONDS = 3000
+QUEUE_SIZE = 100
+REPLAY_LIMIT = 50
+
+
+class Listener:
+    """
+    Одно LISTEN-соединение на процесс. Обрыв соединения завершает все потоки
+    (в очередь кладётся None): клиенты переподключатся, а первый из них поднимет
+    соединение заново.
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._loop = None
+        self._lock = None
+        self._subscribers = defaultdict(set)  # user_id -> {asyncio.Queue}
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        await self._ensure_connected()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    async def _ensure_connected(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            if self._conn is not None and self._loop is not loop:
+                # соединение зарегистрировано в другом цикле событий (async_to_sync в тестах)
+                self._disconnect()
+            if self._conn is not None:
+                return
+            self._conn = await sync_to_async(self._connect, thread_sensitive=False)()
+            self._loop = loop
+            self._loop.add_reader(self._conn.fileno(), self._on_readable)
+
+    @staticmethod
+    def _connect():
+        params = connections["default"].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except psycopg2.Error:
+            self._disconnect()
+            return
+        while self._conn.notifies:
+            try:
+                event = json.loads(self._conn.notifies.pop(0).payload)
+            except ValueError:
+                continue
+            for queue in self._subscribers.get(event.get("user"), ()):
+                if not queue.full():
+                    # медленный клиент получит пропущенное при переподключении (Last-Event-ID)
+                    queue.put_nowait(event)
+
+    def close(self):
+        if self._conn is not None:
+            self._disconnect()
+
+    def _disconnect(self):
+        self._loop.remove_reader(self._conn.fileno())
+        try:
+            self._conn.close()
+        except psycopg2.Error:
+            pass
+        self._conn = None
+        for queues in self._subscribers.values():
+            for queue in queues:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+listener = Listener()
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(
+        {key: event[key] for key in ("id", "message", "link", "created_at")}, ensure_ascii=False, default=str,
+    )
+    return f"id: {event['id']}\nevent: notification\ndata: {data}\n\n"
+
+
+def missed_events(user_id: int, last_id: int) -> list:
+    try:
+        return list(
+            Notification.objects.filter(user_id=user_id, pk__gt=last_id)
+            .order_by("pk")
+            .values("id", "message", "link", "created_at")[:REPLAY_LIMIT]
+        )
+    finally:
+        # поток может висеть минутами: соединение пула потоков не держим
+        connections.close_all()
+
+
+async def event_stream(user_id: int, last_id: int, max_seconds: int):
+    """
+    Асинхронный генератор SSE: replay пропущенного после last_id, затем события
+    из LISTEN и комментарии-heartbeat, чтобы прокси не закрывали простаивающее соединение.
+    """
+    # подписка раньше replay: между ними ничего не теряется, дубли отсекаются по id
+    queue = await listener.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        sent = last_id
+        if last_id:
+            for event in await sync_to_async(missed_events, thread_sensitive=False)(user_id, last_id):
+                sent = event["id"]
+                yield format_event(event)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_seconds
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                break
+            if event["id"] > sent:
+                sent = event["id"]
+                yield format_event(event)
+    finally:
+        listener.unsubscribe(user_id, queue)
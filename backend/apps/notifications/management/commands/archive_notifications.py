@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.notifications.models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = ("id", "user_id", "message", "link", "process_id", "created_at")
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит прочитанные уведомления старше --days в ArchivedNotification пачками: "
+        "каждая пачка — отдельная короткая транзакция, прерванный запуск просто продолжается следующим."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.NOTIFICATIONS_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0, help="Пауза между пачками, секунды.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        moved = batches = 0
+        eligible = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by("created_at", "id")
+        after = None
+        while True:
+            # keyset по (created_at, id) через частичный индекс прочитанных: идём только
+            # по подходящим строкам, как бы ни соотносились id и created_at
+            qs = eligible
+            if after is not None:
+                qs = qs.filter(Q(created_at__gt=after[0]) | Q(created_at=after[0], id__gt=after[1]))
+            rows = list(qs.values_list("created_at", "id")[:batch_size])
+            if not rows:
+                break
+            after = rows[-1]
+            moved += self.move([pk for created_at, pk in rows])
+            batches += 1
+            if len(rows) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} notifications in {batches} batches."))
+
+    def move(self, ids) -> int:
+        with transaction.atomic():
+            # строки, которые сейчас трогает другой запрос, заберёт следующий запуск
+            rows = list(
+                Notification.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=ids, is_read=True)
+                .values(*ARCHIVED_FIELDS)
+            )
+            ArchivedNotification.objects.bulk_create(
+                [ArchivedNotification(**row) for row in rows], ignore_conflicts=True,
+            )
+            Notification.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        return len(rows)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.utils import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики непрочитанных уведомлений по таблице Notification."
+
+    def handle(self, *args, **kwargs):
+        updated = reconcile_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled unread counters for {updated} users."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Фоновая доставка уведомлений из outbox по каналам (in-app, file)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Пауза (сек), когда очередь пуста.")
+        parser.add_argument("--once", action="store_true", help="Разобрать очередь и выйти.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.stdout.write(self.style.SUCCESS("Notification worker started."))
+        try:
+            while True:
+                sent, failed = deliver_pending(batch_size=batch_size)
+                if sent or failed:
+                    self.stdout.write(f"Delivered {sent}, failed {failed}.")
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Notification worker stopped."))
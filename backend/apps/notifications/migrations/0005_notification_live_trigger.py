@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# Живые уведомления (apps.notifications.live): каждая новая строка Notification
+# публикуется в канал LISTEN/NOTIFY "notifications" — независимо от того, кто её
+# вставил (notify_bulk, outbox-воркер, админка). NOTIFY уходит при коммите, payload —
+# JSON с полями для SSE-события (message <= 500, link <= 300 символов: в лимит 8000 байт
+# укладывается). Только PostgreSQL: на SQLite поток уведомлений отключён.
+FORWARD_SQL = """
+CREATE FUNCTION notifications_notification_publish() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('notifications', json_build_object(
+        'id', NEW.id, 'user', NEW.user_id, 'message', NEW.message, 'link', NEW.link, 'created_at', NEW.created_at
+    )::text);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER notification_publish
+    AFTER INSERT ON notifications_notification
+    FOR EACH ROW EXECUTE FUNCTION notifications_notification_publish();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS notification_publish ON notifications_notification;
+DROP FUNCTION IF EXISTS notifications_notification_publish();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0004_workqueue_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
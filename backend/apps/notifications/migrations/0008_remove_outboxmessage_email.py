@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notification_read_created_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='outboxmessage',
+            name='email',
+        ),
+    ]
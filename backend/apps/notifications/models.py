@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -20,6 +21,86 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "is_read"], name="notif_user_is_read_idx"),
+            models.Index(fields=["user", "-created_at"], name="notif_user_created_idx"),
+            # manage.py archive_notifications: прочитанные по возрасту
+            models.Index(fields=["created_at", "id"], name="notif_read_created_idx", condition=models.Q(is_read=True)),
+        ]
 
     def __str__(self):
-        return f"Notification({self.user_id}, read={self.is_read})"
\ No newline at end of file
+        return f"Notification({self.user_id}, read={self.is_read})"
+
+class ArchivedNotification(models.Model):
+    """
+    Прочитанные уведомления старше NOTIFICATIONS_RETENTION_DAYS, перенесённые
+    из Notification командой archive_notifications: горячая таблица остаётся
+    маленькой, история сохраняется. id — тот же, что был у строки Notification.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_notifications")
+    message = models.CharField(max_length=500)
+    link = models.CharField(max_length=300, blank=True)
+    process = models.ForeignKey(
+        "publications.Process",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="archived_notifications",
+    )
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="notif_archive_user_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"ArchivedNotification({self.user_id}, {self.created_at:%Y-%m-%d})"
+
+
+class OutboxMessage(models.Model):
+    """
+    Транзакционный outbox: строка пишется в той же транзакции, что и переход
+    процесса, а доставку по каналам делает run_notification_worker.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Ожидает отправки"
+        SENT = "SENT", "Доставлено"
+        FAILED = "FAILED", "Ошибка доставки"
+
+    channel = models.CharField(max_length=32)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="outbox_messages",
+    )
+    message = models.CharField(max_length=500)
+    link = models.CharField(max_length=300, blank=True)
+    process = models.ForeignKey(
+        "publications.Process",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="outbox_messages",
+    )
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_next_idx"),
+        ]
+
+    def __str__(self):
+        return f"OutboxMessage({self.channel}, user={self.user_id}, {self.status})"
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .channels import get_channel
+from .models import OutboxMessage
+
+
+def enqueue(user_ids, message: str, link: str = "", process=None, channels=None):
+    """
+    Кладёт сообщение в outbox для каждого получателя и каждого канала.
+    Вызывается внутри транзакции перехода: откат перехода откатывает и рассылку.
+    """
+    enqueue_rows([(uid, message, link, process) for uid in user_ids], channels=channels)
+
+
+def enqueue_rows(rows, channels=None):
+    """
+    rows — [(user_id, message, link, process)]; одна вставка на весь пакет.
+    """
+    channels = channels or settings.NOTIFICATIONS_DELIVERY_CHANNELS
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(channel=channel, user_id=uid, message=message, link=link, process=process)
+            for uid, message, link, process in rows
+            for channel in channels
+        ],
+        batch_size=getattr(settings, "NOTIFICATIONS_BULK_BATCH_SIZE", 500),
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    base = settings.NOTIFICATIONS_OUTBOX_RETRY_BASE_SECONDS
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), settings.NOTIFICATIONS_OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim_pending(batch_size: int) -> list:
+    """
+    Короткая транзакция: берёт пачку готовых сообщений (SKIP LOCKED — воркеры не
+    мешают друг другу) и откладывает их next_attempt_at на время аренды. После
+    коммита блокировок нет; если воркер упадёт, не дойдя до записи результата,
+    аренда истечёт и сообщения заберёт следующий проход.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("user")
+            .filter(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("channel", "id")[:batch_size]
+        )
+        if batch:
+            OutboxMessage.objects.filter(pk__in=[m.pk for m in batch]).update(
+                next_attempt_at=now + timedelta(seconds=settings.NOTIFICATIONS_OUTBOX_CLAIM_SECONDS)
+            )
+    return batch
+
+
+def deliver_pending(batch_size: int = 100) -> tuple[int, int]:
+    """
+    Забирает пачку (claim_pending), доставляет по каналам вне транзакции — внешний канал
+    не держит блокировки строк outbox — и второй короткой транзакцией фиксирует
+    результат. Возвращает (доставлено, ошибок).
+    """
+    batch = claim_pending(batch_size)
+    if not batch:
+        return 0, 0
+
+    errors = {}
+    for channel_name, messages in groupby(batch, key=lambda m: m.channel):
+        messages = list(messages)
+        try:
+            errors.update(get_channel(channel_name).send_many(messages))
+        except Exception as exc:
+            errors.update({m.pk: f"{type(exc).__name__}: {exc}" for m in messages})
+
+    now = timezone.now()
+    sent_ids = [m.pk for m in batch if m.pk not in errors]
+    max_attempts = settings.NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS
+    with transaction.atomic():
+        OutboxMessage.objects.filter(pk__in=sent_ids).update(
+            status=OutboxMessage.Status.SENT, sent_at=now, last_error=""
+        )
+        for msg in batch:
+            if msg.pk not in errors:
+                continue
+            msg.attempts += 1
+            msg.last_error = errors[msg.pk]
+            if msg.attempts >= max_attempts:
+                msg.status = OutboxMessage.Status.FAILED
+            else:
+                msg.next_attempt_at = now + retry_delay(msg.attempts)
+            msg.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+    return len(sent_ids), len(errors)
@@ -0,0 +1,298 @@
+import asyncio
+import json
+import random
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from pathlib import Path
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+
+from . import live
+from .channels import Channel, InAppChannel
+from .models import ArchivedNotification, Notification, OutboxMessage
+from .outbox import claim_pending, deliver_pending
+from .utils import notify, notify_many
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class UnreadCounterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+        self.client.force_login(self.user)
+
+    def unread(self):
+        self.user.refresh_from_db(fields=["unread_notifications_count"])
+        return self.user.unread_notifications_count
+
+    def test_counter_follows_notify_and_reads(self):
+        for i in range(3):
+            notify(self.user, f"Сообщение {i}")
+        self.assertEqual(self.unread(), 3)
+
+        n = Notification.objects.filter(user=self.user).first()
+        self.client.get(reverse("notifications:read", args=[n.pk]))
+        # повторное прочтение не должно уменьшать счётчик ещё раз
+        self.client.get(reverse("notifications:detail", args=[n.pk]))
+        self.assertEqual(self.unread(), 2)
+
+        self.client.get(reverse("notifications:read_all"))
+        self.assertEqual(self.unread(), 0)
+
+    def test_list_is_not_modified_until_something_changes(self):
+        notify(self.user, "Первое")
+        url = reverse("notifications:list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):  # только валидатор: сессия и пользователь — из кэша
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        notify(self.user, "Второе")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Второе")
+
+        etag = response["ETag"]
+        self.client.get(reverse("notifications:read_all"))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_badge_does_not_count_notifications(self):
+        notify(self.user, "Сообщение")
+        response = self.client.get(reverse("notifications:list"))
+        self.assertEqual(response.context["unread_notifications_count"], 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        Notification.objects.create(user=self.user, message="в обход notify")
+        User.objects.filter(pk=self.user.pk).update(unread_notifications_count=42)
+
+        call_command("reconcile_unread_notifications", stdout=StringIO())
+
+        self.assertEqual(self.unread(), 1)
+
+
+class RetentionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+
+    def make(self, count, days_ago, is_read):
+        created = Notification.objects.bulk_create([
+            Notification(user=self.user, message=f"{days_ago}д {i}", is_read=is_read) for i in range(count)
+        ])
+        Notification.objects.filter(pk__in=[n.pk for n in created]).update(
+            created_at=timezone.now() - timedelta(days=days_ago),
+        )
+        return created
+
+    def test_archives_only_old_read_in_batches(self):
+        old_read = self.make(5, 400, is_read=True)
+        old_unread = self.make(2, 400, is_read=False)
+        fresh_read = self.make(3, 1, is_read=True)
+
+        out = StringIO()
+        call_command("archive_notifications", "--days", "180", "--batch-size", "2", stdout=out)
+        self.assertIn("Archived 5 notifications", out.getvalue())
+
+        self.assertEqual(
+            set(Notification.objects.values_list("pk", flat=True)), {n.pk for n in old_unread + fresh_read},
+        )
+        archived = ArchivedNotification.objects.get(pk=old_read[0].pk)
+        self.assertEqual((archived.user_id, archived.message), (self.user.pk, old_read[0].message))
+        self.assertLess(archived.created_at, timezone.now() - timedelta(days=399))
+
+        # повторный запуск ничего не переносит
+        call_command("archive_notifications", "--days", "180", stdout=StringIO())
+        self.assertEqual(ArchivedNotification.objects.count(), 5)
+
+    def test_created_at_out_of_id_order(self):
+        # импорт/перенос: created_at не растёт вместе с id
+        rng = random.Random(25)
+        ages = [rng.choice([1, 10, 200, 400]) for _ in range(60)]
+        for age in ages:
+            self.make(1, age, is_read=True)
+        self.make(3, 1, is_read=True)  # самые большие id — свежие
+
+        call_command("archive_notifications", "--days", "180", "--batch-size", "7", stdout=StringIO())
+
+        self.assertEqual(ArchivedNotification.objects.count(), sum(age > 180 for age in ages))
+        self.assertFalse(
+            Notification.objects.filter(created_at__lt=timezone.now() - timedelta(days=180)).exists()
+        )
+
+    def test_list_is_paginated_by_cursor(self):
+        self.make(55, 1, is_read=True)
+        self.client.force_login(self.user)
+
+        first = self.client.get(reverse("notifications:list"))
+        self.assertEqual(len(first.context["notifications"]), 50)
+        second = self.client.get(reverse("notifications:list"), {"cursor": first.context["next_cursor"]})
+        self.assertEqual(len(second.context["notifications"]), 5)
+        self.assertIsNone(second.context["next_cursor"])
+        self.assertFalse({n.pk for n in first.context["notifications"]} & {n.pk for n in second.context["notifications"]})
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class NotifyManyTest(TestCase):
+    def test_broadcast_is_constant_number_of_statements(self):
+        users = [
+            User.objects.create_user(username=f"comm{i}", password="x", role=User.Role.COMMISSION)
+            for i in range(25)
+        ]
+
+        # INSERT уведомлений + UPDATE счётчиков
+        with self.assertNumQueries(2):
+            notify_many(users, "Новая заявка готова к защите", link="/process/1/")
+
+        self.assertEqual(Notification.objects.count(), 25)
+        self.assertEqual(set(User.objects.values_list("unread_notifications_count", flat=True)), {1})
+
+
+    def test_inapp_channel_groups_counter_updates(self):
+        users = [
+            User.objects.create_user(username=f"comm{i}", password="x", role=User.Role.COMMISSION)
+            for i in range(10)
+        ]
+        # первым троим по два сообщения, остальным по одному
+        messages = [OutboxMessage(pk=i, channel="inapp", user=u, message="Письмо") for i, u in enumerate(users + users[:3])]
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(InAppChannel().send_many(messages), {})
+
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)
+        counts = dict(User.objects.values_list("username", "unread_notifications_count"))
+        self.assertEqual(counts, {u.username: 2 if i < 3 else 1 for i, u in enumerate(users)})
+
+
+class BrokenChannel(Channel):
+    name = "broken"
+
+    def send(self, msg):
+        raise ConnectionError("smtp down")
+
+
+class ProbeChannel(Channel):
+    """
+    Во время доставки смотрит, что видит параллельный воркер.
+    """
+    name = "probe"
+    seen_by_other_worker = None
+
+    def send(self, msg):
+        ProbeChannel.seen_by_other_worker = claim_pending(100)
+
+
+@override_settings(
+    NOTIFICATIONS_USE_OUTBOX=True,
+    NOTIFICATIONS_DELIVERY_CHANNELS=["inapp"],
+    NOTIFICATIONS_CHANNEL_BACKENDS={
+        "inapp": "apps.notifications.channels.InAppChannel",
+        "file": "apps.notifications.channels.FileSinkChannel",
+        "broken": "apps.notifications.tests.BrokenChannel",
+        "probe": "apps.notifications.tests.ProbeChannel",
+    },
+)
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"comm{i}", password="x", role=User.Role.COMMISSION)
+            for i in range(5)
+        ]
+
+    def test_notify_only_enqueues_and_worker_delivers(self):
+        with self.assertNumQueries(1):
+            notify_many(self.users, "Новая заявка готова к защите")
+        self.assertFalse(Notification.objects.exists())
+
+        sent, failed = deliver_pending(batch_size=100)
+
+        self.assertEqual((sent, failed), (5, 0))
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(set(User.objects.values_list("unread_notifications_count", flat=True)), {1})
+        self.assertFalse(OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING).exists())
+
+    def test_file_sink_channel(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = Path(tmp) / "sink.jsonl"
+            with self.settings(NOTIFICATIONS_DELIVERY_CHANNELS=["file"], NOTIFICATIONS_FILE_SINK_PATH=str(sink)):
+                notify(self.users[0], "Письмо", link="/process/1/")
+                deliver_pending()
+            lines = [json.loads(line) for line in sink.read_text(encoding="utf-8").splitlines()]
+
+        self.assertEqual(lines[0]["user"], self.users[0].pk)
+        self.assertEqual(lines[0]["message"], "Письмо")
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        with self.settings(NOTIFICATIONS_DELIVERY_CHANNELS=["broken"], NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS=2):
+            notify(self.users[0], "Письмо")
+
+            self.assertEqual(deliver_pending(), (0, 1))
+            msg = OutboxMessage.objects.get()
+            self.assertEqual(msg.status, OutboxMessage.Status.PENDING)
+            self.assertEqual(msg.attempts, 1)
+            self.assertIn("smtp down", msg.last_error)
+            # следующая попытка отложена — сразу повторно не берётся
+            self.assertEqual(deliver_pending(), (0, 0))
+
+            OutboxMessage.objects.update(next_attempt_at=msg.created_at)
+            deliver_pending()
+            self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.Status.FAILED)
+
+    def test_claimed_batch_is_leased_until_result_is_recorded(self):
+        with self.settings(NOTIFICATIONS_DELIVERY_CHANNELS=["probe"]):
+            notify(self.users[0], "Письмо")
+            self.assertEqual(deliver_pending(), (1, 0))
+
+        # пока первый воркер отправлял, второй ту же пачку не получил
+        self.assertEqual(ProbeChannel.seen_by_other_worker, [])
+        self.assertEqual(OutboxMessage.objects.get().status, OutboxMessage.Status.SENT)
+
+        # воркер упал после claim: по истечении аренды сообщение забирают снова
+        notify(self.users[1], "Письмо")
+        self.assertEqual(len(claim_pending(100)), 1)
+        self.assertEqual(claim_pending(100), [])
+        OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING).update(next_attempt_at=timezone.now())
+        self.assertEqual(len(claim_pending(100)), 1)
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class LiveNotificationsTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+
+    def test_stream_is_closed_outside_asgi(self):
+        self.client.force_login(self.user)
+        # WSGI: 204 говорит EventSource не переподключаться
+        self.assertEqual(self.client.get(reverse("notifications:stream")).status_code, 204)
+
+    @skipUnless(connection.vendor == "postgresql", "LISTEN/NOTIFY — только PostgreSQL")
+    def test_stream_pushes_new_and_replays_missed(self):
+        other = User.objects.create_user(username="other", password="x", role=User.Role.AUTHOR)
+        notify(self.user, "Уже показано")
+        notify(self.user, "Пока не было подключения")
+        seen = Notification.objects.filter(user=self.user).order_by("pk").first()
+
+        async def scenario():
+            stream = live.event_stream(self.user.pk, seen.pk, max_seconds=10)
+            try:
+                self.assertTrue((await anext(stream)).startswith("retry:"))
+                self.assertIn("Пока не было подключения", await anext(stream))
+                await sync_to_async(notify)(self.user, "Новое")
+                await sync_to_async(notify)(other, "Чужое")
+                event = await asyncio.wait_for(anext(stream), timeout=5)
+            finally:
+                await stream.aclose()
+                live.listener.close()
+            return event
+
+        event = async_to_sync(scenario)()
+        self.assertTrue(event.startswith("id: ") and "\nevent: notification\n" in event, event)
+        self.assertEqual(json.loads(event.split("data: ", 1)[1])["message"], "Новое")
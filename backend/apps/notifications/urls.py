@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import notification_list, mark_read, mark_all_read, notification_detail
+from .views import notification_list, mark_read, mark_all_read, notification_detail, notification_stream
 
 app_name = "notifications"
 
@@ -8,4 +8,5 @@ urlpatterns = [
     path("<int:pk>/", notification_detail, name="detail"),  # ДОБАВИТЬ
     path("read/<int:pk>/", mark_read, name="read"),
     path("read-all/", mark_all_read, name="read_all"),
+    path("stream/", notification_stream, name="stream"),
 ]
\ No newline at end of file
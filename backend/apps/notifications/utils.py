@@ -1,6 +1,112 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.accounts.backends import forget_users
+
 from .models import Notification
+from .outbox import enqueue, enqueue_rows
+
+User = get_user_model()
+
+
+def _bump_unread(user_id, delta: int):
+    if delta:
+        User.objects.filter(pk=user_id).update(
+            unread_notifications_count=Greatest(F("unread_notifications_count") + delta, 0)
+        )
+        forget_users([user_id])
+
+
+def bump_unread_many(user_ids):
+    """
+    +1 к счётчику непрочитанных за каждое вхождение id в user_ids: один UPDATE
+    на каждое различное приращение (обычно один-два), а не на пользователя.
+    """
+    counts = Counter(user_ids)
+    by_delta = defaultdict(list)
+    for uid, delta in counts.items():
+        by_delta[delta].append(uid)
+    for delta, uids in by_delta.items():
+        User.objects.filter(pk__in=uids).update(unread_notifications_count=F("unread_notifications_count") + delta)
+    # счётчик лежит в закэшированном пользователе (accounts.backends)
+    forget_users(counts)
+
 
 def notify(user, message: str, link: str = "", process=None):
     if user is None:
         return
-    Notification.objects.create(user=user, message=message, link=link, process=process)
\ No newline at end of file
+    if settings.NOTIFICATIONS_USE_OUTBOX:
+        enqueue([user.pk], message, link=link, process=process)
+        return
+    Notification.objects.create(user=user, message=message, link=link, process=process)
+    _bump_unread(user.pk, 1)
+
+
+def notify_many(users, message: str, link: str = "", process=None, batch_size=None):
+    """
+    Рассылка одного сообщения группе пользователей: bulk_create пачками
+    (NOTIFICATIONS_BULK_BATCH_SIZE) и один UPDATE счётчиков вместо N пар INSERT+UPDATE.
+    """
+    notify_bulk([([u.pk for u in users if u is not None], message, link, process)], batch_size=batch_size)
+
+
+def notify_bulk(entries, batch_size=None):
+    """
+    Несколько рассылок одним пакетом: entries — [(user_ids, message, link, process)].
+    Все уведомления уходят одним bulk_create, счётчики — одним UPDATE на каждое
+    различное приращение (обычно один-два).
+    """
+    rows = []
+    for user_ids, message, link, process in entries:
+        for uid in dict.fromkeys(uid for uid in user_ids if uid is not None):
+            rows.append((uid, message, link, process))
+    if not rows:
+        return
+    if settings.NOTIFICATIONS_USE_OUTBOX:
+        enqueue_rows(rows)
+        return
+    if batch_size is None:
+        batch_size = getattr(settings, "NOTIFICATIONS_BULK_BATCH_SIZE", 500)
+
+    Notification.objects.bulk_create(
+        [Notification(user_id=uid, message=message, link=link, process=process) for uid, message, link, process in rows],
+        batch_size=batch_size,
+    )
+    bump_unread_many(uid for uid, *_ in rows)
+
+
+def mark_notification_read(notification: Notification):
+    """
+    Условный UPDATE: счётчик уменьшается только если уведомление действительно
+    было непрочитанным (повторный клик/гонка двух вкладок не уводят его в минус).
+    """
+    updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+    notification.is_read = True
+    _bump_unread(notification.user_id, -updated)
+
+
+def mark_all_notifications_read(user):
+    updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    _bump_unread(user.pk, -updated)
+
+
+def reconcile_unread_counts(users=None) -> int:
+    """
+    Пересчитывает счётчики по таблице уведомлений. Возвращает число обновлённых пользователей.
+    """
+    unread = (
+        Notification.objects
+        .filter(user=OuterRef("pk"), is_read=False)
+        .order_by()
+        .values("user")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    qs = User.objects.all() if users is None else users
+    updated = qs.update(unread_notifications_count=Coalesce(Subquery(unread), Value(0)))
+    forget_users(qs.values_list("pk", flat=True))
+    return updated
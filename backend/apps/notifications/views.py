@@ -1,13 +1,74 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.db.models import Max
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
+from . import live
 from .models import Notification
+from .utils import mark_notification_read, mark_all_notifications_read
+from apps.accounts.conditional import conditional_page
 from apps.publications.models import ReviewerAssignment
+from apps.publications.pagination import keyset_page
+
+NOTIFICATION_LIST_PAGE_SIZE = 50
+
+
+def _list_last_modified(request):
+    if request.GET.get("cursor"):
+        return None  # дальние страницы меняет и архивация — их просто рендерим
+    # прочтение меняет счётчик непрочитанных, а он входит в ETag (accounts.conditional)
+    return Notification.objects.filter(user=request.user).aggregate(last=Max("created_at"))["last"]
+
 
 @login_required
+@conditional_page(_list_last_modified)
 def notification_list(request):
-    qs = Notification.objects.filter(user=request.user)
-    return render(request, "notifications/list.html", {"notifications": qs})
+    page = keyset_page(
+        Notification.objects.filter(user=request.user),
+        cursor=request.GET.get("cursor", ""),
+        page_size=NOTIFICATION_LIST_PAGE_SIZE,
+    )
+    return render(request, "notifications/list.html", {"notifications": page.items, "next_cursor": page.next_cursor})
+
+
+def _stream_user_id(request):
+    user = request.user
+    return user.pk if user.is_authenticated else None
+
+
+async def notification_stream(request):
+    """
+    SSE-поток новых уведомлений пользователя (live.py). Работает только под ASGI
+    и на PostgreSQL; иначе 204 — EventSource по нему перестаёт переподключаться,
+    и бейдж, как раньше, обновляется при перезагрузке страницы.
+    """
+    # login_required в Django 4.2 не оборачивает async-view
+    user_id = await sync_to_async(_stream_user_id)(request)
+    if user_id is None:
+        return HttpResponse(status=204)
+    if not isinstance(request, ASGIRequest) or connections["default"].vendor != "postgresql":
+        return HttpResponse(status=204)
+
+    last_id = request.headers.get("Last-Event-ID", "")
+    response = StreamingHttpResponse(
+        live.event_stream(user_id, int(last_id) if last_id.isdigit() else 0, settings.NOTIFICATIONS_STREAM_MAX_SECONDS),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx не должен буферизовать поток
+    origin = request.headers.get("Origin", "")
+    if origin in settings.NOTIFICATIONS_STREAM_ORIGINS:
+        # ASGI-воркер на отдельном порту/домене: EventSource с withCredentials
+        response["Access-Control-Allow-Origin"] = origin
+        response["Access-Control-Allow-Credentials"] = "true"
+        response["Vary"] = "Origin"
+    # сессия и пользователь уже прочитаны: соединение с БД на время потока не держим
+    await sync_to_async(connections.close_all)()
+    return response
 
 
 @login_required
@@ -15,8 +76,7 @@ def notification_detail(request, pk: int):
     n = get_object_or_404(Notification, pk=pk, user=request.user)
 
     if not n.is_read:
-        n.is_read = True
-        n.save(update_fields=["is_read"])
+        mark_notification_read(n)
 
     process = n.process
 
@@ -59,12 +119,11 @@ def notification_detail(request, pk: int):
 @login_required
 def mark_read(request, pk: int):
     n = get_object_or_404(Notification, pk=pk, user=request.user)
-    n.is_read = True
-    n.save(update_fields=["is_read"])
+    mark_notification_read(n)
     return redirect("notifications:list")
 
 
 @login_required
 def mark_all_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_all_notifications_read(request.user)
     return redirect("notifications:list")
\ No newline at end of file
@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+
 from .models import (
     Council, PublicationTemplate,
     Process, CoAuthor, ProcessDocuments,
-    LibraryDecision, ReviewerAssignment, OEKDecision
+    LibraryDecision, ReviewerAssignment, OEKDecision, DocumentVersion,
 )
+from .search import fuzzy_search_processes, search_processes
 
 
 @admin.register(Council)
@@ -28,13 +31,39 @@ class DocumentsInline(admin.StackedInline):
     extra = 0
 
 
+class RankedChangeList(ChangeList):
+    """
+    Результаты поиска — по релевантности, пока не выбрана сортировка по колонке.
+    """
+
+    def get_ordering(self, request, queryset):
+        if self.query.strip() and ORDER_VAR not in self.params:
+            return ["-rank", "-pk"]
+        return super().get_ordering(request, queryset)
+
+
 @admin.register(Process)
 class ProcessAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "author", "status", "is_mifi", "created_at", "updated_at")
     list_filter = ("status", "is_mifi", "council")
     search_fields = ("title", "journal", "author__username", "author__fio")
+    search_help_text = "Полнотекстовый поиск: название, журнал, ФИО автора и соавторов, комментарии"
     inlines = [CoAuthorInline, DocumentsInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        qs = search_processes(queryset, search_term)
+        # changelist отдаёт queryset целиком, страницу заранее не взять (как search_page);
+        # админка — не горячий путь, проверка пустоты здесь допустима
+        fuzzy = fuzzy_search_processes(queryset, search_term)
+        if fuzzy is not None and not qs.exists():
+            qs = fuzzy
+        return qs, False
+
+    def get_changelist(self, request, **kwargs):
+        return RankedChangeList
+
 
 @admin.register(LibraryDecision)
 class LibraryDecisionAdmin(admin.ModelAdmin):
@@ -49,4 +78,23 @@ class ReviewerAssignmentAdmin(admin.ModelAdmin):
 
 @admin.register(OEKDecision)
 class OEKDecisionAdmin(admin.ModelAdmin):
-    list_display = ("process", "decision", "oek_user", "decided_at")
\ No newline at end of file
+    list_display = ("process", "decision", "oek_user", "decided_at")
+
+
+@admin.register(DocumentVersion)
+class DocumentVersionAdmin(admin.ModelAdmin):
+    list_display = ("documents", "field", "number", "size", "created_at")
+    list_filter = ("field",)
+    list_select_related = ("documents",)
+    exclude = ("text", "diff")
+    readonly_fields = ("documents", "field", "number", "file", "size", "created_at")
+
+    # история только дописывается
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class PublicationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.publications"
-    verbose_name = "Заявки и согласования"
\ No newline at end of file
+    verbose_name = "Заявки и согласования"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,266 @@
+"""
+Нагрузочный прогон полного жизненного цикла заявки (manage.py benchmark_workflow).
+
+Каждый поток ведёт свои заявки от создания до защиты через сервисный слой
+и между этапами открывает страницы соответствующих ролей тестовым клиентом.
+Для каждого перехода и каждой страницы пишутся время и число SQL-запросов.
+"""
+import math
+import re
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.notifications.models import Notification, OutboxMessage
+from apps.notifications.utils import reconcile_unread_counts
+
+from . import services
+from .models import Council, Process, CoAuthor, ProcessDocuments, ReviewerAssignment
+
+User = get_user_model()
+
+PREFIX = "bench_"
+PROCESS_REF_RE = re.compile(r"#(\d+)")
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # nearest-rank; round() округлял бы половины к чётному и ошибался на единицу
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def summarize(samples):
+    timings = [s[0] for s in samples]
+    queries = [s[1] for s in samples]
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "mean_ms": round(statistics.fmean(timings), 2) if timings else 0.0,
+        "queries_avg": round(statistics.fmean(queries), 2) if queries else 0.0,
+        "queries_max": max(queries, default=0),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transitions = defaultdict(list)
+        self.views = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    @contextmanager
+    def measure(self, bucket, name):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            yield
+            elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            bucket[name].append((elapsed, len(ctx)))
+
+    def error(self, name):
+        with self._lock:
+            self.errors[name] += 1
+
+
+class BenchmarkUsers:
+    """
+    Участники прогона (создаются один раз и переиспользуются между запусками).
+    """
+
+    def __init__(self, reviewers: int = 3, commission: int = 5):
+        password = "Passw0rd!234"
+
+        def get(username, role):
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                user = User.objects.create_user(
+                    username=username, password=password, role=role, fio=username, department="Кафедра бенчмарка"
+                )
+            return user
+
+        self.author = get(f"{PREFIX}author", User.Role.AUTHOR)
+        self.librarian = get(f"{PREFIX}librarian", User.Role.LIBRARY_HEAD)
+        self.oek = get(f"{PREFIX}oek", User.Role.OEK)
+        self.reviewers = [get(f"{PREFIX}reviewer_{i}", User.Role.REVIEWER) for i in range(max(3, reviewers))]
+        self.commission = [get(f"{PREFIX}commission_{i}", User.Role.COMMISSION) for i in range(commission)]
+        self.council, _ = Council.objects.get_or_create(department="Кафедра бенчмарка", council_number=f"{PREFIX}1")
+
+
+class WorkflowBenchmark:
+    def __init__(self, lifecycles: int = 50, concurrency: int = 4, mifi_ratio: float = 0.5, reviewers: int = 3):
+        self.lifecycles = lifecycles
+        self.concurrency = concurrency
+        self.mifi_ratio = mifi_ratio
+        self.users = BenchmarkUsers(reviewers=reviewers)
+        self.recorder = Recorder()
+        self.created_ids = []
+        self._ids_lock = threading.Lock()
+        # граница для cleanup(): рассылки прогона — строки outbox/уведомлений после неё
+        self.first_notification_id = Notification.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        self.first_outbox_id = OutboxMessage.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+    def client_for(self, user):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost")
+        client.force_login(user)
+        return client
+
+    def get_view(self, client, name, url):
+        with self.recorder.measure(self.recorder.views, name):
+            response = client.get(url)
+        if response.status_code != 200:
+            self.recorder.error(f"view:{name}:{response.status_code}")
+
+    def transition(self, name, func, *args, **kwargs) -> bool:
+        with self.recorder.measure(self.recorder.transitions, name):
+            applied = func(*args, **kwargs)
+        # переход, который сервис отклонил, — ошибка прогона, а не быстрый шаг
+        if not applied:
+            self.recorder.error(name)
+        return applied
+
+    def run_lifecycle(self, n: int, clients):
+        rec = self.recorder
+        u = self.users
+        is_mifi = (n % 100) < self.mifi_ratio * 100
+
+        def create():
+            process = Process.objects.create(
+                author=u.author, council=u.council, title=f"Бенчмарк {n}", journal="Вестник", is_mifi=is_mifi
+            )
+            docs = ProcessDocuments(process=process)
+            for field in ("article_file", "bibliography_file", "filled_template_file"):
+                getattr(docs, field).save(f"{PREFIX}{field}.txt", ContentFile(b"BENCH"), save=False)
+            docs.save()
+            CoAuthor.objects.create(process=process, name=f"Соавтор {n}", email=f"bench{n}@example.com")
+            if not services.start_or_advance_after_creation(process):
+                rec.error("create")
+            return process
+
+        with rec.measure(rec.transitions, "create"):
+            process = create()
+        with self._ids_lock:
+            self.created_ids.append(process.pk)
+
+        coauthor = process.coauthors.first()
+        coauthor.consent_file.save(f"{PREFIX}consent.txt", ContentFile(b"CONSENT"), save=True)
+        self.transition("coauthor_consents", services.try_advance_after_coauthor_consents, process)
+        self.get_view(clients["librarian"], "library_tasks", reverse("publications:library_tasks"))
+
+        process.refresh_from_db()
+        self.transition(
+            "library_decision", services.library_apply_decision,
+            process, approved=True, comment="", librarian=u.librarian,
+        )
+
+        if is_mifi:
+            for assignment in ReviewerAssignment.objects.filter(process=process).select_related("reviewer", "process"):
+                self.get_view(clients["reviewer"], "reviewer_tasks", reverse("publications:reviewer_tasks"))
+                self.transition(
+                    "reviewer_submit", services.reviewer_submit,
+                    assignment, verdict=ReviewerAssignment.Verdict.RECOMMEND, comment="ok",
+                )
+
+        self.get_view(clients["oek"], "oek_tasks", reverse("publications:oek_tasks"))
+        process.refresh_from_db()
+        self.transition(
+            "oek_decision", services.oek_apply_decision,
+            process, approved=True, comment="", oek_user=u.oek, defense_room="А-101",
+        )
+        process.refresh_from_db(fields=["status"])
+        if process.status != Process.Status.READY_FOR_DEFENSE:
+            rec.error("lifecycle:incomplete")
+
+        self.get_view(clients["author"], "dashboard", reverse("publications:dashboard"))
+        self.get_view(clients["author"], "process_list", reverse("publications:process_list"))
+        self.get_view(clients["author"], "process_detail", reverse("publications:process_detail", args=[process.pk]))
+        self.get_view(clients["commission"], "dashboard_commission", reverse("publications:dashboard"))
+
+    def worker(self, numbers):
+        u = self.users
+        clients = {
+            "author": self.client_for(u.author),
+            "librarian": self.client_for(u.librarian),
+            "reviewer": self.client_for(u.reviewers[0]),
+            "oek": self.client_for(u.oek),
+            "commission": self.client_for(u.commission[0] if u.commission else u.oek),
+        }
+        try:
+            for n in numbers:
+                try:
+                    self.run_lifecycle(n, clients)
+                except Exception as exc:
+                    self.recorder.error(f"lifecycle:{type(exc).__name__}")
+        finally:
+            connection.close()
+
+    def run(self) -> dict:
+        chunks = [range(i, self.lifecycles, self.concurrency) for i in range(self.concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(self.worker, chunks))
+        duration = time.perf_counter() - started
+
+        total_transitions = sum(len(v) for v in self.recorder.transitions.values())
+        return {
+            "config": {
+                "lifecycles": self.lifecycles,
+                "concurrency": self.concurrency,
+                "mifi_ratio": self.mifi_ratio,
+                "database": connection.vendor,
+            },
+            "duration_s": round(duration, 3),
+            "transitions_total": total_transitions,
+            "transitions_per_second": round(total_transitions / duration, 2) if duration else 0.0,
+            "lifecycles_per_second": round(self.lifecycles / duration, 2) if duration else 0.0,
+            "transitions": {name: summarize(s) for name, s in sorted(self.recorder.transitions.items())},
+            "views": {name: summarize(s) for name, s in sorted(self.recorder.views.items())},
+            "errors": dict(self.recorder.errors),
+        }
+
+    def cleanup(self):
+        """
+        Удаляет заявки прогона вместе с их уведомлениями. Рассылки по ролям
+        (библиотека, ОЭК, комиссия) доходят и до настоящих сотрудников и к заявке
+        не привязаны (attach_process=False), поэтому их находим по номеру заявки
+        в тексте среди строк, созданных во время прогона; затем пересчитываем
+        счётчики непрочитанных у всех получателей.
+        """
+        created = set(self.created_ids)
+
+        def mentions_run(message):
+            return any(int(pk) in created for pk in PROCESS_REF_RE.findall(message))
+
+        recipients = set(Notification.objects.filter(process__in=created).values_list("user_id", flat=True))
+        broadcast = [
+            (pk, user_id)
+            for pk, user_id, message in Notification.objects.filter(pk__gt=self.first_notification_id, process=None)
+            .values_list("pk", "user_id", "message")
+            if mentions_run(message)
+        ]
+        Notification.objects.filter(pk__in=[pk for pk, _ in broadcast]).delete()
+        recipients.update(user_id for _, user_id in broadcast)
+        OutboxMessage.objects.filter(pk__in=[
+            pk for pk, message in OutboxMessage.objects.filter(pk__gt=self.first_outbox_id, process=None)
+            .values_list("pk", "message")
+            if mentions_run(message)
+        ]).delete()
+
+        Process.objects.filter(pk__in=created).delete()
+        if recipients:
+            reconcile_unread_counts(User.objects.filter(pk__in=recipients))
@@ -0,0 +1,205 @@
+"""
+Потоковая выгрузка заявок с решениями (CSV/XLSX) для администраторов.
+
+Строки читаются серверным курсором (.iterator(chunk_size=...)), рецензии
+подгружаются prefetch'ем на каждый чанк, а файл отдаётся генератором —
+память не зависит от числа строк. XLSX собирается без сторонних библиотек:
+zip пишется в поток, лист — inline-строками.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Process, ReviewerAssignment
+
+EXPORT_CHUNK_SIZE = 2000
+
+HEADERS = [
+    "ID", "Название", "Журнал", "МИФИ", "Статус", "Создана", "Обновлена",
+    "Кафедра", "Совет", "Автор", "Логин автора", "Кафедра автора",
+    "Библиотека: решение", "Библиотека: дата", "Библиотека: комментарий",
+    "ОЭК: решение", "ОЭК: дата", "ОЭК: комментарий",
+    "Рецензии", "Дата защиты", "Место защиты",
+]
+
+
+def export_queryset(qs=None):
+    qs = Process.objects.all() if qs is None else qs
+    return (
+        qs.select_related("council", "author", "library_decision", "oek_decision")
+        .prefetch_related(Prefetch(
+            "review_assignments",
+            queryset=ReviewerAssignment.objects.select_related("reviewer").order_by("id"),
+        ))
+        .order_by("pk")
+    )
+
+
+def _dt(value):
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+def _decision(obj):
+    if obj is None:
+        return "", "", ""
+    return obj.get_decision_display(), _dt(obj.decided_at), obj.comment
+
+
+def process_row(p: Process) -> list:
+    # OneToOne без строки -> RelatedObjectDoesNotExist, поэтому getattr с default
+    library = _decision(getattr(p, "library_decision", None))
+    oek = _decision(getattr(p, "oek_decision", None))
+    reviews = "; ".join(
+        f"{a.reviewer.display_name()}: {a.get_verdict_display()}" for a in p.review_assignments.all()
+    )
+    return [
+        p.pk, p.title, p.journal, "да" if p.is_mifi else "нет", p.get_status_display(),
+        _dt(p.created_at), _dt(p.updated_at),
+        p.council.department, p.council.council_number,
+        p.author.display_name(), p.author.username, p.author.department,
+        *library, *oek,
+        reviews, _dt(p.defense_datetime), p.defense_room,
+    ]
+
+
+def iter_rows(qs=None, chunk_size=EXPORT_CHUNK_SIZE):
+    for p in export_queryset(qs).iterator(chunk_size=chunk_size):
+        yield process_row(p)
+
+
+# Ячейка с такого символа — формула для Excel/LibreOffice (CSV/formula injection):
+# название или комментарий вида "=HYPERLINK(...)" выполнился бы у администратора
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _neutralize(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """
+    Псевдо-файл для csv.writer: write() возвращает строку, а не пишет её.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    # BOM — чтобы Excel открыл кириллицу без мастера импорта
+    yield "\ufeff" + writer.writerow(HEADERS)
+    for row in rows:
+        yield writer.writerow([_neutralize(v) for v in row])
+
+
+# --- XLSX --------------------------------------------------------------------
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Заявки" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+# символы, недопустимые в XML 1.0
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_ILLEGAL.sub("", _neutralize(str(value))))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values) -> bytes:
+    return ("<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>").encode("utf-8")
+
+
+class _StreamBuffer:
+    """
+    Приёмник для zipfile без seek/tell (zipfile пишет в него как в поток): накопленное забирается drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_xlsx(rows, flush_every=500):
+    out = _StreamBuffer()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, body in _XLSX_PARTS.items():
+            zf.writestr(name, body)
+        # force_zip64: размер листа заранее неизвестен
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode("utf-8"))
+            sheet.write(_xlsx_row(HEADERS))
+            for i, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row))
+                if i % flush_every == 0:
+                    chunk = out.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+    yield out.drain()
+
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", iter_csv),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", iter_xlsx),
+}
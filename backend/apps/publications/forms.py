@@ -1,6 +1,10 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.forms import modelformset_factory
-from .models import Process, CoAuthor, ProcessDocuments, LibraryDecision, ReviewerAssignment, OEKDecision
+from django.utils import timezone
+from .models import Council, Process, CoAuthor, ProcessDocuments, LibraryDecision, ReviewerAssignment, OEKDecision, UploadSession
+from .uploads import UploadError, claim_upload
 
 
 class ProcessCreateForm(forms.ModelForm):
@@ -15,7 +19,51 @@ class ProcessCreateForm(forms.ModelForm):
         }
 
 
-class DocumentsForm(forms.ModelForm):
+class ChunkedUploadMixin:
+    """
+    Файл приходит либо обычным полем, либо id завершённой докачиваемой загрузки
+    в скрытом поле <поле>_upload (его заполняет static/js/chunked_upload.js).
+    """
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.uploads = {}
+        for name in self._meta.fields:
+            self.fields[f"{name}_upload"] = forms.UUIDField(required=False, widget=forms.HiddenInput)
+            if self.data.get(f"{name}_upload"):
+                self.fields[name].required = False
+
+    def clean(self):
+        cleaned = super().clean()
+        for name in self._meta.fields:
+            upload_id = cleaned.get(f"{name}_upload")
+            if not upload_id:
+                continue
+            session = UploadSession.objects.filter(
+                pk=upload_id, user=self.user, field=name, status=UploadSession.Status.COMPLETE,
+            ).first()
+            if session is None:
+                self.add_error(name, "Загрузка не найдена или не завершена, выберите файл заново.")
+            else:
+                self.uploads[name] = session
+        return cleaned
+
+    def has_file(self, name) -> bool:
+        return bool(self.cleaned_data.get(name)) or name in self.uploads
+
+    def save(self, commit=True):
+        # вызывать внутри transaction.atomic: сессии помечаются использованными сразу
+        instance = super().save(commit=False)
+        for session in self.uploads.values():
+            if not claim_upload(session, instance):
+                raise UploadError("Загрузка уже использована, выберите файл заново.")
+        if commit:
+            instance.save()
+        return instance
+
+
+class DocumentsForm(ChunkedUploadMixin, forms.ModelForm):
     class Meta:
         model = ProcessDocuments
         fields = ("article_file", "bibliography_file", "filled_template_file")
@@ -75,7 +123,7 @@ class OEKDecisionForm(forms.ModelForm):
         fields = ("decision", "comment")
         labels = {"decision": "Решение", "comment": "Комментарий"}
 
-class ReviewerReworkUploadForm(forms.ModelForm):
+class ReviewerReworkUploadForm(ChunkedUploadMixin, forms.ModelForm):
     class Meta:
         model = ProcessDocuments
         fields = ("article_file", "filled_template_file")
@@ -91,13 +139,90 @@ class ReviewerReworkUploadForm(forms.ModelForm):
 
     def clean(self):
         cleaned = super().clean()
-        if not cleaned.get("article_file") and not cleaned.get("filled_template_file"):
+        if not self.has_file("article_file") and not self.has_file("filled_template_file"):
             raise forms.ValidationError("Загрузите хотя бы один исправленный файл.")
         return cleaned
 
 
-class BibliographyReworkUploadForm(forms.ModelForm):
+class BibliographyReworkUploadForm(ChunkedUploadMixin, forms.ModelForm):
     class Meta:
         model = ProcessDocuments
         fields = ("bibliography_file",)
-        labels = {"bibliography_file": "Исправленный список литературы"}
\ No newline at end of file
+        labels = {"bibliography_file": "Исправленный список литературы"}
+
+class ProcessListFilterForm(forms.Form):
+    q = forms.CharField(
+        required=False, max_length=200, label="Поиск",
+        widget=forms.TextInput(attrs={"placeholder": "Название, журнал, ФИО, комментарии"}),
+    )
+    status = forms.ChoiceField(required=False, label="Статус")
+    council = forms.ChoiceField(required=False, label="Совет")
+    department = forms.ChoiceField(required=False, label="Кафедра")
+    date_from = forms.DateField(required=False, label="Создана с", widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(required=False, label="Создана по", widget=forms.DateInput(attrs={"type": "date"}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # один запрос на оба списка (совет и кафедра)
+        councils = list(Council.objects.all())
+        departments = sorted({c.department for c in councils})
+
+        self.fields["status"].choices = [("", "Все")] + list(Process.Status.choices)
+        self.fields["council"].choices = [("", "Все")] + [(str(c.pk), str(c)) for c in councils]
+        self.fields["department"].choices = [("", "Все")] + [(d, d) for d in departments]
+
+    def search_text(self) -> str:
+        return self.cleaned_data.get("q", "").strip() if self.is_valid() else ""
+
+    def filter(self, qs):
+        if not self.is_valid():
+            return qs
+        data = self.cleaned_data
+        if data.get("status"):
+            qs = qs.filter(status=data["status"])
+        if data.get("council"):
+            qs = qs.filter(council_id=data["council"])
+        if data.get("department"):
+            qs = qs.filter(council__department=data["department"])
+        # границы считаем в локальной зоне, чтобы фильтр оставался диапазоном по created_at
+        if data.get("date_from"):
+            qs = qs.filter(created_at__gte=timezone.make_aware(datetime.combine(data["date_from"], time.min)))
+        if data.get("date_to"):
+            next_day = data["date_to"] + timedelta(days=1)
+            qs = qs.filter(created_at__lt=timezone.make_aware(datetime.combine(next_day, time.min)))
+        return qs
+
+
+class BatchDecisionForm(forms.Form):
+    """
+    Общее решение для отмеченных заявок; индивидуальные комментарии приходят
+    полями comment_<id>, пустые заменяются общим.
+    """
+    decision = forms.ChoiceField(label="Решение", choices=[
+        (LibraryDecision.Decision.APPROVED, "Согласовано"),
+        (LibraryDecision.Decision.REJECTED, "Отклонено"),
+    ])
+    comment = forms.CharField(label="Общий комментарий", required=False, widget=forms.Textarea(attrs={"rows": 2}))
+
+    @property
+    def approved(self):
+        return self.cleaned_data["decision"] == LibraryDecision.Decision.APPROVED
+
+    def comments(self, data, ids):
+        return {pk: (data.get(f"comment_{pk}") or "").strip() or self.cleaned_data["comment"] for pk in ids}
+
+
+class OEKBatchDecisionForm(BatchDecisionForm):
+    defense_datetime = forms.DateTimeField(
+        required=False,
+        label="Дата/время защиты для согласованных (опционально)",
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local"}),
+    )
+    defense_room = forms.CharField(required=False, label="Место защиты (опционально)")
+
+
+class BatchVerdictForm(BatchDecisionForm):
+    decision = forms.ChoiceField(
+        label="Вердикт",
+        choices=[c for c in ReviewerAssignment.Verdict.choices if c[0] != ReviewerAssignment.Verdict.PENDING],
+    )
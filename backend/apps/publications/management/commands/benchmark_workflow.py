@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.publications.benchmark import WorkflowBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогоняет полные жизненные циклы заявок (создание → согласия → библиотека → рецензенты → ОЭК → защита) "
+        "в несколько потоков и печатает JSON: p50/p95/p99, запросы на страницу/переход, переходов в секунду."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lifecycles", type=int, default=50)
+        parser.add_argument("--concurrency", type=int, default=4, help="Параллельных потоков (симулируемых пользователей).")
+        parser.add_argument("--mifi-ratio", type=float, default=0.5, help="Доля заявок с внутренним рецензированием.")
+        parser.add_argument("--reviewers", type=int, default=3)
+        parser.add_argument("--output", help="Записать JSON в файл вместо stdout.")
+        parser.add_argument("--keep", action="store_true", help="Не удалять созданные заявки после прогона.")
+
+    def handle(self, *args, **options):
+        bench = WorkflowBenchmark(
+            lifecycles=options["lifecycles"],
+            concurrency=options["concurrency"],
+            mifi_ratio=options["mifi_ratio"],
+            reviewers=options["reviewers"],
+        )
+        try:
+            report = bench.run()
+        finally:
+            if not options["keep"]:
+                bench.cleanup()
+
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.publications.models import UploadPart, UploadSession
+
+
+class Command(BaseCommand):
+    help = "Удаляет брошенные докачиваемые загрузки (части и несобранные/непривязанные файлы) старше TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.UPLOAD_SESSION_TTL_HOURS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff).exclude(status=UploadSession.Status.ATTACHED)
+
+        session_ids = list(stale.values_list("pk", flat=True))
+        names = list(UploadPart.objects.filter(session__in=session_ids).values_list("name", flat=True))
+        names += [n for n in stale.filter(status=UploadSession.Status.COMPLETE).values_list("file", flat=True) if n]
+        deleted, _ = UploadSession.objects.filter(pk__in=session_ids).delete()
+        for name in names:
+            default_storage.delete(name)
+        # каталог частей целиком: в нём могут остаться недописанные части без строки UploadPart
+        for pk in session_ids:
+            self.remove_dir(f"uploads/{pk}")
+
+        # привязанные сессии больше не нужны: файл живёт в ProcessDocuments
+        UploadSession.objects.filter(status=UploadSession.Status.ATTACHED, updated_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} stale upload records, {len(names)} files."))
+
+    def remove_dir(self, path: str):
+        if not default_storage.exists(path):
+            return
+        _, files = default_storage.listdir(path)
+        for name in files:
+            default_storage.delete(f"{path}/{name}")
+        default_storage.delete(path)
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.publications.export import EXPORT_CHUNK_SIZE, FORMATS, iter_rows
+from apps.publications.models import Process
+
+
+class Command(BaseCommand):
+    help = "Выгружает заявки с решениями, рецензиями и защитой в CSV/XLSX потоково (память не растёт с числом строк)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--output", help="Файл для записи (по умолчанию stdout).")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Строк за одно чтение курсора.")
+        parser.add_argument("--status", choices=Process.Status.values, help="Только заявки в этом статусе.")
+
+    def handle(self, *args, **options):
+        qs = Process.objects.all()
+        if options["status"]:
+            qs = qs.filter(status=options["status"])
+
+        _, render_rows = FORMATS[options["format"]]
+        chunks = render_rows(iter_rows(qs, chunk_size=options["chunk_size"]))
+
+        out = open(options["output"], "wb") if options["output"] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        finally:
+            if options["output"]:
+                out.close()
+                self.stderr.write(self.style.SUCCESS(f"Export written to {options['output']}"))
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.publications.storage import ContentAddressedStorage, collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Сверяет счётчики ссылок и удаляет blob'ы контентно-адресуемого хранилища, на которые никто не ссылается."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=int, default=24, help="Не трогать blob'ы, менявшиеся позже.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError('STORAGES["default"] — не ContentAddressedStorage, собирать нечего.')
+        stats = collect_garbage(default_storage, timedelta(hours=options["grace_hours"]), dry_run=options["dry_run"])
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['deleted']} blobs ({stats['freed']} bytes) and {stats['orphans']} orphan files; "
+            f"fixed {stats['fixed']} refcounts."
+        ))
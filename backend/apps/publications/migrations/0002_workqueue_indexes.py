@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(fields=['created_at', 'id'], name='process_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='process_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='process_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(condition=models.Q(('status', 'LIBRARY_REVIEW')), fields=['created_at'], name='process_library_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(condition=models.Q(('status', 'OEK_REVIEW')), fields=['created_at'], name='process_oek_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(condition=models.Q(('status', 'READY_FOR_DEFENSE')), fields=['-updated_at'], name='process_defense_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewerassignment',
+            index=models.Index(fields=['reviewer', 'process'], name='assignment_reviewer_proc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reviewerassignment',
+            index=models.Index(fields=['reviewer', 'verdict'], name='assignment_reviewer_verd_idx'),
+        ),
+    ]
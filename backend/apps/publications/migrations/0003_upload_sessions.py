@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('publications', '0002_workqueue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('article_file', 'Файл статьи/тезисов'), ('bibliography_file', 'Список литературы'), ('filled_template_file', 'Заполненный шаблон')], max_length=32)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 всего файла (необязательно)')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Загружается'), ('COMPLETE', 'Собрана'), ('ATTACHED', 'Привязана к заявке')], default='ACTIVE', max_length=16)),
+                ('file', models.FileField(blank=True, max_length=255, upload_to='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadPart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('name', models.CharField(max_length=255, verbose_name='Имя части в хранилище')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='publications.uploadsession')),
+            ],
+            options={
+                'ordering': ('index',),
+                'unique_together': {('session', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0003_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='coauthor',
+            name='consent_file',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='coauthor_consents/', verbose_name='Согласие соавтора (скан)'),
+        ),
+        migrations.AlterField(
+            model_name='processdocuments',
+            name='article_file',
+            field=models.FileField(max_length=255, upload_to='articles/', verbose_name='Файл статьи/тезисов'),
+        ),
+        migrations.AlterField(
+            model_name='processdocuments',
+            name='bibliography_file',
+            field=models.FileField(max_length=255, upload_to='bibliography/', verbose_name='Список литературы'),
+        ),
+        migrations.AlterField(
+            model_name='processdocuments',
+            name='filled_template_file',
+            field=models.FileField(max_length=255, upload_to='filled_templates/', verbose_name='Заполненный шаблон'),
+        ),
+        migrations.AlterField(
+            model_name='publicationtemplate',
+            name='file',
+            field=models.FileField(max_length=255, upload_to='templates/'),
+        ),
+    ]
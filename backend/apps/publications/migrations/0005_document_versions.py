@@ -0,0 +1,53 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FIELDS = ("article_file", "bibliography_file", "filled_template_file")
+
+
+def initial_versions(apps, schema_editor):
+    # текущие файлы становятся первой версией
+    ProcessDocuments = apps.get_model("publications", "ProcessDocuments")
+    DocumentVersion = apps.get_model("publications", "DocumentVersion")
+    batch = []
+    for docs in ProcessDocuments.objects.only(*FIELDS).iterator(chunk_size=1000):
+        for field in FIELDS:
+            name = getattr(docs, field).name
+            if name:
+                batch.append(DocumentVersion(documents=docs, field=field, number=1, file=name))
+        if len(batch) >= 1000:
+            DocumentVersion.objects.bulk_create(batch)
+            batch = []
+    DocumentVersion.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0004_stored_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('article_file', 'Файл статьи/тезисов'), ('bibliography_file', 'Список литературы'), ('filled_template_file', 'Заполненный шаблон')], max_length=32)),
+                ('number', models.PositiveIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('text', models.TextField(blank=True, null=True, verbose_name='Извлечённый текст')),
+                ('diff', models.TextField(blank=True, null=True, verbose_name='Изменения относительно предыдущей версии')),
+                ('documents', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='publications.processdocuments')),
+            ],
+            options={
+                'ordering': ('field', 'number'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentversion',
+            constraint=models.UniqueConstraint(fields=('documents', 'field', 'number'), name='uniq_document_version'),
+        ),
+        migrations.RunPython(initial_versions, migrations.RunPython.noop),
+    ]
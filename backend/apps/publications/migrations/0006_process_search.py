@@ -0,0 +1,156 @@
+from django.db import migrations
+
+# Полнотекстовый поиск (apps.publications.search) — только PostgreSQL: на SQLite
+# колонки и триггеров нет, поиск там работает через icontains.
+#
+# publications_process.search_vector собирается из названия, журнала, ФИО автора,
+# соавторов и комментариев решений и поддерживается триггерами: на самой заявке
+# (INSERT / смена title, journal, author_id) и на связанных таблицах (пересчёт
+# одной заявки при изменении имени соавтора, комментария или ФИО автора).
+# Триграммные индексы для нечёткого поиска по ФИО создаются, только если в сборке
+# PostgreSQL есть pg_trgm (в образе postgres:16 он есть).
+FORWARD_SQL = """
+ALTER TABLE publications_process ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION publications_process_search_vector(p_id bigint, p_title text, p_journal text, p_author_id bigint)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT
+        setweight(to_tsvector('russian', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce((SELECT u.fio FROM accounts_user u WHERE u.id = p_author_id), '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(p_journal, '')), 'B')
+        || setweight(to_tsvector('russian', coalesce(
+            (SELECT string_agg(c.name, ' ') FROM publications_coauthor c WHERE c.process_id = p_id), '')), 'B')
+        || setweight(to_tsvector('russian', concat_ws(' ',
+            (SELECT d.comment FROM publications_librarydecision d WHERE d.process_id = p_id),
+            (SELECT d.comment FROM publications_oekdecision d WHERE d.process_id = p_id),
+            (SELECT string_agg(a.comment, ' ') FROM publications_reviewerassignment a WHERE a.process_id = p_id)
+        )), 'D')
+$$;
+
+CREATE FUNCTION publications_process_search_update() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := publications_process_search_vector(NEW.id, NEW.title, NEW.journal, NEW.author_id);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER process_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, journal, author_id ON publications_process
+    FOR EACH ROW EXECUTE FUNCTION publications_process_search_update();
+
+CREATE FUNCTION publications_process_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    ids bigint[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        ids := ARRAY[OLD.process_id];
+    ELSIF TG_OP = 'UPDATE' AND OLD.process_id IS DISTINCT FROM NEW.process_id THEN
+        ids := ARRAY[OLD.process_id, NEW.process_id];
+    ELSE
+        ids := ARRAY[NEW.process_id];
+    END IF;
+    UPDATE publications_process p
+       SET search_vector = publications_process_search_vector(p.id, p.title, p.journal, p.author_id)
+     WHERE p.id = ANY(ids);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER coauthor_search_insert_delete
+    AFTER INSERT OR DELETE ON publications_coauthor
+    FOR EACH ROW EXECUTE FUNCTION publications_process_search_refresh();
+CREATE TRIGGER coauthor_search_update
+    AFTER UPDATE OF name, process_id ON publications_coauthor
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.process_id IS DISTINCT FROM NEW.process_id)
+    EXECUTE FUNCTION publications_process_search_refresh();
+
+CREATE FUNCTION publications_user_search_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE publications_process p
+       SET search_vector = publications_process_search_vector(p.id, p.title, p.journal, p.author_id)
+     WHERE p.author_id = NEW.id;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER user_search_fio_update
+    AFTER UPDATE OF fio ON accounts_user
+    FOR EACH ROW WHEN (OLD.fio IS DISTINCT FROM NEW.fio)
+    EXECUTE FUNCTION publications_user_search_refresh();
+"""
+
+# комментарии решений: пустые (новое PENDING-решение) пересчёта не требуют
+COMMENT_TABLES = ("publications_librarydecision", "publications_oekdecision", "publications_reviewerassignment")
+COMMENT_TRIGGERS_SQL = """
+CREATE TRIGGER {table}_search_insert
+    AFTER INSERT ON {table}
+    FOR EACH ROW WHEN (NEW.comment <> '') EXECUTE FUNCTION publications_process_search_refresh();
+CREATE TRIGGER {table}_search_update
+    AFTER UPDATE OF comment, process_id ON {table}
+    FOR EACH ROW WHEN (OLD.comment IS DISTINCT FROM NEW.comment OR OLD.process_id IS DISTINCT FROM NEW.process_id)
+    EXECUTE FUNCTION publications_process_search_refresh();
+CREATE TRIGGER {table}_search_delete
+    AFTER DELETE ON {table}
+    FOR EACH ROW WHEN (OLD.comment <> '') EXECUTE FUNCTION publications_process_search_refresh();
+"""
+
+INDEX_SQL = """
+UPDATE publications_process p
+   SET search_vector = publications_process_search_vector(p.id, p.title, p.journal, p.author_id);
+
+CREATE INDEX process_search_vector_gin ON publications_process USING gin (search_vector);
+"""
+
+TRIGRAM_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX user_fio_trgm ON accounts_user USING gin (fio gin_trgm_ops);
+CREATE INDEX coauthor_name_trgm ON publications_coauthor USING gin (name gin_trgm_ops);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS coauthor_name_trgm;
+DROP INDEX IF EXISTS user_fio_trgm;
+DROP INDEX IF EXISTS process_search_vector_gin;
+{comment_triggers}
+DROP TRIGGER IF EXISTS user_search_fio_update ON accounts_user;
+DROP TRIGGER IF EXISTS coauthor_search_update ON publications_coauthor;
+DROP TRIGGER IF EXISTS coauthor_search_insert_delete ON publications_coauthor;
+DROP TRIGGER IF EXISTS process_search_vector_update ON publications_process;
+DROP FUNCTION IF EXISTS publications_user_search_refresh();
+DROP FUNCTION IF EXISTS publications_process_search_refresh();
+DROP FUNCTION IF EXISTS publications_process_search_update();
+DROP FUNCTION IF EXISTS publications_process_search_vector(bigint, text, text, bigint);
+ALTER TABLE publications_process DROP COLUMN IF EXISTS search_vector;
+""".format(comment_triggers="".join(
+    f"DROP TRIGGER IF EXISTS {t}_search_{op} ON {t};\n" for t in COMMENT_TABLES for op in ("insert", "update", "delete")
+))
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(FORWARD_SQL)
+    for table in COMMENT_TABLES:
+        schema_editor.execute(COMMENT_TRIGGERS_SQL.format(table=table))
+    schema_editor.execute(INDEX_SQL)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone():
+            schema_editor.execute(TRIGRAM_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_user_unread_notifications_count"),
+        ("publications", "0005_document_versions"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
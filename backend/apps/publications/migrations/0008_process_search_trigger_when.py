@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# Process.save() без update_fields пишет все колонки, и BEFORE UPDATE OF title,
+# journal, author_id срабатывал на каждую смену статуса, пересобирая вектор
+# несколькими подзапросами. Теперь вставка — отдельный триггер, а обновление
+# пересчитывает вектор, только если поля поиска действительно изменились.
+FORWARD_SQL = """
+DROP TRIGGER IF EXISTS process_search_vector_update ON publications_process;
+
+CREATE TRIGGER process_search_vector_insert
+    BEFORE INSERT ON publications_process
+    FOR EACH ROW EXECUTE FUNCTION publications_process_search_update();
+CREATE TRIGGER process_search_vector_update
+    BEFORE UPDATE OF title, journal, author_id ON publications_process
+    FOR EACH ROW WHEN (
+        OLD.title IS DISTINCT FROM NEW.title
+        OR OLD.journal IS DISTINCT FROM NEW.journal
+        OR OLD.author_id IS DISTINCT FROM NEW.author_id
+    )
+    EXECUTE FUNCTION publications_process_search_update();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS process_search_vector_update ON publications_process;
+DROP TRIGGER IF EXISTS process_search_vector_insert ON publications_process;
+
+CREATE TRIGGER process_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, journal, author_id ON publications_process
+    FOR EACH ROW EXECUTE FUNCTION publications_process_search_update();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("publications", "0007_process_updated_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
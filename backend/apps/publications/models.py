@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
@@ -19,7 +21,7 @@ class Council(models.Model):
 class PublicationTemplate(models.Model):
     department = models.CharField("Кафедра", max_length=255)
     name = models.CharField("Название шаблона", max_length=255)
-    file = models.FileField(upload_to="templates/")
+    file = models.FileField(upload_to="templates/", max_length=255)
 
     class Meta:
         ordering = ("department", "name")
@@ -55,6 +57,33 @@ class Process(models.Model):
     defense_datetime = models.DateTimeField("Время защиты", null=True, blank=True)
     defense_room = models.CharField("Аудитория/место защиты", max_length=128, blank=True)
 
+    class Meta:
+        indexes = [
+            # keyset-пагинация process_list: все заявки / заявки автора / фильтр по статусу
+            models.Index(fields=["created_at", "id"], name="process_created_id_idx"),
+            models.Index(fields=["author", "created_at", "id"], name="process_author_created_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="process_status_created_idx"),
+            # валидатор условного GET списка: MAX(updated_at) — все заявки / заявки автора
+            models.Index(fields=["updated_at"], name="process_updated_idx"),
+            models.Index(fields=["author", "updated_at"], name="process_author_updated_idx"),
+            # очереди ролей: маленькие частичные индексы (PostgreSQL/SQLite)
+            models.Index(
+                fields=["created_at"],
+                name="process_library_queue_idx",
+                condition=models.Q(status="LIBRARY_REVIEW"),
+            ),
+            models.Index(
+                fields=["created_at"],
+                name="process_oek_queue_idx",
+                condition=models.Q(status="OEK_REVIEW"),
+            ),
+            models.Index(
+                fields=["-updated_at"],
+                name="process_defense_queue_idx",
+                condition=models.Q(status="READY_FOR_DEFENSE"),
+            ),
+        ]
+
     def __str__(self):
         return f"#{self.pk} {self.title} ({self.get_status_display()})"
 
@@ -63,18 +92,24 @@ class CoAuthor(models.Model):
     process = models.ForeignKey(Process, on_delete=models.CASCADE, related_name="coauthors")
     name = models.CharField("ФИО соавтора", max_length=255)
     email = models.EmailField("Email соавтора", blank=True)
-    consent_file = models.FileField("Согласие соавтора (скан)", upload_to="coauthor_consents/", blank=True, null=True)
+    consent_file = models.FileField("Согласие соавтора (скан)", upload_to="coauthor_consents/", max_length=255, blank=True, null=True)
 
     def __str__(self):
         return f"{self.name} (process={self.process_id})"
 
 
+class DocumentField(models.TextChoices):
+    ARTICLE = "article_file", "Файл статьи/тезисов"
+    BIBLIOGRAPHY = "bibliography_file", "Список литературы"
+    FILLED_TEMPLATE = "filled_template_file", "Заполненный шаблон"
+
+
 class ProcessDocuments(models.Model):
     process = models.OneToOneField(Process, on_delete=models.CASCADE, related_name="documents")
 
-    article_file = models.FileField("Файл статьи/тезисов", upload_to="articles/")
-    bibliography_file = models.FileField("Список литературы", upload_to="bibliography/")
-    filled_template_file = models.FileField("Заполненный шаблон", upload_to="filled_templates/")
+    article_file = models.FileField("Файл статьи/тезисов", upload_to="articles/", max_length=255)
+    bibliography_file = models.FileField("Список литературы", upload_to="bibliography/", max_length=255)
+    filled_template_file = models.FileField("Заполненный шаблон", upload_to="filled_templates/", max_length=255)
 
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -113,6 +148,11 @@ class ReviewerAssignment(models.Model):
 
     class Meta:
         unique_together = ("process", "reviewer")
+        indexes = [
+            # задачи рецензента: поиск по reviewer, а process_id берётся прямо из индекса для JOIN
+            models.Index(fields=["reviewer", "process"], name="assignment_reviewer_proc_idx"),
+            models.Index(fields=["reviewer", "verdict"], name="assignment_reviewer_verd_idx"),
+        ]
 
     def __str__(self):
         return f"Assignment(process={self.process_id}, reviewer={self.reviewer_id}, {self.verdict})"
@@ -131,4 +171,96 @@ class OEKDecision(models.Model):
     decided_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"OEKDecision(process={self.process_id}, {self.decision})"
\ No newline at end of file
+        return f"OEKDecision(process={self.process_id}, {self.decision})"
+
+
+class DocumentVersion(models.Model):
+    """
+    Неизменяемая история файлов ProcessDocuments (см. versions.py): новая запись
+    на каждую смену файла в поле, старые не правятся и не удаляются. Файл не
+    копируется — версия ссылается на то же имя в хранилище. Текст и diff
+    с предыдущей версией считаются при первом просмотре и кэшируются здесь.
+    """
+    documents = models.ForeignKey(ProcessDocuments, on_delete=models.CASCADE, related_name="versions")
+    field = models.CharField(max_length=32, choices=DocumentField.choices)
+    number = models.PositiveIntegerField()
+    file = models.FileField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    text = models.TextField("Извлечённый текст", null=True, blank=True)
+    diff = models.TextField("Изменения относительно предыдущей версии", null=True, blank=True)
+
+    # единственное, что можно дописать в существующую версию
+    CACHE_FIELDS = frozenset({"text", "diff"})
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("documents", "field", "number"), name="uniq_document_version"),
+        ]
+        ordering = ("field", "number")
+
+    def __str__(self):
+        return f"DocumentVersion({self.documents_id}, {self.field} v{self.number})"
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if self.pk and not (update_fields and set(update_fields) <= self.CACHE_FIELDS):
+            raise ValueError("Версии документов неизменяемы.")
+        super().save(*args, **kwargs)
+
+
+class UploadSession(models.Model):
+    """
+    Докачиваемая загрузка большого файла по частям (см. uploads.py).
+    После complete собранный файл лежит в file и ждёт привязки к ProcessDocuments.
+    """
+    class Status(models.TextChoices):
+        ACTIVE = "ACTIVE", "Загружается"
+        COMPLETE = "COMPLETE", "Собрана"
+        ATTACHED = "ATTACHED", "Привязана к заявке"
+
+    Field = DocumentField
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    field = models.CharField(max_length=32, choices=Field.choices)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField("SHA-256 всего файла (необязательно)", max_length=64, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.ACTIVE)
+    file = models.FileField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"UploadSession({self.pk}, {self.field}, {self.status})"
+
+
+class UploadPart(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name="parts")
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    name = models.CharField("Имя части в хранилище", max_length=255)
+
+    class Meta:
+        unique_together = ("session", "index")
+        ordering = ("index",)
+
+    def __str__(self):
+        return f"UploadPart({self.session_id}, #{self.index})"
+
+
+class StoredBlob(models.Model):
+    """
+    Содержимое файла в контентно-адресуемом хранилище (storage.py).
+    refcount — сколько сохранённых имён ссылается на blob; при 0 его удаляет gc_blobs.
+    """
+    sha256 = models.CharField(primary_key=True, max_length=64)
+    size = models.PositiveBigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"StoredBlob({self.sha256[:12]}, refs={self.refcount})"
@@ -0,0 +1,96 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Возвращает (created_at, pk) или None, если курсор битый.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_raw, pk_raw = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_raw), int(pk_raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(qs, cursor: str = "", page_size: int = 50) -> KeysetPage:
+    """
+    Keyset-пагинация по (created_at, id) от новых к старым.
+    Стоимость страницы не зависит от её номера: один запрос с LIMIT page_size + 1
+    по индексируемому условию, без OFFSET и без COUNT(*).
+    """
+    qs = qs.order_by("-created_at", "-id")
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(qs[: page_size + 1])
+    items = rows[:page_size]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.pk)
+    return KeysetPage(items=items, next_cursor=next_cursor)
+
+
+def encode_rank_cursor(rank: float, pk: int) -> str:
+    # repr(float) восстанавливается в то же число — сравнение на границе страницы точное
+    raw = f"{rank!r}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank_raw, pk_raw = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return float(rank_raw), int(pk_raw)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def ranked_page(qs, cursor: str = "", page_size: int = 50) -> KeysetPage:
+    """
+    Keyset-пагинация результатов поиска по (rank, id) от лучших к худшим;
+    qs должен быть аннотирован полем rank (см. search.search_processes).
+    """
+    qs = qs.order_by("-rank", "-id")
+
+    position = decode_rank_cursor(cursor)
+    if position is not None:
+        rank, pk = position
+        qs = qs.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+    rows = list(qs[: page_size + 1])
+    items = rows[:page_size]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_rank_cursor(last.rank, last.pk)
+    return KeysetPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,87 @@
+"""
+Кэш HTML очередей сотрудников (library_tasks, oek_tasks, reviewer_tasks,
+дашборд комиссии).
+
+Все сотрудники роли видят одну и ту же очередь, поэтому её список рендерится
+один раз и хранится в общем кэше под ключом с версией: версия статуса для
+очередей по статусу, версия рецензента для его назначений. workflow.apply_locked
+увеличивает версии статусов, которые заявки покинули или в которые вошли, и
+версии их рецензентов — после коммита, чтобы параллельный запрос не закэшировал
+под новой версией ещё старые данные. Старые фрагменты никто больше не читает,
+их вытесняет TTL. Попадание в кэш — два чтения из кэша и ни одного запроса к БД.
+
+В фрагмент не попадают csrf-токен и формы: они рендерятся в шаблоне страницы.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = "publications:queue"
+# общая версия всех очередей: invalidate_all() после массовых изменений в обход workflow
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+
+def _status_key(status: str) -> str:
+    return f"{KEY_PREFIX}:status:{status}"
+
+
+def _reviewer_key(reviewer_id) -> str:
+    return f"{KEY_PREFIX}:reviewer:{reviewer_id}"
+
+
+def _versions(keys) -> str:
+    found = cache.get_many(keys)
+    # пропавшая версия начинается с текущего времени, а не с 1: иначе после
+    # вытеснения ключа снова прочитался бы фрагмент, сохранённый под старой "1"
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return ".".join(str(found[key]) for key in keys)
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_statuses(statuses):
+    keys = [_status_key(s) for s in sorted(set(statuses))]
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_reviewers(reviewer_ids):
+    keys = [_reviewer_key(pk) for pk in sorted(set(reviewer_ids))]
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_all():
+    transaction.on_commit(lambda: _bump([GENERATION_KEY]))
+
+
+def _cached(name: str, version_keys, render) -> str:
+    version = _versions([GENERATION_KEY, *version_keys])
+    key = f"{KEY_PREFIX}:{name}:{version}"
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, settings.QUEUE_CACHE_TTL)
+    return html
+
+
+def status_queue(name: str, status: str, render) -> str:
+    """
+    HTML очереди заявок одного статуса; render() вызывается только при промахе.
+    """
+    return _cached(f"{name}:{status}", [_status_key(status)], render)
+
+
+def reviewer_queue(reviewer_id, render) -> str:
+    return _cached(f"reviewer:{reviewer_id}", [_reviewer_key(reviewer_id)], render)
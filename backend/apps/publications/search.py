@@ -0,0 +1,107 @@
+"""
+Поиск заявок по названию, журналу, ФИО автора, соавторам и комментариям решений.
+
+PostgreSQL: колонка publications_process.search_vector (русская конфигурация,
+веса A — название и автор, B — журнал и соавторы, D — комментарии) поддерживается
+триггерами и индексирована GIN (миграция 0006_process_search); запрос —
+websearch_to_tsquery, ранжирование — ts_rank. Если по словам ничего не нашлось,
+ищем нечётко по ФИО автора и соавторов (pg_trgm, word_similarity, GIN-индексы;
+rank — лучшее сходство среди автора и соавторов); без pg_trgm в сборке
+PostgreSQL этот шаг пропускается.
+
+Другие СУБД (SQLite для разработки) — icontains по тем же полям, без ранжирования.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+from .models import CoAuthor
+from .pagination import ranked_page
+
+User = get_user_model()
+
+SEARCH_CONFIG = "russian"
+
+
+def _search_vector():
+    # колонка есть только в БД (её пишет триггер), в модели её нет — чтобы не тянуть
+    # tsvector в каждый SELECT заявок
+    return RawSQL('"publications_process"."search_vector"', [], output_field=SearchVectorField())
+
+
+_trigram_available = None
+
+
+def trigram_available() -> bool:
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def search_processes(qs, text: str):
+    """
+    qs с аннотацией rank: полнотекстовые совпадения (на других СУБД — icontains).
+    """
+    text = text.strip()
+    if connection.vendor != "postgresql":
+        matched = qs.filter(
+            Q(title__icontains=text) | Q(journal__icontains=text) | Q(author__fio__icontains=text)
+            | Q(pk__in=CoAuthor.objects.filter(name__icontains=text).values("process_id"))
+        )
+        return matched.annotate(rank=Value(1.0, output_field=FloatField()))
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    # ts_rank возвращает real: приводим к double, чтобы курсор сравнивался точно
+    return qs.alias(search=_search_vector()).filter(search=query).annotate(
+        rank=Cast(SearchRank(_search_vector(), query), FloatField()),
+    )
+
+
+def fuzzy_search_processes(qs, text: str):
+    """
+    Нечёткий поиск по ФИО автора и соавторов, rank — лучшее из сходств;
+    None, если pg_trgm недоступен.
+    """
+    text = text.strip()
+    if connection.vendor != "postgresql" or not trigram_available():
+        return None
+    coauthor_similarity = (
+        CoAuthor.objects
+        .filter(process=OuterRef("pk"))
+        .order_by()
+        .values("process")
+        .annotate(best=Max(TrigramWordSimilarity(text, "name")))
+        .values("best")
+    )
+    fuzzy = qs.filter(
+        Q(author__in=User.objects.filter(fio__trigram_word_similar=text))
+        | Q(pk__in=CoAuthor.objects.filter(name__trigram_word_similar=text).values("process_id"))
+    )
+    return fuzzy.annotate(rank=Cast(
+        Greatest(
+            Coalesce(TrigramWordSimilarity(text, F("author__fio")), Value(0.0)),
+            Coalesce(Subquery(coauthor_similarity), Value(0.0)),
+        ),
+        FloatField(),
+    ))
+
+
+def search_page(qs, text: str, cursor: str = "", page_size: int = 50):
+    """
+    (страница, fuzzy): сначала страница полнотекстовых совпадений; только если
+    она пуста — нечёткий поиск по ФИО (fuzzy=True). Отдельного exists() нет —
+    при совпадениях tsquery выполняется один раз.
+    """
+    page = ranked_page(search_processes(qs, text), cursor=cursor, page_size=page_size)
+    if page.items:
+        return page, False
+    fuzzy = fuzzy_search_processes(qs, text)
+    if fuzzy is None:
+        return page, False
+    return ranked_page(fuzzy, cursor=cursor, page_size=page_size), True
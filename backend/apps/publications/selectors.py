@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Prefetch, Q
+from django.db.models.functions import Lower
+from django.shortcuts import get_object_or_404
+
+from .models import CoAuthor, Process, ReviewerAssignment
+
+User = get_user_model()
+
+REVIEWERS_PER_PROCESS = 3
+
+
+def process_aggregate_qs():
+    """
+    Заявка целиком для карточки процесса: совет, автор, файлы и решения
+    подтягиваются JOIN'ом, соавторы и рецензии (вместе с рецензентами) — двумя
+    prefetch-запросами. Итого 3 запроса независимо от числа соавторов/рецензентов.
+    """
+    return (
+        Process.objects
+        .select_related("council", "author", "documents", "library_decision", "oek_decision")
+        .prefetch_related(
+            "coauthors",
+            Prefetch(
+                "review_assignments",
+                queryset=ReviewerAssignment.objects.select_related("reviewer").order_by("id"),
+            ),
+        )
+    )
+
+
+def get_process_aggregate(pk: int, **filters) -> Process:
+    return get_object_or_404(process_aggregate_qs(), pk=pk, **filters)
+
+
+def least_loaded_reviewer_ids(process: Process, count: int = REVIEWERS_PER_PROCESS) -> list:
+    """
+    Рецензенты с наименьшим числом незавершённых рецензий — одним запросом,
+    сортировка и LIMIT на стороне БД. Исключаются автор, уже назначенные
+    и соавторы (совпадение email или ФИО). Коллеги с кафедры автора берутся,
+    только если рецензентов с других кафедр не хватает (вторым запросом).
+    При равной загрузке выбор случайный.
+    """
+    author = User.objects.filter(pk=process.author_id).exclude(department="")
+    coauthors = CoAuthor.objects.filter(process=process)
+    eligible = (
+        User.objects
+        .filter(role=User.Role.REVIEWER, is_active=True)
+        .exclude(pk=process.author_id)
+        .exclude(pk__in=ReviewerAssignment.objects.filter(process=process).values("reviewer_id"))
+        .annotate(email_ci=Lower("email"), fio_ci=Lower("fio"))
+        .exclude(email_ci__in=coauthors.exclude(email="").annotate(v=Lower("email")).values("v"))
+        .exclude(fio_ci__in=coauthors.annotate(v=Lower("name")).values("v"))
+        .annotate(open_tasks=Count("review_tasks", filter=Q(review_tasks__verdict=ReviewerAssignment.Verdict.PENDING)))
+        .order_by("open_tasks", "?")
+        .values_list("id", flat=True)
+    )
+    chosen = list(eligible.exclude(department__in=author.values("department"))[:count])
+    if len(chosen) < count:
+        # на маленькой кафедре без внешних рецензентов заявка иначе осталась бы без рецензий
+        chosen += eligible.filter(department__in=author.values("department"))[:count - len(chosen)]
+    return chosen
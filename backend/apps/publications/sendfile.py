@@ -0,0 +1,155 @@
+"""
+Отдача защищённых файлов после проверки прав.
+
+DOCUMENTS_SENDFILE_BACKEND:
+- "nginx"     — X-Accel-Redirect на internal-location DOCUMENTS_ACCEL_REDIRECT_PREFIX;
+- "xsendfile" — X-Sendfile с абсолютным путём (Apache mod_xsendfile, lighttpd);
+- ""          — отдаёт Django: FileResponse, который gunicorn передаёт через
+                wsgi.file_wrapper в os.sendfile (для Range — ровно нужный отрезок).
+
+ETag/Last-Modified считаются по stat() без чтения файла; If-None-Match -> 304,
+одиночный Range -> 206 (If-Range учитывается), мультидиапазоны отдаются целиком.
+Файлы пользователей отдаются вложением; inline — только INLINE_SAFE_TYPES
+и под Content-Security-Policy: sandbox.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """
+    Файл, ограниченный отрезком [start, start + length): read() не выходит за
+    границу, а fileno() с выставленной позицией позволяет серверу сделать sendfile.
+    """
+
+    def __init__(self, fh, start: int, length: int):
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) включительно; None — заголовка нет или он не разобран (отдаём целиком);
+    "unsatisfiable" — диапазон за пределами файла.
+    """
+    m = RANGE_RE.match(header.strip()) if header else None
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    first, last = m.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or (last and int(last) < start):
+            return "unsatisfiable"
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            return "unsatisfiable"
+        start, end = max(size - suffix, 0), size - 1
+    return start, end
+
+
+# inline можно показывать только типы, которые браузер не исполняет как страницу:
+# .html/.svg автора, открытый сотрудником inline, выполнил бы скрипт на нашем origin
+INLINE_SAFE_TYPES = {"application/pdf"}
+
+
+def content_disposition(filename: str, as_attachment: bool) -> str:
+    kind = "attachment" if as_attachment else "inline"
+    return f"{kind}; filename*=UTF-8''{quote(filename)}"
+
+
+def serve_file(request, fieldfile, filename: str = "", as_attachment: bool = False):
+    if not fieldfile:
+        raise Http404()
+    filename = filename or os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    as_attachment = as_attachment or content_type not in INLINE_SAFE_TYPES
+
+    try:
+        path = fieldfile.path
+    except NotImplementedError:
+        # удалённое хранилище: без stat() и sendfile, просто поток
+        return _protect(FileResponse(fieldfile.open("rb"), as_attachment=as_attachment, filename=filename), as_attachment)
+
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise Http404()
+
+    etag = quote_etag(f"{st.st_size:x}-{st.st_mtime_ns:x}")
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if not_modified is not None:
+        return not_modified
+
+    backend = getattr(settings, "DOCUMENTS_SENDFILE_BACKEND", "")
+    if backend in ("nginx", "xsendfile"):
+        # Range и докачку front-сервер обрабатывает сам
+        response = HttpResponse(content_type=content_type)
+        if backend == "nginx":
+            prefix = settings.DOCUMENTS_ACCEL_REDIRECT_PREFIX.rstrip("/")
+            # путь на диске, а не имя поля: у контентно-адресуемого хранилища они различаются
+            relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, "/")
+            response["X-Accel-Redirect"] = quote(f"{prefix}/{relative}")
+        else:
+            response["X-Sendfile"] = path
+    else:
+        size = st.st_size
+        byte_range = parse_range(request.headers.get("Range", ""), size)
+        if_range = request.headers.get("If-Range")
+        if byte_range and if_range and etag not in parse_etags(if_range):
+            byte_range = None  # файл изменился после начала докачки — отдаём заново целиком
+
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        fh = open(path, "rb")
+        if byte_range:
+            start, end = byte_range
+            response = FileResponse(FileRange(fh, start, end - start + 1), status=206, content_type=content_type)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+        else:
+            response = FileResponse(fh, content_type=content_type)
+            response["Content-Length"] = size
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(st.st_mtime)
+    response["Content-Disposition"] = content_disposition(filename, as_attachment)
+    # документы закрытые: общим кэшам хранить нельзя, браузеру — с ревалидацией
+    response["Cache-Control"] = "private, no-cache"
+    return _protect(response, as_attachment)
+
+
+def _protect(response, as_attachment: bool):
+    response["X-Content-Type-Options"] = "nosniff"
+    if not as_attachment:
+        response["Content-Security-Policy"] = "sandbox"
+    return response
@@ -1,239 +1,165 @@
-import random
+"""
+Сервисный слой процесса: тонкие обёртки над таблицей переходов (workflow.py).
+Каждая функция возвращает True, если переход применён, иначе False
+(заявку уже перевёл кто-то другой или условие перехода не выполнено);
+пакетные варианты (*_decisions, *_many) — список BatchResult по заявкам.
+"""
+from dataclasses import dataclass
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 
-from apps.notifications.utils import notify
-from .models import Process, LibraryDecision, ReviewerAssignment, OEKDecision
+from apps.notifications.utils import notify_bulk
+from . import queues, workflow
+from .models import Process, ReviewerAssignment
 
 User = get_user_model()
 
 
-def start_or_advance_after_creation(process: Process):
+@dataclass
+class BatchResult:
     """
-    После создания заявки:
-    - если есть соавторы -> ждём согласия
-    - иначе -> отправляем в библиотеку
+    Итог пакетного решения по одной заявке.
     """
-    if process.coauthors.exists():
-        process.status = Process.Status.WAITING_COAUTHOR_CONSENTS
-        process.save(update_fields=["status"])
-        notify(process.author, f"Заявка #{process.pk}: загрузите согласия соавторов.", link=f"/process/{process.pk}/", process=process)
-    else:
-        send_to_library(process)
-
-
-def all_coauthor_consents_uploaded(process: Process) -> bool:
-    if not process.coauthors.exists():
-        return True
-    return all(bool(c.consent_file) for c in process.coauthors.all())
-
-
-def try_advance_after_coauthor_consents(process: Process):
-    if process.status != Process.Status.WAITING_COAUTHOR_CONSENTS:
-        return
-    if all_coauthor_consents_uploaded(process):
-        send_to_library(process)
-
-
-def send_to_library(process: Process):
-    process.status = Process.Status.LIBRARY_REVIEW
-    process.save(update_fields=["status"])
+    process_id: int | None
+    applied: bool
+    status: str
+    note: str = ""
 
-    LibraryDecision.objects.get_or_create(process=process)
+    @property
+    def status_display(self):
+        return Process.Status(self.status).label if self.status else "Заявка не найдена"
 
-    librarian = User.objects.filter(role=User.Role.LIBRARY_HEAD).order_by("id").first()
-    if librarian:
-        notify(librarian, f"Новая задача: проверить литературу по заявке #{process.pk}", link=f"/tasks/library/")
-    notify(process.author, f"Заявка #{process.pk} отправлена в библиотеку на проверку.", link=f"/process/{process.pk}/", process=process)
 
+def _batch_results(processes, applied) -> list:
+    return [BatchResult(p.pk, ok, p.status) for p, ok in zip(processes, applied)]
 
-def library_apply_decision(process: Process, approved: bool, comment: str, librarian: User):
-    ld, _ = LibraryDecision.objects.get_or_create(process=process)
-    ld.librarian = librarian
-    ld.comment = comment
-    ld.decided_at = timezone.now()
-
-    if approved:
-        ld.decision = LibraryDecision.Decision.APPROVED
-        ld.save()
-
-        if process.is_mifi:
-            assign_reviewers(process)
-        else:
-            send_to_oek(process)
-
-        notify(process.author, f"Библиотека согласовала заявку #{process.pk}.", link=f"/process/{process.pk}/", process=process)
-    else:
-        ld.decision = LibraryDecision.Decision.REJECTED
-        ld.save()
-        process.status = Process.Status.LIBRARY_NEEDS_FIX
-        process.save(update_fields=["status"])
-        notify(process.author, f"Библиотека отклонила заявку #{process.pk}. Комментарий: {comment}", link=f"/process/{process.pk}/", process=process)
-
-
-def reset_reviewers(process: Process):
-    # set all to pending, clear decided_at/comment/verdict
-    for a in process.review_assignments.all():
-        a.verdict = ReviewerAssignment.Verdict.PENDING
-        a.comment = ""
-        a.decided_at = None
-        a.save()
-
-
-def assign_reviewers(process: Process):
-    process.status = Process.Status.INTERNAL_REVIEW
-    process.save(update_fields=["status"])
-
-    reviewers = list(User.objects.filter(role=User.Role.REVIEWER).order_by("id"))
-    if len(reviewers) < 3:
-        # fallback: assign whoever exists
-        chosen = reviewers
-    else:
-        chosen = random.sample(reviewers, 3)
-
-    # Create assignments (idempotent-ish)
-    for r in chosen:
-        ReviewerAssignment.objects.get_or_create(process=process, reviewer=r)
-
-    for r in chosen:
-        notify(r, f"Новая рецензия: заявка #{process.pk}", link=f"/tasks/reviewer/")
-
-    notify(process.author, f"Заявка #{process.pk} отправлена на внутреннее рецензирование.", link=f"/process/{process.pk}/", process=process)
 
+def start_or_advance_after_creation(process: Process) -> bool:
+    """
+    После создания заявки:
+    - если есть соавторы -> ждём согласия
+    - иначе -> отправляем в библиотеку
+    """
+    return workflow.fire(process, "submit")
 
-def reviewer_submit(assignment: ReviewerAssignment, verdict: str, comment: str):
-    assignment.verdict = verdict
-    assignment.comment = comment
-    assignment.decided_at = timezone.now()
-    assignment.save()
 
-    process = assignment.process
-    notify(process.author, f"Получена рецензия по заявке #{process.pk} от {assignment.reviewer.display_name()}.", link=f"/process/{process.pk}/", process=process)
+def try_advance_after_coauthor_consents(process: Process) -> bool:
+    return workflow.fire(process, "consents_uploaded")
 
-    # If all decided -> finalize stage
-    if process.review_assignments.filter(verdict=ReviewerAssignment.Verdict.PENDING).exists():
-        return
 
-    verdicts = list(process.review_assignments.values_list("verdict", flat=True))
-    not_rec = verdicts.count(ReviewerAssignment.Verdict.NOT_RECOMMEND)
-    after_fix = verdicts.count(ReviewerAssignment.Verdict.RECOMMEND_AFTER_FIX)
-    rec = verdicts.count(ReviewerAssignment.Verdict.RECOMMEND)
+def library_apply_decision(process: Process, approved: bool, comment: str, librarian: User) -> bool:
+    event = "library_approve" if approved else "library_reject"
+    return workflow.fire(process, event, comment=comment, librarian=librarian)
 
-    # rule: if 2 of 3 NOT -> rejected
-    if not_rec >= 2:
-        process.status = Process.Status.REJECTED
-        process.save(update_fields=["status"])
-        notify(process.author, f"Заявка #{process.pk} отклонена по результатам рецензирования (>=2 'Не рекомендовать').", link=f"/process/{process.pk}/", process=process)
-        return
 
-    # if any AFTER_FIX -> needs fix
-    if after_fix >= 1:
-        process.status = Process.Status.INTERNAL_REVIEW_NEEDS_FIX
-        process.save(update_fields=["status"])
-        notify(process.author, f"Заявка #{process.pk}: требуется исправление по рецензиям и повторная отправка.", link=f"/process/{process.pk}/", process=process)
-        return
+def library_apply_decisions(items, approved: bool, librarian: User) -> list:
+    """
+    Одно решение библиотеки для многих заявок; items — пары (заявка, комментарий).
+    Всё в одной транзакции, решения и уведомления пишутся пачкой.
+    """
+    items = list(items)
+    event = "library_approve" if approved else "library_reject"
+    applied = workflow.fire_batch([(p, {"comment": c}) for p, c in items], event, librarian=librarian)
+    return _batch_results([p for p, _ in items], applied)
 
-    # else if 2 recommend -> go next
-    if rec >= 2:
-        send_to_oek(process)
-        return
 
-    # fallback
-    process.status = Process.Status.INTERNAL_REVIEW_NEEDS_FIX
-    process.save(update_fields=["status"])
-    notify(process.author, f"Заявка #{process.pk}: требуется уточнение/исправление по рецензиям.", link=f"/process/{process.pk}/", process=process)
+def reviewer_submit(assignment: ReviewerAssignment, verdict: str, comment: str) -> bool:
+    """
+    Два рецензента, отправившие вердикт одновременно, проходят здесь по очереди
+    (блокировка строки заявки), поэтому итог этапа подводит ровно один из них.
+    """
+    return reviewer_submit_many([(assignment, comment)], verdict)[0].applied
 
 
-def author_resubmit_after_internal_fix(process: Process):
+def reviewer_submit_many(items, verdict: str) -> list:
+    """
+    Один вердикт по многим назначениям; items — пары (назначение, комментарий).
+    Заявки, где после этого не осталось PENDING, подводят итог этапа тем же пакетом.
+    """
+    items = list(items)
+    processes = {}
+    for assignment, _ in items:
+        # у назначений одной заявки — общий объект заявки
+        assignment.process = processes.setdefault(assignment.process_id, assignment.process)
+
+    notices = []
+    with transaction.atomic():
+        workflow.lock_processes(processes.values())
+        now = timezone.now()
+        accepted = []
+        for assignment, comment in items:
+            process = assignment.process
+            if process.status != Process.Status.INTERNAL_REVIEW:
+                continue
+            assignment.verdict = verdict
+            assignment.comment = comment
+            assignment.decided_at = now
+            accepted.append(assignment)
+            notices.append((
+                [process.author_id],
+                f"Получена рецензия по заявке #{process.pk} от {assignment.reviewer.display_name()}.",
+                f"/process/{process.pk}/",
+                process,
+            ))
+        ReviewerAssignment.objects.bulk_update(accepted, ["verdict", "comment", "decided_at"])
+        queues.bump_reviewers(a.reviewer_id for a in accepted)
+
+        # If all decided -> finalize stage
+        touched = {a.process_id for a in accepted}
+        # вердикт виден в карточке заявки: сдвигаем валидатор условного GET
+        Process.objects.filter(pk__in=touched).update(updated_at=now)
+        pending = set(
+            ReviewerAssignment.objects
+            .filter(process__in=touched, verdict=ReviewerAssignment.Verdict.PENDING)
+            .values_list("process_id", flat=True)
+        )
+        complete = [processes[pk] for pk in sorted(touched - pending)]
+        workflow.apply_locked([(p, {}) for p in complete], "review_complete", {}, notices)
+        notify_bulk(notices)
+
+    accepted_ids = {a.pk for a in accepted}
+    return [BatchResult(a.process_id, a.pk in accepted_ids, a.process.status) for a, _ in items]
+
+
+def author_resubmit_after_internal_fix(process: Process) -> bool:
     """
     Автор исправил материалы и отправляет снова тем же рецензентам.
     """
-    if process.status != Process.Status.INTERNAL_REVIEW_NEEDS_FIX:
-        return
-    reset_reviewers(process)
-    process.status = Process.Status.INTERNAL_REVIEW
-    process.save(update_fields=["status"])
-    for a in process.review_assignments.all():
-        notify(a.reviewer, f"Повторная рецензия: заявка #{process.pk}", link=f"/tasks/reviewer/")
-    notify(process.author, f"Заявка #{process.pk} отправлена на повторное рецензирование.", link=f"/process/{process.pk}/", process=process)
-
+    return workflow.fire(process, "resubmit_internal")
 
-def send_to_oek(process: Process):
-    process.status = Process.Status.OEK_REVIEW
-    process.save(update_fields=["status"])
-
-    OEKDecision.objects.get_or_create(process=process)
-
-    oek_user = User.objects.filter(role=User.Role.OEK).order_by("id").first()
-    if oek_user:
-        notify(oek_user, f"Новая задача ОЭК: проверить заявку #{process.pk}", link=f"/tasks/oek/")
-    notify(process.author, f"Заявка #{process.pk} отправлена в ОЭК.", link=f"/process/{process.pk}/", process=process)
 
+def oek_apply_decision(process: Process, approved: bool, comment: str, oek_user: User, defense_datetime=None, defense_room="") -> bool:
+    if approved:
+        return workflow.fire(
+            process, "oek_approve",
+            comment=comment, oek_user=oek_user, defense_datetime=defense_datetime, defense_room=defense_room,
+        )
+    return workflow.fire(process, "oek_reject", comment=comment, oek_user=oek_user)
 
-def oek_apply_decision(process: Process, approved: bool, comment: str, oek_user: User, defense_datetime=None, defense_room=""):
-    od, _ = OEKDecision.objects.get_or_create(process=process)
-    od.oek_user = oek_user
-    od.comment = comment
-    od.decided_at = timezone.now()
 
+def oek_apply_decisions(items, approved: bool, oek_user: User, defense_datetime=None, defense_room="") -> list:
+    """
+    Одно решение ОЭК для многих заявок; items — пары (заявка, комментарий).
+    """
+    items = list(items)
     if approved:
-        od.decision = OEKDecision.Decision.APPROVED
-        od.save()
-
-        process.status = Process.Status.READY_FOR_DEFENSE
-        if defense_datetime:
-            process.defense_datetime = defense_datetime
-        if defense_room is not None:
-            process.defense_room = defense_room
-        process.save(update_fields=["status", "defense_datetime", "defense_room"])
-
-        notify(process.author, f"ОЭК согласовал заявку #{process.pk}. Статус: готово к защите.", link=f"/process/{process.pk}/", process=process)
-
-        # notify commission members
-        commission_users = User.objects.filter(role=User.Role.COMMISSION)
-        for u in commission_users:
-            notify(u, f"Новая заявка готова к защите: #{process.pk}", link=f"/process/{process.pk}/")
+        applied = workflow.fire_batch(
+            [(p, {"comment": c}) for p, c in items], "oek_approve",
+            oek_user=oek_user, defense_datetime=defense_datetime, defense_room=defense_room,
+        )
     else:
-        od.decision = OEKDecision.Decision.REJECTED
-        od.save()
-        process.status = Process.Status.OEK_NEEDS_FIX
-        process.save(update_fields=["status"])
-        notify(process.author, f"ОЭК отклонил заявку #{process.pk}. Комментарий: {comment}", link=f"/process/{process.pk}/", process=process)
+        applied = workflow.fire_batch([(p, {"comment": c}) for p, c in items], "oek_reject", oek_user=oek_user)
+    return _batch_results([p for p, _ in items], applied)
 
 
-def author_resubmit_after_oek_fix(process: Process):
-    if process.status != Process.Status.OEK_NEEDS_FIX:
-        return
-    process.status = Process.Status.OEK_REVIEW
-    process.save(update_fields=["status"])
-    oek_user = User.objects.filter(role=User.Role.OEK).order_by("id").first()
-    if oek_user:
-        notify(oek_user, f"Повторная проверка ОЭК: заявка #{process.pk}", link=f"/tasks/oek/")
-    notify(process.author, f"Заявка #{process.pk} повторно отправлена в ОЭК.", link=f"/process/{process.pk}/", process=process)
+def author_resubmit_after_oek_fix(process: Process) -> bool:
+    return workflow.fire(process, "resubmit_oek")
 
-def author_resubmit_after_library_fix(process: Process):
+
+def author_resubmit_after_library_fix(process: Process) -> bool:
     """
     Автор загрузил исправленный список литературы и отправляет снова в библиотеку.
     """
-    if process.status != Process.Status.LIBRARY_NEEDS_FIX:
-        return
-
-    # сбрасываем решение библиотеки в ожидание
-    ld, _ = LibraryDecision.objects.get_or_create(process=process)
-    ld.decision = LibraryDecision.Decision.PENDING
-    ld.decided_at = None
-    ld.save(update_fields=["decision", "decided_at"])
-
-    process.status = Process.Status.LIBRARY_REVIEW
-    process.save(update_fields=["status"])
-
-    librarian = User.objects.filter(role=User.Role.LIBRARY_HEAD).order_by("id").first()
-    if librarian:
-        notify(librarian, f"Повторная проверка: литература по заявке #{process.pk}", link=f"/tasks/library/")
-
-    notify(
-        process.author,
-        f"Заявка #{process.pk} повторно отправлена в библиотеку на проверку.",
-        link=f"/process/{process.pk}/",
-        process=process,
-    )
\ No newline at end of file
+    return workflow.fire(process, "resubmit_library")
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CoAuthor, Process, ProcessDocuments
+from .versions import record_versions
+
+
+@receiver(post_save, sender=ProcessDocuments, dispatch_uid="publications_document_versions")
+def append_document_versions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_versions(instance)
+
+
+@receiver(post_save, sender=ProcessDocuments, dispatch_uid="publications_documents_touch")
+@receiver(post_save, sender=CoAuthor, dispatch_uid="publications_coauthor_touch")
+@receiver(post_delete, sender=CoAuthor, dispatch_uid="publications_coauthor_delete_touch")
+def touch_process(sender, instance, raw=False, **kwargs):
+    # Process.updated_at — валидатор карточки заявки для условного GET
+    if not raw:
+        Process.objects.filter(pk=instance.process_id).update(updated_at=timezone.now())
@@ -0,0 +1,243 @@
+"""
+Хранилище файлов с дедупликацией по содержимому (STORAGES["default"]).
+
+Содержимое лежит один раз в blobs/<sha[:2]>/<sha256>, а в FileField пишется
+логическое имя <каталог upload_to>/<sha256>/<имя файла>: по нему находится
+blob, а исходное имя остаётся для Content-Disposition. Одинаковые загрузки
+(повторная отправка того же файла на доработке, демо-шаблоны) занимают место
+один раз.
+
+Счётчик ссылок — StoredBlob.refcount: save() увеличивает, delete() уменьшает,
+сам файл удаляет только manage.py gc_blobs, который заодно сверяет счётчики
+с тем, что реально записано в FileField'ах. Имена без sha (файлы, сохранённые
+до включения хранилища) и временные части загрузок (uploads/) работают как
+в обычном FileSystemStorage.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import StoredBlob
+
+BLOB_NAME_RE = re.compile(r"(?:^|/)(?P<sha>[0-9a-f]{64})/[^/]+$")
+
+
+def blob_sha(name: str) -> str:
+    """
+    sha256 из логического имени; "" — имя не контентно-адресуемое.
+    """
+    m = BLOB_NAME_RE.search(name or "")
+    return m.group("sha") if m else ""
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    blob_dir = "blobs"
+    # короткоживущие файлы, которые нет смысла хэшировать и учитывать
+    passthrough_prefixes = ("uploads/",)
+
+    def __init__(self, *args, blob_dir=None, passthrough_prefixes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if blob_dir:
+            self.blob_dir = blob_dir
+        if passthrough_prefixes is not None:
+            self.passthrough_prefixes = tuple(passthrough_prefixes)
+
+    def blob_name(self, sha: str) -> str:
+        return f"{self.blob_dir}/{sha[:2]}/{sha}"
+
+    def _physical_name(self, name: str) -> str:
+        sha = blob_sha(name)
+        return self.blob_name(sha) if sha else name
+
+    def path(self, name):
+        return super().path(self._physical_name(name))
+
+    def url(self, name):
+        return super().url(self._physical_name(name))
+
+    def _passthrough(self, name: str) -> bool:
+        return name.replace("\\", "/").startswith(self.passthrough_prefixes)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        if self._passthrough(name):
+            return super().save(name, content, max_length=max_length)
+
+        validate_file_name(name, allow_relative_path=True)
+        tmp_path, sha, size = self._write_temp(content)
+        try:
+            name = self._logical_name(name, sha, max_length)
+            # сначала ссылка, потом файл: gc_blobs удаляет blob под блокировкой его строки
+            self._incref(sha, size)
+            self._place(tmp_path, sha)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return name
+
+    def _write_temp(self, content):
+        """
+        Пишет содержимое во временный файл рядом с blob'ами, попутно считая sha256.
+        """
+        tmp_dir = super().path(f"{self.blob_dir}/tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fh.write(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    def _place(self, tmp_path: str, sha: str):
+        blob_path = super().path(self.blob_name(sha))
+        if os.path.exists(blob_path):
+            return
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        # у параллельных загрузок содержимое одинаковое: replace безопасен
+        os.replace(tmp_path, blob_path)
+
+    def _logical_name(self, name: str, sha: str, max_length=None) -> str:
+        dir_name, file_name = os.path.split(name.replace("\\", "/"))
+        prefix = f"{dir_name}/{sha}/" if dir_name else f"{sha}/"
+        if max_length is not None and len(prefix) + len(file_name) > max_length:
+            root, ext = os.path.splitext(file_name)
+            keep = max_length - len(prefix) - len(ext)
+            if keep <= 0:
+                raise SuspiciousFileOperation(f'Storage can not find an available filename for "{name}".')
+            file_name = root[:keep] + ext
+        return prefix + file_name
+
+    def _incref(self, sha: str, size: int):
+        while True:
+            StoredBlob.objects.bulk_create([StoredBlob(sha256=sha, size=size)], ignore_conflicts=True)
+            # 0 строк — gc_blobs только что удалил blob, создаём заново
+            if StoredBlob.objects.filter(pk=sha).update(refcount=F("refcount") + 1, updated_at=timezone.now()):
+                return
+
+    def delete(self, name):
+        sha = blob_sha(name)
+        if not sha:
+            return super().delete(name)
+        # файл удаляет gc_blobs: его содержимое может понадобиться параллельному save()
+        StoredBlob.objects.filter(pk=sha, refcount__gt=0).update(
+            refcount=F("refcount") - 1, updated_at=timezone.now(),
+        )
+
+    def delete_blob(self, sha: str):
+        try:
+            os.unlink(super().path(self.blob_name(sha)))
+        except FileNotFoundError:
+            pass
+
+    def blob_files(self):
+        """
+        (sha, абсолютный путь) всех blob'ов на диске, без временных.
+        """
+        root = super().path(self.blob_dir)
+        if not os.path.isdir(root):
+            return
+        for shard in os.listdir(root):
+            shard_path = os.path.join(root, shard)
+            if shard == "tmp" or not os.path.isdir(shard_path):
+                continue
+            for sha in os.listdir(shard_path):
+                yield sha, os.path.join(shard_path, sha)
+
+    def temp_files(self):
+        root = super().path(f"{self.blob_dir}/tmp")
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                yield os.path.join(root, name)
+
+
+def referenced_counts(storage) -> Counter:
+    """
+    Сколько раз каждый blob упомянут в FileField'ах всех моделей на этом хранилище.
+    """
+    counts = Counter()
+    for model in apps.get_models():
+        fields = [
+            f.attname for f in model._meta.concrete_fields
+            if isinstance(f, models.FileField) and f.storage is storage
+        ]
+        for field in fields:
+            names = model._default_manager.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            for name in names.values_list(field, flat=True).iterator(chunk_size=2000):
+                sha = blob_sha(name)
+                if sha:
+                    counts[sha] += 1
+    return counts
+
+
+def collect_garbage(storage, grace: timedelta, dry_run: bool = False) -> dict:
+    """
+    Сверяет refcount с FileField'ами и удаляет blob'ы без ссылок. Трогает только
+    то, что не менялось дольше grace: свежие save() могли ещё не закоммитить строку
+    модели со ссылкой.
+    """
+    cutoff = timezone.now() - grace
+    counts = referenced_counts(storage)
+    stats = {"fixed": 0, "deleted": 0, "freed": 0, "orphans": 0}
+
+    stale = StoredBlob.objects.filter(updated_at__lt=cutoff)
+    for sha, refcount in stale.values_list("sha256", "refcount").iterator(chunk_size=2000):
+        if refcount != counts.get(sha, 0):
+            stats["fixed"] += 1
+            if not dry_run:
+                stale.filter(pk=sha).update(refcount=counts.get(sha, 0))
+
+    for sha in list(stale.filter(refcount__lte=0).values_list("sha256", flat=True)):
+        if dry_run:
+            stats["deleted"] += 1
+            continue
+        with transaction.atomic():
+            blob = stale.select_for_update().filter(pk=sha, refcount__lte=0).first()
+            if blob is None:
+                continue  # на blob сослались заново
+            blob.delete()
+            storage.delete_blob(sha)
+        stats["deleted"] += 1
+        stats["freed"] += blob.size
+
+    # файлы без строки StoredBlob (прерванные save()) и брошенные временные файлы
+    known = set(StoredBlob.objects.values_list("sha256", flat=True))
+    leftovers = [path for sha, path in storage.blob_files() if sha not in known]
+    leftovers += list(storage.temp_files())
+    for path in leftovers:
+        try:
+            if os.path.getmtime(path) >= cutoff.timestamp():
+                continue
+            stats["orphans"] += 1
+            if not dry_run:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+    return stats
@@ -0,0 +1,1120 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.notifications.models import Notification
+
+from .models import (
+    CoAuthor, Council, DocumentVersion, LibraryDecision, OEKDecision, Process, ProcessDocuments, PublicationTemplate, ReviewerAssignment,
+    StoredBlob, UploadSession,
+)
+from .pagination import ranked_page
+from .search import search_page, search_processes, trigram_available
+from .sendfile import serve_file
+from .selectors import get_process_aggregate, least_loaded_reviewer_ids
+from . import workflow
+from .services import library_apply_decision, reviewer_submit
+from .storage import ContentAddressedStorage, blob_sha, collect_garbage
+from .uploads import complete_upload
+from . import versions
+from .benchmark import percentile
+from .versions import extract_text
+
+
+def make_processes(author, council, count, **kwargs):
+    return Process.objects.bulk_create([
+        Process(author=author, council=council, title=f"Работа {i}", journal="Журнал", **kwargs)
+        for i in range(count)
+    ])
+
+
+class ProcessListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        cls.oek = User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+
+    def count_queries(self, user, params=None):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("publications:process_list"), params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_query_count_does_not_depend_on_table_size(self):
+        make_processes(self.author, self.council, 3)
+        small, _ = self.count_queries(self.oek)
+
+        make_processes(self.author, self.council, 120)
+        large, _ = self.count_queries(self.oek)
+
+        self.assertEqual(small, large)
+
+    def test_cursor_walks_all_rows_once(self):
+        make_processes(self.author, self.council, 120)
+
+        seen = []
+        params = {}
+        while True:
+            _, response = self.count_queries(self.oek, params)
+            seen.extend(p.pk for p in response.context["processes"])
+            if not response.context["next_query"]:
+                break
+            params = QueryDict(response.context["next_query"]).dict()
+
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len(set(seen)), 120)
+
+    def test_status_filter(self):
+        make_processes(self.author, self.council, 2, status=Process.Status.OEK_REVIEW)
+        make_processes(self.author, self.council, 3, status=Process.Status.LIBRARY_REVIEW)
+
+        _, response = self.count_queries(self.oek, {"status": Process.Status.OEK_REVIEW})
+
+        self.assertEqual(len(response.context["processes"]), 2)
+
+
+class ProcessAggregateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        cls.process = Process.objects.create(
+            author=cls.author, council=council, title="Работа", journal="Журнал",
+            is_mifi=True, status=Process.Status.INTERNAL_REVIEW_NEEDS_FIX,
+        )
+        ProcessDocuments.objects.create(
+            process=cls.process, article_file="articles/a.txt",
+            bibliography_file="bibliography/b.txt", filled_template_file="filled_templates/c.txt",
+        )
+        LibraryDecision.objects.create(process=cls.process, decision=LibraryDecision.Decision.APPROVED, comment="ок")
+        OEKDecision.objects.create(process=cls.process)
+        for i in range(3):
+            CoAuthor.objects.create(process=cls.process, name=f"Соавтор {i}")
+            reviewer = User.objects.create_user(username=f"rev{i}", password="x", role=User.Role.REVIEWER)
+            ReviewerAssignment.objects.create(process=cls.process, reviewer=reviewer, comment="замечание")
+
+    def test_aggregate_renders_within_query_budget(self):
+        # process (+council, author, documents, decisions), coauthors, assignments (+reviewers)
+        with self.assertNumQueries(3):
+            process = get_process_aggregate(self.process.pk)
+            html = render_to_string("publications/process_detail.html", {"process": process, "user": self.author})
+
+        self.assertIn("Соавтор 2", html)
+        self.assertIn("замечание", html)
+
+    def test_detail_view_query_count_does_not_grow_with_reviewers(self):
+        self.client.force_login(self.author)
+        url = reverse("publications:process_detail", args=[self.process.pk])
+        self.client.get(url)  # прогрев: сессия и пользователь дальше берутся из кэша
+
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        reviewer = User.objects.create_user(username="rev_extra", password="x", role=User.Role.REVIEWER)
+        ReviewerAssignment.objects.create(process=self.process, reviewer=reviewer, comment="ещё")
+        CoAuthor.objects.create(process=self.process, name="Соавтор extra")
+
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+
+        self.assertEqual(len(before), len(after))
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN-проверка индексов только для PostgreSQL")
+class WorkQueueIndexTest(TestCase):
+    """
+    Регрессия: очереди ролей не должны скатываться в Seq Scan на большом объёме.
+    """
+    PROCESSES = 30000
+
+    @classmethod
+    def setUpTestData(cls):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        authors = User.objects.bulk_create([
+            User(username=f"author{i}", role=User.Role.AUTHOR) for i in range(200)
+        ])
+        cls.reviewers = User.objects.bulk_create([
+            User(username=f"rev{i}", role=User.Role.REVIEWER) for i in range(1000)
+        ])
+
+        # очереди — малая доля от общего числа заявок, как в проде
+        queue_statuses = [Process.Status.LIBRARY_REVIEW, Process.Status.OEK_REVIEW, Process.Status.READY_FOR_DEFENSE]
+        processes = Process.objects.bulk_create([
+            Process(
+                author=authors[i % len(authors)], council=council, title=f"Работа {i}", journal="Журнал",
+                status=queue_statuses[i % 3] if i % 50 == 0 else Process.Status.REJECTED,
+            )
+            for i in range(cls.PROCESSES)
+        ], batch_size=2000)
+
+        ReviewerAssignment.objects.bulk_create([
+            ReviewerAssignment(process=p, reviewer=cls.reviewers[(p.pk + k) % len(cls.reviewers)])
+            for p in processes[::3]
+            for k in range(3)
+        ], batch_size=2000)
+        Notification.objects.bulk_create([
+            Notification(user=authors[i % len(authors)], message=f"Сообщение {i}")
+            for i in range(cls.PROCESSES)
+        ], batch_size=2000)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertNoSeqScan(self, qs):
+        plan = qs.explain()
+        self.assertNotIn("Seq Scan", plan, plan)
+
+    def test_role_queues(self):
+        self.assertNoSeqScan(Process.objects.filter(status=Process.Status.LIBRARY_REVIEW).order_by("created_at"))
+        self.assertNoSeqScan(Process.objects.filter(status=Process.Status.OEK_REVIEW).order_by("created_at"))
+        self.assertNoSeqScan(Process.objects.filter(status=Process.Status.READY_FOR_DEFENSE).order_by("-updated_at"))
+
+    def test_reviewer_assignments(self):
+        reviewer = self.reviewers[0]
+        self.assertNoSeqScan(ReviewerAssignment.objects.filter(reviewer=reviewer).order_by("-process__created_at"))
+
+    def test_notifications(self):
+        user = User.objects.filter(role=User.Role.AUTHOR).first()
+        self.assertNoSeqScan(Notification.objects.filter(user=user))
+
+    def test_list_last_modified(self):
+        author = User.objects.filter(role=User.Role.AUTHOR).first()
+        table = Process._meta.db_table
+        for sql, params in (
+            (f"SELECT MAX(updated_at) FROM {table}", []),
+            (f"SELECT MAX(updated_at) FROM {table} WHERE author_id = %s", [author.pk]),
+        ):
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {sql}", params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            self.assertNotIn("Seq Scan", plan, plan)
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class TransitionGuardTest(TestCase):
+    def test_decision_is_not_applied_twice(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        librarian = User.objects.create_user(username="lib", password="x", role=User.Role.LIBRARY_HEAD)
+        process = Process.objects.create(
+            author=author, council=council, title="Работа", journal="Журнал", status=Process.Status.LIBRARY_REVIEW,
+        )
+
+        self.assertTrue(library_apply_decision(process, approved=False, comment="нет", librarian=librarian))
+        stale = Process.objects.get(pk=process.pk)
+        stale.status = Process.Status.LIBRARY_REVIEW  # устаревшая копия из другого запроса
+        self.assertFalse(library_apply_decision(stale, approved=True, comment="", librarian=librarian))
+
+        process.refresh_from_db()
+        self.assertEqual(process.status, Process.Status.LIBRARY_NEEDS_FIX)
+        self.assertEqual(Notification.objects.filter(user=author).count(), 1)
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class WorkflowTest(TestCase):
+    def test_table_rejects_unreachable_and_unknown_transitions(self):
+        S = Process.Status
+        with self.assertRaises(ImproperlyConfigured):
+            workflow.compile_transitions([
+                workflow.Transition("e", S.DRAFT, S.LIBRARY_REVIEW),
+                workflow.Transition("e", S.DRAFT, S.REJECTED, guard=workflow.is_mifi),
+            ])
+        with self.assertRaises(ImproperlyConfigured):
+            workflow.compile_transitions([workflow.Transition("e", S.DRAFT, "nope")])
+
+    def test_fire_many_applies_in_one_batch(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        oek = User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+        for i in range(3):
+            User.objects.create_user(username=f"com{i}", password="x", role=User.Role.COMMISSION)
+        processes = make_processes(author, council, 5, status=Process.Status.OEK_REVIEW)
+        processes.append(Process.objects.create(author=author, council=council, title="Черновик", journal="Журнал"))
+
+        applied = workflow.fire_many(processes, "oek_approve", comment="", oek_user=oek, defense_room="А-101")
+
+        self.assertEqual(len(applied), 5)
+        self.assertEqual(Process.objects.filter(status=Process.Status.READY_FOR_DEFENSE, defense_room="А-101").count(), 5)
+        self.assertEqual(OEKDecision.objects.filter(decision=OEKDecision.Decision.APPROVED).count(), 5)
+        # автору — по одному уведомлению на заявку, каждому члену комиссии — по одному на заявку
+        self.assertEqual(Notification.objects.filter(user=author).count(), 5)
+        self.assertEqual(Notification.objects.filter(user__role=User.Role.COMMISSION).count(), 15)
+        self.assertEqual(Process.objects.get(pk=processes[-1].pk).status, Process.Status.DRAFT)
+
+
+class ReviewerAssignmentTest(TestCase):
+    def test_picks_least_loaded_without_conflicts(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR, department="Кафедра №1")
+        busy = make_processes(author, council, 2, status=Process.Status.INTERNAL_REVIEW)
+
+        def reviewer(name, pending=0, **kwargs):
+            user = User.objects.create_user(username=name, password="x", role=User.Role.REVIEWER, **kwargs)
+            for p in busy[:pending]:
+                ReviewerAssignment.objects.create(process=p, reviewer=user)
+            return user
+
+        free = [reviewer(f"free{i}", department="Кафедра №2") for i in range(2)]
+        loaded = reviewer("loaded", pending=1, department="Кафедра №2")
+        reviewer("swamped", pending=2, department="Кафедра №2")
+        reviewer("colleague", department="Кафедра №1")
+        reviewer("coauthor", email="Co@Example.com", department="Кафедра №3")
+        reviewer("coauthor_fio", fio="Петров П. П.", department="Кафедра №3")
+        reviewer("inactive", is_active=False)
+
+        process = Process.objects.create(author=author, council=council, title="Работа", journal="Журнал", is_mifi=True)
+        CoAuthor.objects.create(process=process, name="Петров П. П.", email="co@example.com")
+
+        with self.assertNumQueries(1):
+            chosen = least_loaded_reviewer_ids(process)
+
+        self.assertEqual(set(chosen), {free[0].pk, free[1].pk, loaded.pk})
+
+    def test_single_department_falls_back_to_colleagues(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR, department="Кафедра №1")
+        librarian = User.objects.create_user(username="lib", password="x", role=User.Role.LIBRARY_HEAD, department="Кафедра №1")
+        outsider = User.objects.create_user(username="outsider", password="x", role=User.Role.REVIEWER, department="Кафедра №2")
+        colleagues = [
+            User.objects.create_user(username=f"rev{i}", password="x", role=User.Role.REVIEWER, department="Кафедра №1")
+            for i in range(3)
+        ]
+        process = Process.objects.create(
+            author=author, council=council, title="Работа", journal="Журнал", is_mifi=True,
+            status=Process.Status.LIBRARY_REVIEW,
+        )
+
+        self.assertTrue(workflow.fire(process, "library_approve", librarian=librarian, comment=""))
+
+        assigned = set(ReviewerAssignment.objects.filter(process=process).values_list("reviewer_id", flat=True))
+        self.assertEqual(len(assigned), 3)
+        # сторонний рецензент в приоритете, недостающие — с кафедры автора
+        self.assertIn(outsider.pk, assigned)
+        self.assertLess(assigned - {outsider.pk}, {c.pk for c in colleagues})
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class BatchDecisionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        cls.librarian = User.objects.create_user(username="lib", password="x", role=User.Role.LIBRARY_HEAD)
+        cls.oek = User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+
+    def post_library_batch(self, processes, **data):
+        self.client.force_login(self.librarian)
+        return self.client.post(reverse("publications:library_decide_batch"), {
+            "selected": [p.pk for p in processes], **data,
+        })
+
+    def test_library_batch_applies_individual_comments(self):
+        processes = make_processes(self.author, self.council, 4, status=Process.Status.LIBRARY_REVIEW)
+        moved = make_processes(self.author, self.council, 1, status=Process.Status.OEK_REVIEW)
+
+        response = self.post_library_batch(
+            processes + moved, decision="REJECTED", comment="Оформите по ГОСТ",
+            **{f"comment_{processes[0].pk}": "Нет DOI"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        report = {r.process_id: r.applied for r in response.context["results"]}
+        self.assertEqual(report, {**{p.pk: True for p in processes}, moved[0].pk: False})
+        self.assertEqual(Process.objects.filter(status=Process.Status.LIBRARY_NEEDS_FIX).count(), 4)
+        comments = dict(LibraryDecision.objects.values_list("process_id", "comment"))
+        self.assertEqual(comments[processes[0].pk], "Нет DOI")
+        self.assertEqual(comments[processes[1].pk], "Оформите по ГОСТ")
+        self.assertEqual(Notification.objects.filter(user=self.author).count(), 4)
+
+    def test_library_batch_query_count_does_not_grow(self):
+        def run(count):
+            processes = make_processes(self.author, self.council, count, status=Process.Status.LIBRARY_REVIEW)
+            with CaptureQueriesContext(connection) as ctx:
+                self.post_library_batch(processes, decision="APPROVED")
+            return len(ctx)
+
+        run(1)  # прогрев: сессия, справочник ролей
+        self.assertEqual(run(2), run(20))
+
+    def test_reviewer_batch_finalizes_completed_stages(self):
+        reviewer = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+        other = User.objects.create_user(username="rev2", password="x", role=User.Role.REVIEWER)
+        processes = make_processes(self.author, self.council, 2, status=Process.Status.INTERNAL_REVIEW, is_mifi=True)
+        assignments = []
+        for p in processes:
+            ReviewerAssignment.objects.create(process=p, reviewer=other, verdict=ReviewerAssignment.Verdict.RECOMMEND)
+            assignments.append(ReviewerAssignment.objects.create(process=p, reviewer=reviewer))
+
+        self.client.force_login(reviewer)
+        response = self.client.post(reverse("publications:reviewer_submit_batch"), {
+            "selected": [a.pk for a in assignments], "decision": "RECOMMEND", "comment": "ok",
+        })
+
+        self.assertTrue(all(r.applied for r in response.context["results"]))
+        self.assertEqual(Process.objects.filter(status=Process.Status.OEK_REVIEW).count(), 2)
+        self.assertEqual(Notification.objects.filter(user=self.oek).count(), 2)
+
+        # повторная отправка и чужое назначение — в отчёте, а не молча выброшены
+        foreign = ReviewerAssignment.objects.filter(reviewer=other).first()
+        response = self.client.post(reverse("publications:reviewer_submit_batch"), {
+            "selected": [assignments[0].pk, foreign.pk], "decision": "RECOMMEND", "comment": "ok",
+        })
+        results = response.context["results"]
+        self.assertEqual([(r.process_id, r.applied) for r in results], [(processes[0].pk, False), (None, False)])
+        self.assertContains(response, "Рецензия уже отправлена")
+        self.assertContains(response, f"Назначение #{foreign.pk} не найдено")
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class QueueCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR, fio="Иванов И. И.")
+        cls.librarian = User.objects.create_user(username="lib", password="x", role=User.Role.LIBRARY_HEAD)
+        cls.reviewer = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, user, name):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(f"publications:{name}"))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), [q["sql"] for q in ctx.captured_queries]
+
+    def test_library_queue_is_cached_until_status_changes(self):
+        processes = make_processes(self.author, self.council, 3, status=Process.Status.LIBRARY_REVIEW)
+        html, _ = self.get(self.librarian, "library_tasks")
+        self.assertIn("Иванов И. И.", html)
+        self.assertIn(f"Заявка #{processes[0].pk}", html)
+
+        html, queries = self.get(self.librarian, "library_tasks")
+        self.assertIn(f"Заявка #{processes[0].pk}", html)
+        self.assertIn("csrfmiddlewaretoken", html)
+        self.assertFalse([sql for sql in queries if "publications_" in sql], queries)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            library_apply_decision(processes[0], approved=False, comment="нет", librarian=self.librarian)
+
+        html, _ = self.get(self.librarian, "library_tasks")
+        self.assertNotIn(f"Заявка #{processes[0].pk}", html)
+        self.assertIn(f"Заявка #{processes[1].pk}", html)
+
+    def test_reviewer_queue_follows_own_verdicts(self):
+        process = make_processes(self.author, self.council, 1, status=Process.Status.INTERNAL_REVIEW, is_mifi=True)[0]
+        other = User.objects.create_user(username="rev2", password="x", role=User.Role.REVIEWER)
+        assignment = ReviewerAssignment.objects.create(process=process, reviewer=self.reviewer)
+        ReviewerAssignment.objects.create(process=process, reviewer=other)
+
+        html, _ = self.get(self.reviewer, "reviewer_tasks")
+        self.assertIn("Заполнить рецензию", html)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reviewer_submit(assignment, ReviewerAssignment.Verdict.RECOMMEND, "ok")
+
+        html, _ = self.get(self.reviewer, "reviewer_tasks")
+        self.assertNotIn("Заполнить рецензию", html)
+        self.assertIn("Ваш вердикт: Рекомендовать", html)
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        cls.reviewer = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+        cls.process = Process.objects.create(
+            author=cls.author, council=cls.council, title="Работа", journal="Журнал",
+            status=Process.Status.INTERNAL_REVIEW, is_mifi=True,
+        )
+        cls.assignment = ReviewerAssignment.objects.create(process=cls.process, reviewer=cls.reviewer)
+        ReviewerAssignment.objects.create(
+            process=cls.process, reviewer=User.objects.create_user(username="rev2", password="x", role=User.Role.REVIEWER),
+        )
+
+    def test_unchanged_detail_returns_304_without_rendering(self):
+        url = reverse("publications:process_detail", args=[self.process.pk])
+        self.client.force_login(self.reviewer)
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # соавторы хранятся отдельно, но тоже сдвигают Process.updated_at
+        CoAuthor.objects.create(process=self.process, name="Петров П. П.")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Петров П. П.")
+
+    def test_intermediate_verdict_changes_etag(self):
+        url = reverse("publications:process_detail", args=[self.process.pk])
+        other = ReviewerAssignment.objects.exclude(pk=self.assignment.pk).get().reviewer
+        self.client.force_login(other)
+        etag = self.client.get(url)["ETag"]
+
+        reviewer_submit(
+            ReviewerAssignment.objects.select_related("process", "reviewer").get(pk=self.assignment.pk),
+            verdict=ReviewerAssignment.Verdict.RECOMMEND, comment="",
+        )
+
+        # второй рецензент ещё не ответил: статус прежний, но список рецензий уже другой
+        self.assertEqual(Process.objects.get(pk=self.process.pk).status, Process.Status.INTERNAL_REVIEW)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_validator_is_per_user_and_respects_access(self):
+        url = reverse("publications:process_detail", args=[self.process.pk])
+        self.client.force_login(self.reviewer)
+        etag = self.client.get(url)["ETag"]
+
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        stranger = User.objects.create_user(username="other", password="x", role=User.Role.AUTHOR)
+        self.client.force_login(stranger)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def test_list_changes_with_any_visible_process(self):
+        url = reverse("publications:process_list")
+        self.client.force_login(self.reviewer)
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Process.objects.create(author=self.author, council=self.council, title="Новая", journal="Журнал")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProcessSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="ivanov", password="x", role=User.Role.AUTHOR, fio="Иванов Иван")
+        cls.quantum = Process.objects.create(author=cls.author, council=council, title="Квантовые вычисления", journal="Физика")
+        cls.ml = Process.objects.create(author=cls.author, council=council, title="Машинное обучение", journal="Информатика")
+        CoAuthor.objects.create(process=cls.ml, name="Сидоров")
+        cls.bib = Process.objects.create(author=cls.author, council=council, title="Сети", journal="Связь")
+        LibraryDecision.objects.create(process=cls.bib, comment="Оформить литература по ГОСТ")
+        cls.lit = Process.objects.create(author=cls.author, council=council, title="Обзор: литература", journal="Связь")
+        cls.oek = User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+
+    def test_process_list_search(self):
+        self.client.force_login(self.oek)
+        response = self.client.get(reverse("publications:process_list"), {"q": "Квантовые"})
+        self.assertEqual([p.pk for p in response.context["processes"]], [self.quantum.pk])
+
+    def test_admin_search(self):
+        self.client.force_login(User.objects.create_superuser(username="admin", password="x"))
+        response = self.client.get(reverse("admin:publications_process_changelist"), {"q": "Квантовые"})
+        self.assertEqual([p.pk for p in response.context["cl"].result_list], [self.quantum.pk])
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector и триггеры есть только в PostgreSQL")
+    def test_ranked_fulltext_over_related_rows(self):
+        def found(text):
+            qs = search_processes(Process.objects.all(), text)
+            return [p.pk for p in qs.order_by("-rank", "-id")]
+
+        self.assertEqual(found("Сидоров"), [self.ml.pk])  # соавтор добавлен после заявки
+        self.assertEqual(found("ГОСТ"), [self.bib.pk])
+        # совпадение в названии (вес A) выше, чем в комментарии (вес D)
+        self.assertEqual(found("литература"), [self.lit.pk, self.bib.pk])
+
+        LibraryDecision.objects.filter(process=self.bib).update(comment="Нужен DOI")
+        self.assertEqual(found("ГОСТ"), [])
+        self.assertEqual(found("DOI"), [self.bib.pk])
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector и триггеры есть только в PostgreSQL")
+    def test_page_with_matches_runs_tsquery_once(self):
+        with self.assertNumQueries(1):
+            page, fuzzy = search_page(Process.objects.all(), "литература")
+        self.assertEqual(([p.pk for p in page.items], fuzzy), ([self.lit.pk, self.bib.pk], False))
+
+    @skipUnless(connection.vendor == "postgresql", "pg_trgm — только PostgreSQL")
+    def test_fuzzy_fallback_ranks_by_coauthor_similarity(self):
+        if not trigram_available():
+            self.skipTest("pg_trgm не установлен")
+        # опечатка в фамилии соавтора: по словам ничего, по триграммам — заявка ml
+        page, fuzzy = search_page(Process.objects.all(), "Сидаров")
+        self.assertTrue(fuzzy)
+        self.assertEqual([p.pk for p in page.items], [self.ml.pk])
+        self.assertGreater(page.items[0].rank, 0.3)
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector и триггеры есть только в PostgreSQL")
+    def test_full_save_rebuilds_vector_only_when_searchable_fields_change(self):
+        def vector():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT search_vector::text FROM publications_process WHERE id = %s", [self.quantum.pk])
+                return cursor.fetchone()[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE publications_process SET search_vector = 'метка' WHERE id = %s", [self.quantum.pk])
+
+        process = Process.objects.get(pk=self.quantum.pk)
+        process.status = Process.Status.LIBRARY_REVIEW
+        process.save()
+        self.assertEqual(vector(), "'метка'")
+
+        process.title = "Квантовая криптография"
+        process.save()
+        self.assertIn("криптограф", vector())
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector и триггеры есть только в PostgreSQL")
+    def test_ranked_pages_follow_cursor(self):
+        qs = search_processes(Process.objects.all(), "литература")
+        first = ranked_page(qs, page_size=1)
+        second = ranked_page(qs, cursor=first.next_cursor, page_size=1)
+        self.assertEqual([first.items[0].pk, second.items[0].pk], [self.lit.pk, self.bib.pk])
+        self.assertFalse(second.has_next)
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        cls.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR, fio="Иванов И. И.")
+        cls.admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        cls.reviewer = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER, fio="Петров П. П.")
+        cls.processes = make_processes(cls.author, cls.council, 5, status=Process.Status.READY_FOR_DEFENSE)
+        OEKDecision.objects.create(process=cls.processes[0], decision=OEKDecision.Decision.APPROVED, comment="ок, \"в срок\"")
+        ReviewerAssignment.objects.create(
+            process=cls.processes[0], reviewer=cls.reviewer, verdict=ReviewerAssignment.Verdict.RECOMMEND,
+        )
+
+    def export(self, **params):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("publications:process_export"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_csv_contains_joined_rows(self):
+        rows = list(csv.reader(io.StringIO(self.export(format="csv").decode("utf-8-sig"))))
+
+        self.assertEqual(len(rows), 6)
+        first = dict(zip(rows[0], rows[1]))
+        self.assertEqual(first["Автор"], "Иванов И. И.")
+        self.assertEqual(first["ОЭК: комментарий"], 'ок, "в срок"')
+        self.assertEqual(first["Рецензии"], "Петров П. П.: Рекомендовать")
+
+    def test_xlsx_is_valid_zip_with_all_rows(self):
+        with zipfile.ZipFile(io.BytesIO(self.export(format="xlsx"))) as zf:
+            self.assertIsNone(zf.testzip())
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(sheet.count("<row>"), 6)
+        self.assertIn("Иванов И. И.", sheet)
+
+    def test_formulas_are_neutralized(self):
+        Process.objects.filter(pk=self.processes[1].pk).update(title='=HYPERLINK("http://evil","x")', journal="-1+2")
+
+        rows = list(csv.reader(io.StringIO(self.export(format="csv").decode("utf-8-sig"))))
+        row = dict(zip(rows[0], rows[2]))
+        self.assertEqual(row["Название"], '\'=HYPERLINK("http://evil","x")')
+        self.assertEqual(row["Журнал"], "'-1+2")
+        self.assertEqual(row["Автор"], "Иванов И. И.")
+
+        with zipfile.ZipFile(io.BytesIO(self.export(format="xlsx"))) as zf:
+            sheet = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertIn("<t xml:space=\"preserve\">'=HYPERLINK", sheet)
+        self.assertNotIn("<t xml:space=\"preserve\">=", sheet)
+
+    def test_requires_staff(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("publications:process_export"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv") as fh:
+            call_command("export_processes", output=fh.name, chunk_size=2, stderr=io.StringIO())
+            with open(fh.name, encoding="utf-8-sig") as result:
+                self.assertEqual(len(list(csv.reader(result))), 6)
+
+
+class DocumentServingTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        self.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        self.process = Process.objects.create(author=self.author, council=council, title="Работа", journal="Журнал")
+        docs = ProcessDocuments(process=self.process)
+        docs.article_file.save("article.pdf", ContentFile(b"0123456789" * 100), save=False)
+        docs.bibliography_file.save("bib.txt", ContentFile(b"bib"), save=False)
+        docs.filled_template_file.save("tpl.docx", ContentFile(b"tpl"), save=False)
+        docs.save()
+        self.url = reverse("publications:process_document", args=[self.process.pk, "article_file"])
+        self.client.force_login(self.author)
+
+    def test_full_range_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "1000")
+        self.assertEqual(len(b"".join(response.streaming_content)), 1000)
+        etag = response["ETag"]
+
+        partial = self.client.get(self.url, HTTP_RANGE="bytes=995-")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial["Content-Range"], "bytes 995-999/1000")
+        self.assertEqual(b"".join(partial.streaming_content), b"56789")
+
+        stale = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"other"')
+        self.assertEqual(stale.status_code, 200)
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE="bytes=5000-").status_code, 416)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_uploaded_html_is_never_rendered_inline(self):
+        docs = ProcessDocuments.objects.get(process=self.process)
+        docs.bibliography_file.save("bib.html", ContentFile(b"<script>alert(1)</script>"))
+        response = self.client.get(reverse("publications:process_document", args=[self.process.pk, "bibliography_file"]))
+
+        self.assertTrue(response["Content-Disposition"].startswith("attachment;"))
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+
+        # даже если вызов попросит inline, небезопасный тип уходит вложением
+        inline = serve_file(response.wsgi_request, docs.bibliography_file)
+        self.assertTrue(inline["Content-Disposition"].startswith("attachment;"))
+        pdf = serve_file(response.wsgi_request, docs.article_file)
+        self.assertTrue(pdf["Content-Disposition"].startswith("inline;"))
+        self.assertEqual(pdf["Content-Security-Policy"], "sandbox")
+
+    def test_other_author_gets_404(self):
+        other = User.objects.create_user(username="other", password="x", role=User.Role.AUTHOR)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(DOCUMENTS_SENDFILE_BACKEND="nginx", DOCUMENTS_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_nginx_backend_delegates_transfer(self):
+        response = self.client.get(self.url)
+        sha = blob_sha(self.process.documents.article_file.name)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/blobs/{sha[:2]}/{sha}")
+        self.assertEqual(response.content, b"")
+
+
+def docx_bytes(*paragraphs) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{p}</w:t></w:r></w:p>" for p in paragraphs)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        # фиксированная дата: иначе два вызова на границе секунды дают разные байты
+        zf.writestr(
+            zipfile.ZipInfo("word/document.xml", date_time=(2024, 1, 1, 0, 0, 0)),
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>",
+        )
+    return buf.getvalue()
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class DocumentVersionTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        self.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        self.reviewer = User.objects.create_user(username="rev", password="x", role=User.Role.REVIEWER)
+        self.process = Process.objects.create(
+            author=self.author, council=council, title="Работа", journal="Журнал",
+            status=Process.Status.INTERNAL_REVIEW_NEEDS_FIX,
+        )
+        docs = ProcessDocuments(process=self.process)
+        docs.article_file.save("article.docx", ContentFile(docx_bytes("Введение", "Методы", "Выводы")), save=False)
+        docs.bibliography_file.save("bib.txt", ContentFile(b"bib"), save=False)
+        docs.filled_template_file.save("tpl.txt", ContentFile(b"tpl"), save=False)
+        docs.save()
+
+    def rework(self):
+        self.client.force_login(self.author)
+        article = SimpleUploadedFile("article.docx", docx_bytes("Введение", "Новые методы", "Выводы"))
+        response = self.client.post(reverse("publications:reviewer_rework", args=[self.process.pk]), {"article_file": article})
+        self.assertEqual(response.status_code, 302)
+
+    def test_rework_appends_version_only_for_changed_field(self):
+        self.rework()
+
+        versions = DocumentVersion.objects.filter(documents__process=self.process)
+        self.assertEqual(
+            sorted(versions.values_list("field", "number")),
+            [("article_file", 1), ("article_file", 2), ("bibliography_file", 1), ("filled_template_file", 1)],
+        )
+        first = versions.get(field="article_file", number=1)
+        self.assertTrue(first.file.storage.exists(first.file.name))
+        with self.assertRaises(ValueError):
+            first.save()
+
+    def test_reviewer_sees_cached_diff(self):
+        self.rework()
+        self.client.force_login(self.reviewer)
+        url = reverse("publications:process_detail", args=[self.process.pk])
+
+        with patch("apps.publications.versions.extract_text", wraps=extract_text) as extract:
+            response = self.client.get(url)
+            self.client.get(url)
+
+        self.assertContains(response, "+Новые методы")
+        self.assertContains(response, "-Методы")
+        self.assertEqual(extract.call_count, 2)  # по разу на v1 и v2, второй просмотр — из кэша
+        latest = DocumentVersion.objects.get(field="article_file", number=2)
+        self.assertIn("Новые методы", latest.text)
+
+    def test_old_version_download_is_protected(self):
+        self.rework()
+        first = DocumentVersion.objects.get(field="article_file", number=1)
+        url = reverse("publications:document_version", args=[self.process.pk, first.pk])
+
+        self.client.force_login(User.objects.create_user(username="other", password="x", role=User.Role.AUTHOR))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.reviewer)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), docx_bytes("Введение", "Методы", "Выводы"))
+
+    def test_too_large_texts_are_not_diffed(self):
+        self.rework()
+        self.client.force_login(self.reviewer)
+
+        with patch("apps.publications.versions.DIFF_INPUT_MAX_LINES", 2):
+            response = self.client.get(reverse("publications:process_detail", args=[self.process.pk]))
+
+        self.assertContains(response, "слишком большой для сравнения")
+        self.assertEqual(DocumentVersion.objects.get(field="article_file", number=2).diff, versions.DIFF_TOO_LARGE)
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.assertIsInstance(default_storage, ContentAddressedStorage)
+
+    def make_template(self, name, content):
+        tpl = PublicationTemplate(department="Кафедра №1", name=name)
+        tpl.file.save(f"{name}.txt", ContentFile(content), save=True)
+        return tpl
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.make_template("Шаблон", b"DEMO TEMPLATE")
+        second = self.make_template("Копия", b"DEMO TEMPLATE")
+
+        self.assertNotEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.path, second.file.path)
+        self.assertTrue(second.file.name.endswith("/Копия.txt"))
+        with second.file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"DEMO TEMPLATE")
+        self.assertEqual(StoredBlob.objects.get().refcount, 2)
+        self.assertEqual(len(list(default_storage.blob_files())), 1)
+
+    def test_gc_removes_only_unreferenced_blobs(self):
+        kept = self.make_template("Шаблон", b"kept")
+        replaced = self.make_template("Старый", b"old")
+        old_path = replaced.file.path
+        replaced.file.save("new.txt", ContentFile(b"new"), save=True)  # старый файл остаётся без ссылок
+        StoredBlob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        stats = collect_garbage(default_storage, timedelta(hours=1))
+
+        self.assertEqual(stats["deleted"], 1)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(kept.file.path))
+        self.assertTrue(os.path.exists(replaced.file.path))
+        self.assertEqual(StoredBlob.objects.count(), 2)
+
+    def test_recent_blobs_survive_gc(self):
+        default_storage.save("articles/draft.pdf", ContentFile(b"not yet referenced"))
+        self.assertEqual(collect_garbage(default_storage, timedelta(hours=1))["deleted"], 0)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=4, NOTIFICATIONS_USE_OUTBOX=False)
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        self.author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        self.process = Process.objects.create(
+            author=self.author, council=council, title="Работа", journal="Журнал",
+            status=Process.Status.INTERNAL_REVIEW_NEEDS_FIX,
+        )
+        docs = ProcessDocuments(process=self.process)
+        for field in ("article_file", "bibliography_file", "filled_template_file"):
+            getattr(docs, field).save(f"{field}.txt", ContentFile(b"old"), save=False)
+        docs.save()
+        self.client.force_login(self.author)
+
+    def upload(self, data: bytes, field="article_file"):
+        response = self.client.post(
+            reverse("publications:upload_start"),
+            {"field": field, "filename": "статья.pdf", "size": len(data), "sha256": hashlib.sha256(data).hexdigest()},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def put_part(self, upload_id, index, chunk, sha=None):
+        return self.client.put(
+            reverse("publications:upload_part", args=[upload_id, index]), chunk,
+            content_type="application/octet-stream",
+            HTTP_X_CHUNK_SHA256=sha or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def test_resume_verify_and_attach(self):
+        data = b"0123456789"
+        upload_id = self.upload(data)
+
+        self.assertEqual(self.put_part(upload_id, 0, data[:4]).status_code, 200)
+        self.assertEqual(self.put_part(upload_id, 1, data[4:8], sha="0" * 64).status_code, 400)
+        # обрыв: клиент спрашивает, что уже дошло, и досылает остальное
+        status = self.client.get(reverse("publications:upload_status", args=[upload_id])).json()
+        self.assertEqual(status["parts"], [0])
+        self.put_part(upload_id, 1, data[4:8])
+        self.put_part(upload_id, 2, data[8:])
+
+        response = self.client.post(
+            reverse("publications:upload_complete", args=[upload_id]), {"process": self.process.pk},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], UploadSession.Status.ATTACHED)
+        docs = ProcessDocuments.objects.get(process=self.process)
+        with docs.article_file.open("rb") as fh:
+            self.assertEqual(fh.read(), data)
+
+    def test_incomplete_upload_is_rejected(self):
+        upload_id = self.upload(b"0123456789")
+        self.put_part(upload_id, 0, b"0123")
+        response = self.client.post(reverse("publications:upload_complete", args=[upload_id]), {}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_part_leaves_no_files(self):
+        upload_id = self.upload(b"0123456789")
+        part_dir = os.path.join(self.media.name, "uploads", upload_id)
+
+        self.assertEqual(self.put_part(upload_id, 0, b"012345").status_code, 400)  # больше UPLOAD_CHUNK_SIZE
+        self.assertEqual(os.listdir(part_dir), [])
+
+        # брошенная сессия: cleanup_uploads удаляет и каталог с осиротевшими файлами
+        with open(os.path.join(part_dir, "000001_orphan"), "wb") as fh:
+            fh.write(b"4567")
+        UploadSession.objects.filter(pk=upload_id).update(updated_at=timezone.now() - timedelta(days=30))
+        call_command("cleanup_uploads", stdout=io.StringIO())
+        self.assertFalse(os.path.exists(part_dir))
+        self.assertFalse(UploadSession.objects.filter(pk=upload_id).exists())
+
+    def test_attach_is_refused_while_coauthors_consent(self):
+        Process.objects.filter(pk=self.process.pk).update(status=Process.Status.WAITING_COAUTHOR_CONSENTS)
+        upload_id = self.upload(b"new!")
+        self.put_part(upload_id, 0, b"new!")
+
+        response = self.client.post(
+            reverse("publications:upload_complete", args=[upload_id]), {"process": self.process.pk},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        with ProcessDocuments.objects.get(process=self.process).article_file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"old")
+
+    def test_concurrent_complete_keeps_winner_file(self):
+        upload_id = self.upload(b"new!")
+        self.put_part(upload_id, 0, b"new!")
+        save = default_storage.save
+        ours = []
+
+        def save_while_other_request_wins(name, content):
+            ours.append(save(name, content))
+            # пока мы склеивали, параллельный запрос успел завершить сессию
+            UploadSession.objects.filter(pk=upload_id).update(status=UploadSession.Status.COMPLETE, file="winner.pdf")
+            return ours[0]
+
+        with patch("apps.publications.uploads.default_storage.save", side_effect=save_while_other_request_wins):
+            session = complete_upload(UploadSession.objects.get(pk=upload_id))
+
+        self.assertEqual((session.status, session.file.name), (UploadSession.Status.COMPLETE, "winner.pdf"))
+        # собранный нами blob больше ни на что не ссылается — его заберёт gc_blobs
+        self.assertEqual(StoredBlob.objects.get(pk=blob_sha(ours[0])).refcount, 0)
+
+    def test_rework_form_accepts_upload_id(self):
+        upload_id = self.upload(b"new!")
+        self.put_part(upload_id, 0, b"new!")
+        self.client.post(reverse("publications:upload_complete", args=[upload_id]), {}, content_type="application/json")
+
+        response = self.client.post(
+            reverse("publications:reviewer_rework", args=[self.process.pk]), {"article_file_upload": upload_id},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        docs = ProcessDocuments.objects.get(process=self.process)
+        with docs.article_file.open("rb") as fh:
+            self.assertEqual(fh.read(), b"new!")
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).status, UploadSession.Status.ATTACHED)
+
+
+@skipUnless(connection.vendor == "postgresql", "SELECT FOR UPDATE проверяется на PostgreSQL")
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class ConcurrentReviewTest(TransactionTestCase):
+    def test_simultaneous_last_verdicts_finalize_stage_once(self):
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        User.objects.create_user(username="oek", password="x", role=User.Role.OEK)
+        process = Process.objects.create(
+            author=author, council=council, title="Работа", journal="Журнал",
+            is_mifi=True, status=Process.Status.INTERNAL_REVIEW,
+        )
+        assignments = []
+        for i in range(3):
+            reviewer = User.objects.create_user(username=f"rev{i}", password="x", role=User.Role.REVIEWER)
+            assignments.append(ReviewerAssignment.objects.create(process=process, reviewer=reviewer))
+        reviewer_submit(
+            ReviewerAssignment.objects.select_related("process", "reviewer").get(pk=assignments[0].pk),
+            verdict=ReviewerAssignment.Verdict.RECOMMEND, comment="",
+        )
+
+        barrier = threading.Barrier(2)
+
+        def submit(pk):
+            try:
+                assignment = ReviewerAssignment.objects.select_related("process", "reviewer").get(pk=pk)
+                barrier.wait()
+                reviewer_submit(assignment, verdict=ReviewerAssignment.Verdict.RECOMMEND, comment="")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(a.pk,)) for a in assignments[1:]]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        process.refresh_from_db()
+        self.assertEqual(process.status, Process.Status.OEK_REVIEW)
+        self.assertEqual(Notification.objects.filter(user__username="oek").count(), 1)
+
+
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class BenchmarkSmokeTest(TransactionTestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_every_lifecycle_reaches_defense(self):
+        out = io.StringIO()
+        # МИФИ — заявки с номером n % 100 < 2: две из четырёх идут через рецензентов
+        call_command("benchmark_workflow", lifecycles=4, concurrency=1, mifi_ratio=0.02, keep=True, stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report["errors"], {})
+        self.assertEqual(report["transitions"]["oek_decision"]["count"], 4)
+        self.assertEqual(report["transitions"]["reviewer_submit"]["count"], 6)
+        statuses = set(Process.objects.filter(title__startswith="Бенчмарк").values_list("status", flat=True))
+        self.assertEqual(statuses, {Process.Status.READY_FOR_DEFENSE})
+
+    def test_cleanup_restores_counters_of_real_staff(self):
+        staff = User.objects.create_user(username="head", password="x", role=User.Role.LIBRARY_HEAD)
+        call_command("benchmark_workflow", lifecycles=2, concurrency=1, mifi_ratio=0, stdout=io.StringIO())
+
+        self.assertFalse(Process.objects.exists())
+        staff.refresh_from_db()
+        self.assertEqual(staff.unread_notifications_count, 0)
+
+    def test_percentile_is_nearest_rank(self):
+        values = [1, 2, 3, 4, 5, 6]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 6)
+        self.assertEqual(percentile([7], 99), 7)
+
+
+@skipUnless(connection.vendor == "postgresql", "SELECT FOR UPDATE между потоками — только PostgreSQL")
+@override_settings(NOTIFICATIONS_USE_OUTBOX=False)
+class ConcurrentReworkTest(TransactionTestCase):
+    def test_double_submit_saves_one_version(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        council = Council.objects.create(department="Кафедра №1", council_number="Совет-101")
+        author = User.objects.create_user(username="author", password="x", role=User.Role.AUTHOR)
+        process = Process.objects.create(
+            author=author, council=council, title="Работа", journal="Журнал",
+            status=Process.Status.INTERNAL_REVIEW_NEEDS_FIX,
+        )
+        docs = ProcessDocuments(process=process)
+        for field in ("article_file", "bibliography_file", "filled_template_file"):
+            getattr(docs, field).save(f"{field}.txt", ContentFile(b"old"), save=False)
+        docs.save()
+
+        barrier = threading.Barrier(2)
+        statuses = []
+
+        def slow_record_versions(documents):
+            # расширяем окно между чтением последней версии и вставкой следующей
+            time.sleep(0.3)
+            return versions.record_versions(documents)
+
+        def submit(content):
+            try:
+                client = self.client_class()
+                client.force_login(author)
+                article = SimpleUploadedFile("article.txt", content)
+                barrier.wait()
+                response = client.post(reverse("publications:reviewer_rework", args=[process.pk]), {"article_file": article})
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(content,)) for content in (b"first", b"second")]
+        with patch("apps.publications.signals.record_versions", slow_record_versions):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(statuses, [302, 302])
+        self.assertEqual(DocumentVersion.objects.filter(field="article_file").count(), 2)
+        process.refresh_from_db()
+        self.assertEqual(process.status, Process.Status.INTERNAL_REVIEW)
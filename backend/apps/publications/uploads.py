@@ -0,0 +1,206 @@
+"""
+Докачиваемая загрузка больших файлов заявки по частям.
+
+1. start_upload — сессия (поле ProcessDocuments, имя, размер, необязательный SHA-256 файла);
+2. store_part — часть пишется в хранилище потоком прямо из тела запроса,
+   попутно считается SHA-256 и сверяется с присланным клиентом; повтор той же
+   части с тем же хэшем — no-op, поэтому после обрыва можно слать заново;
+3. complete_upload — части склеиваются потоком в итоговый файл (в каталог upload_to
+   целевого поля), сверяются размер и хэш файла, части удаляются;
+4. attach_upload — собранный файл привязывается к ProcessDocuments под блокировкой строки.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Process, ProcessDocuments, UploadPart, UploadSession
+
+# какие файлы автор может прикрепить напрямую (upload_complete с process) — только
+# этапы доработки, как в rework-формах. Пока соавторы дают согласия, статья меняться
+# не должна: согласие относится к той версии, что была при отправке
+EDITABLE_FIELDS = {
+    Process.Status.INTERNAL_REVIEW_NEEDS_FIX: {UploadSession.Field.ARTICLE, UploadSession.Field.FILLED_TEMPLATE},
+    Process.Status.LIBRARY_NEEDS_FIX: {UploadSession.Field.BIBLIOGRAPHY},
+}
+
+
+class UploadError(Exception):
+    pass
+
+
+class _HashingReader:
+    def __init__(self, stream, limit: int):
+        self._stream = stream
+        self._limit = limit
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        self.size += len(data)
+        if self.size > self._limit:
+            raise UploadError("Часть больше допустимого размера.")
+        self.sha256.update(data)
+        return data
+
+
+class _ConcatReader:
+    """
+    Последовательное чтение частей из хранилища как одного файла.
+    """
+
+    def __init__(self, names):
+        self._names = iter(names)
+        self._current = None
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        while True:
+            if self._current is None:
+                name = next(self._names, None)
+                if name is None:
+                    return b""
+                self._current = default_storage.open(name, "rb")
+            data = self._current.read(size)
+            if data:
+                self.sha256.update(data)
+                self.size += len(data)
+                return data
+            self._current.close()
+            self._current = None
+
+
+def part_count(session: UploadSession) -> int:
+    return max(1, -(-session.size // settings.UPLOAD_CHUNK_SIZE))
+
+
+def start_upload(user, field: str, filename: str, size: int, sha256: str = "") -> UploadSession:
+    if field not in UploadSession.Field.values:
+        raise UploadError("Неизвестное поле файла.")
+    if not filename or size <= 0:
+        raise UploadError("Укажите имя и размер файла.")
+    if size > settings.UPLOAD_MAX_FILE_SIZE:
+        raise UploadError("Файл больше допустимого размера.")
+    return UploadSession.objects.create(
+        user=user, field=field, filename=filename[:255], size=size, sha256=sha256.lower(),
+    )
+
+
+def store_part(session: UploadSession, index: int, stream, sha256: str) -> UploadPart:
+    if session.status != UploadSession.Status.ACTIVE:
+        raise UploadError("Загрузка уже завершена.")
+    if index >= part_count(session):
+        raise UploadError("Номер части вне диапазона.")
+    if not sha256:
+        raise UploadError("Не передан SHA-256 части.")
+    sha256 = sha256.lower()
+
+    existing = session.parts.filter(index=index).first()
+    if existing and existing.sha256 == sha256:
+        return existing
+
+    reader = _HashingReader(stream, settings.UPLOAD_CHUNK_SIZE)
+    target = f"uploads/{session.pk}/{index:06d}"
+    try:
+        name = default_storage.save(target, File(reader, name=f"{index:06d}"))
+    except Exception:
+        # оборванная или слишком большая часть: файл уже создан, но имени save не вернул.
+        # Сохранённую ранее часть под тем же именем не трогаем — недописанный файл
+        # рядом с ней (с суффиксом) уберёт cleanup_uploads вместе с каталогом сессии
+        if not existing or existing.name != target:
+            default_storage.delete(target)
+        raise
+    if reader.sha256.hexdigest() != sha256:
+        default_storage.delete(name)
+        raise UploadError("Контрольная сумма части не совпала, отправьте её ещё раз.")
+
+    try:
+        with transaction.atomic():
+            if existing:
+                existing.delete()
+                default_storage.delete(existing.name)
+            part = UploadPart.objects.create(session=session, index=index, size=reader.size, sha256=sha256, name=name)
+            # активность сессии — для cleanup_uploads
+            UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+            return part
+    except IntegrityError:
+        # ту же часть параллельно дописал другой запрос
+        default_storage.delete(name)
+        return session.parts.get(index=index)
+
+
+def complete_upload(session: UploadSession) -> UploadSession:
+    """
+    Склейка частей идёт вне транзакции (до UPLOAD_MAX_FILE_SIZE байт — без
+    блокировок строк); затем короткий условный UPDATE переводит сессию в COMPLETE.
+    Если параллельный запрос успел раньше, наш собранный файл удаляется.
+    """
+    session = UploadSession.objects.get(pk=session.pk)
+    if session.status != UploadSession.Status.ACTIVE:
+        return session
+
+    parts = list(session.parts.all())
+    if [p.index for p in parts] != list(range(part_count(session))):
+        raise UploadError("Загружены не все части.")
+    if sum(p.size for p in parts) != session.size:
+        raise UploadError("Размер собранного файла не совпадает с заявленным.")
+
+    field = ProcessDocuments._meta.get_field(session.field)
+    reader = _ConcatReader([p.name for p in parts])
+    name = default_storage.save(field.generate_filename(None, session.filename), File(reader, name=session.filename))
+    if session.sha256 and reader.sha256.hexdigest() != session.sha256:
+        default_storage.delete(name)
+        raise UploadError("Контрольная сумма файла не совпала.")
+
+    with transaction.atomic():
+        completed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.ACTIVE).update(
+            file=name, status=UploadSession.Status.COMPLETE, updated_at=timezone.now(),
+        )
+        if completed:
+            UploadPart.objects.filter(pk__in=[p.pk for p in parts]).delete()
+    if not completed:
+        default_storage.delete(name)
+        return UploadSession.objects.get(pk=session.pk)
+
+    for part in parts:
+        default_storage.delete(part.name)
+    session.refresh_from_db()
+    return session
+
+
+def claim_upload(session: UploadSession, documents: ProcessDocuments) -> bool:
+    """
+    Ставит собранный файл в поле documents (без сохранения) и помечает сессию
+    привязанной. False — сессию уже использовали. Вызывать внутри транзакции.
+    """
+    claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.Status.COMPLETE).update(
+        status=UploadSession.Status.ATTACHED, updated_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+    getattr(documents, session.field).name = session.file.name
+    return True
+
+
+def attach_upload(session: UploadSession, process: Process) -> ProcessDocuments:
+    """
+    Атомарно привязывает собранный файл к документам заявки автора.
+    """
+    if process.author_id != session.user_id:
+        raise UploadError("Можно прикреплять файлы только к своим заявкам.")
+    if session.field not in EDITABLE_FIELDS.get(process.status, ()):
+        raise UploadError("На этом этапе этот файл менять нельзя.")
+
+    with transaction.atomic():
+        documents = ProcessDocuments.objects.select_for_update().filter(process=process).first()
+        if documents is None:
+            raise UploadError("У заявки нет документов.")
+        if not claim_upload(session, documents):
+            raise UploadError("Загрузка не завершена или уже использована.")
+        documents.save(update_fields=[session.field, "updated_at"])
+    return documents
@@ -1,13 +1,14 @@
 from django.urls import path
 from .views import (
     dashboard,
-    process_list, process_create, process_detail,
-    template_download,
+    process_list, process_export, process_create, process_detail,
+    template_download, process_document, document_version_download, coauthor_consent_download,
     upload_coauthor_consent,
-    library_tasks, library_decide,
-    reviewer_tasks, reviewer_submit_view,
-    oek_tasks, oek_decide_view,
+    library_tasks, library_decide, library_decide_batch,
+    reviewer_tasks, reviewer_submit_view, reviewer_submit_batch,
+    oek_tasks, oek_decide_view, oek_decide_batch,
     reviewer_rework_view, bibliography_rework_view,
+    upload_start, upload_status, upload_part, upload_complete,
 )
 
 app_name = "publications"
@@ -15,22 +16,35 @@ app_name = "publications"
 urlpatterns = [
     path("", dashboard, name="dashboard"),
     path("processes/", process_list, name="process_list"),
+    path("processes/export/", process_export, name="process_export"),
     path("process/create/", process_create, name="process_create"),
     path("process/<int:pk>/", process_detail, name="process_detail"),
 
     path("template/<int:pk>/download/", template_download, name="template_download"),
 
+    path("process/<int:pk>/documents/<str:field>/", process_document, name="process_document"),
+    path("process/<int:pk>/versions/<int:version_pk>/", document_version_download, name="document_version"),
+
     path("process/<int:process_pk>/coauthor/<int:coauthor_pk>/consent/", upload_coauthor_consent, name="upload_consent"),
+    path("process/<int:process_pk>/coauthor/<int:coauthor_pk>/consent/download/", coauthor_consent_download, name="consent_download"),
 
     path("tasks/library/", library_tasks, name="library_tasks"),
     path("tasks/library/<int:pk>/decide/", library_decide, name="library_decide"),
+    path("tasks/library/batch/", library_decide_batch, name="library_decide_batch"),
 
     path("tasks/reviewer/", reviewer_tasks, name="reviewer_tasks"),
     path("tasks/reviewer/<int:assignment_pk>/submit/", reviewer_submit_view, name="reviewer_submit"),
+    path("tasks/reviewer/batch/", reviewer_submit_batch, name="reviewer_submit_batch"),
 
     path("tasks/oek/", oek_tasks, name="oek_tasks"),
     path("tasks/oek/<int:pk>/decide/", oek_decide_view, name="oek_decide"),
+    path("tasks/oek/batch/", oek_decide_batch, name="oek_decide_batch"),
 
     path("process/<int:pk>/rework/reviewer/", reviewer_rework_view, name="reviewer_rework"),
     path("process/<int:pk>/rework/bibliography/", bibliography_rework_view, name="bibliography_rework"),
+
+    path("uploads/", upload_start, name="upload_start"),
+    path("uploads/<uuid:upload_id>/", upload_status, name="upload_status"),
+    path("uploads/<uuid:upload_id>/parts/<int:index>/", upload_part, name="upload_part"),
+    path("uploads/<uuid:upload_id>/complete/", upload_complete, name="upload_complete"),
 ]
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""
+История файлов заявки (DocumentVersion).
+
+record_versions вызывается после каждого сохранения ProcessDocuments (signals.py)
+и дописывает версию для полей, где файл сменился. Текст версии извлекается при
+первом запросе (version_text), diff с предыдущей версией — тоже (version_diff);
+оба результата сохраняются в строке версии, поэтому следующие рецензенты
+получают готовое, а файл повторно не читается.
+"""
+import difflib
+import io
+import os
+import zipfile
+from xml.etree import ElementTree
+
+from .models import DocumentField, DocumentVersion
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf необязателен: без него текст PDF не извлекается
+    PdfReader = None
+
+TEXT_EXTRACT_MAX_BYTES = 20 * 1024 * 1024
+DIFF_MAX_LINES = 500
+# difflib квадратичен в худшем случае: больше этого текст не сравниваем
+DIFF_INPUT_MAX_LINES = 20000
+DIFF_INPUT_MAX_CHARS = 2 * 1024 * 1024
+DIFF_TOO_LARGE = "… файл слишком большой для сравнения версий"
+DIFF_CONTEXT_LINES = 2
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+ODF_TEXT_NS = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+def record_versions(documents) -> list:
+    """
+    Новые версии для полей, где имя файла отличается от последней версии.
+    """
+    latest = {}
+    for field, number, name in documents.versions.order_by("number").values_list("field", "number", "file"):
+        latest[field] = (number, name)
+
+    created = []
+    for field in DocumentField.values:
+        fieldfile = getattr(documents, field)
+        number, name = latest.get(field, (0, None))
+        if not fieldfile.name or fieldfile.name == name:
+            continue
+        created.append(DocumentVersion(
+            documents=documents, field=field, number=number + 1, file=fieldfile.name, size=_size(fieldfile),
+        ))
+    if created:
+        DocumentVersion.objects.bulk_create(created)
+    return created
+
+
+def _size(fieldfile) -> int:
+    try:
+        return fieldfile.size
+    except OSError:
+        return 0
+
+
+# --- извлечение текста -------------------------------------------------------
+
+def _plain_text(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1251", errors="replace")
+
+
+def _zip_xml(data: bytes, member: str):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        if zf.getinfo(member).file_size > TEXT_EXTRACT_MAX_BYTES * 5:
+            raise ValueError("Слишком большой XML внутри документа.")
+        return ElementTree.fromstring(zf.read(member))
+
+
+def _docx_text(data: bytes) -> str:
+    root = _zip_xml(data, "word/document.xml")
+    paragraphs = []
+    for p in root.iter(f"{W_NS}p"):
+        parts = []
+        for node in p.iter():
+            if node.tag == f"{W_NS}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{W_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{W_NS}br", f"{W_NS}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def _odt_text(data: bytes) -> str:
+    root = _zip_xml(data, "content.xml")
+    return "\n".join(
+        "".join(node.itertext()) for node in root.iter() if node.tag in (f"{ODF_TEXT_NS}p", f"{ODF_TEXT_NS}h")
+    )
+
+
+def _pdf_text(data: bytes) -> str:
+    if PdfReader is None:
+        return ""
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+EXTRACTORS = {
+    ".txt": _plain_text, ".md": _plain_text, ".tex": _plain_text, ".bib": _plain_text, ".csv": _plain_text,
+    ".docx": _docx_text,
+    ".odt": _odt_text,
+    ".pdf": _pdf_text,
+}
+
+
+def extract_text(fieldfile) -> str:
+    """
+    Текст файла для сравнения версий; "" — формат не поддерживается или файл не читается.
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(fieldfile.name)[1].lower())
+    if extractor is None:
+        return ""
+    try:
+        with fieldfile.storage.open(fieldfile.name, "rb") as fh:
+            data = fh.read(TEXT_EXTRACT_MAX_BYTES + 1)
+        if len(data) > TEXT_EXTRACT_MAX_BYTES:
+            return ""
+        return extractor(data)
+    except Exception:  # noqa: BLE001 — битый файл не должен ронять карточку заявки
+        return ""
+
+
+def _cache(version: DocumentVersion, **values):
+    # пишет только пустые поля: параллельный просмотр уже мог посчитать то же самое
+    for name, value in values.items():
+        DocumentVersion.objects.filter(pk=version.pk, **{f"{name}__isnull": True}).update(**{name: value})
+        setattr(version, name, value)
+
+
+def version_text(version: DocumentVersion) -> str:
+    if version.text is None:
+        _cache(version, text=extract_text(version.file))
+    return version.text
+
+
+def version_diff(version: DocumentVersion) -> str:
+    """
+    unified diff текста с предыдущей версией того же поля ("" — первая версия,
+    текст не изменился или его не удалось извлечь; DIFF_TOO_LARGE — текст
+    длиннее DIFF_INPUT_MAX_LINES строк или DIFF_INPUT_MAX_CHARS символов).
+    """
+    if version.diff is not None:
+        return version.diff
+    previous = DocumentVersion.objects.filter(
+        documents_id=version.documents_id, field=version.field, number=version.number - 1,
+    ).first()
+    diff = ""
+    if previous is not None:
+        old, new = version_text(previous), version_text(version)
+        old_lines, new_lines = old.splitlines(), new.splitlines()
+        if max(len(old), len(new)) > DIFF_INPUT_MAX_CHARS or max(len(old_lines), len(new_lines)) > DIFF_INPUT_MAX_LINES:
+            # пометка тоже кэшируется: следующий просмотр не будет пытаться снова
+            diff = DIFF_TOO_LARGE
+        elif old or new:
+            lines = list(difflib.unified_diff(
+                old_lines, new_lines,
+                f"v{previous.number}", f"v{version.number}", lineterm="", n=DIFF_CONTEXT_LINES,
+            ))
+            if len(lines) > DIFF_MAX_LINES:
+                lines = lines[:DIFF_MAX_LINES] + [f"… показаны первые {DIFF_MAX_LINES} строк"]
+            diff = "\n".join(lines)
+    _cache(version, diff=diff)
+    return diff
+
+
+def _diff_line_class(line: str) -> str:
+    if line.startswith(("+++", "---")):
+        return "meta"
+    if line.startswith("@@"):
+        return "hunk"
+    return {"+": "added", "-": "removed"}.get(line[:1], "")
+
+
+def document_history(documents, with_diff: bool = False) -> list:
+    """
+    Версии файлов заявки по полям для карточки; with_diff — приложить изменения
+    последней версии относительно предыдущей (для рецензентов и проверяющих).
+    """
+    versions = list(documents.versions.defer("text"))
+    history = []
+    for field in DocumentField:
+        items = [v for v in versions if v.field == field.value]
+        if not items:
+            continue
+        entry = {"field": field.value, "label": field.label, "versions": items, "diff_lines": None}
+        latest = items[-1]
+        if with_diff and latest.number > 1:
+            diff = version_diff(latest)
+            entry["diff_lines"] = [(_diff_line_class(line), line) for line in diff.splitlines()]
+            entry["text_missing"] = not diff and not version_text(latest)
+        history.append(entry)
+    return history
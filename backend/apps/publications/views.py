@@ -1,30 +1,57 @@
+import json
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, Http404
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
+from apps.accounts.conditional import conditional_page
 from apps.accounts.models import User
 from apps.accounts.permissions import role_required
 from apps.notifications.utils import notify
 
+from . import queues
+from .export import FORMATS, iter_rows
 from .forms import (
     ProcessCreateForm, DocumentsForm, CoAuthorFormSet,
     UploadConsentForm, LibraryDecisionForm, ReviewerVerdictForm, OEKDecisionForm,
-    ReviewerReworkUploadForm, BibliographyReworkUploadForm,
+    ReviewerReworkUploadForm, BibliographyReworkUploadForm, ProcessListFilterForm,
+    BatchDecisionForm, OEKBatchDecisionForm, BatchVerdictForm,
+)
+from .models import (
+    Process, PublicationTemplate, CoAuthor, ReviewerAssignment, ProcessDocuments, UploadSession, DocumentVersion,
 )
-from .models import Process, PublicationTemplate, CoAuthor, ReviewerAssignment, ProcessDocuments
+from .pagination import keyset_page
+from .search import fuzzy_search_processes, search_page, search_processes
+from .selectors import get_process_aggregate
+from .sendfile import serve_file
+from .uploads import UploadError, attach_upload, complete_upload, start_upload, store_part
+from .versions import document_history
 from .services import (
+    BatchResult,
     start_or_advance_after_creation,
     try_advance_after_coauthor_consents,
     library_apply_decision,
+    library_apply_decisions,
     reviewer_submit,
+    reviewer_submit_many,
     author_resubmit_after_internal_fix,
     oek_apply_decision,
+    oek_apply_decisions,
     author_resubmit_after_oek_fix,
     author_resubmit_after_library_fix,
 )
 
+PROCESS_LIST_PAGE_SIZE = 50
+
 
 @login_required
 def dashboard(request):
@@ -41,23 +68,20 @@ def dashboard(request):
     context = {"role": user.role}
 
     if user.role == User.Role.AUTHOR:
-        context["processes"] = Process.objects.filter(author=user).order_by("-created_at")
-        return render(request, "publications/dashboard.html", context)
-
-    if user.role == User.Role.LIBRARY_HEAD:
-        context["processes"] = Process.objects.filter(status=Process.Status.LIBRARY_REVIEW).order_by("created_at")
-        return render(request, "publications/dashboard.html", context)
-
-    if user.role == User.Role.REVIEWER:
-        context["assignments"] = ReviewerAssignment.objects.filter(reviewer=user).order_by("-process__created_at")
+        context["processes"] = Process.objects.filter(author=user).select_related("council").order_by("-created_at")
         return render(request, "publications/dashboard.html", context)
 
-    if user.role == User.Role.OEK:
-        context["processes"] = Process.objects.filter(status=Process.Status.OEK_REVIEW).order_by("created_at")
+    if user.role in (User.Role.LIBRARY_HEAD, User.Role.REVIEWER, User.Role.OEK):
+        # у этих ролей на дашборде только ссылка на страницу задач
         return render(request, "publications/dashboard.html", context)
 
     if user.role == User.Role.COMMISSION:
-        context["processes"] = Process.objects.filter(status=Process.Status.READY_FOR_DEFENSE).order_by("-updated_at")
+        context["queue_html"] = queues.status_queue(
+            "dashboard", Process.Status.READY_FOR_DEFENSE,
+            lambda: _render_queue("commission_queue.html", Process.objects.filter(
+                status=Process.Status.READY_FOR_DEFENSE,
+            ).order_by("-updated_at")),
+        )
         return render(request, "publications/dashboard.html", context)
 
     # fallback for superuser/others
@@ -65,13 +89,78 @@ def dashboard(request):
     return render(request, "publications/dashboard.html", context)
 
 
+def _list_last_modified(request):
+    # MAX(updated_at) — один шаг по индексу (updated_at) или (author, updated_at);
+    # фильтры списка не учитываются, поэтому
+    # любое изменение любой видимой заявки просто сбрасывает 304
+    qs = Process.objects.all()
+    if request.user.role == User.Role.AUTHOR:
+        qs = qs.filter(author=request.user)
+    return qs.aggregate(last=Max("updated_at"))["last"]
+
+
 @login_required
+@conditional_page(_list_last_modified)
 def process_list(request):
+    qs = Process.objects.select_related("council", "author")
     if request.user.role == User.Role.AUTHOR:
-        qs = Process.objects.filter(author=request.user).order_by("-created_at")
+        qs = qs.filter(author=request.user)
+
+    filter_form = ProcessListFilterForm(request.GET or None)
+    qs = filter_form.filter(qs)
+
+    # с поиском — по релевантности, без него — от новых к старым
+    fuzzy = False
+    cursor = request.GET.get("cursor", "")
+    if filter_form.search_text():
+        page, fuzzy = search_page(qs, filter_form.search_text(), cursor=cursor, page_size=PROCESS_LIST_PAGE_SIZE)
     else:
-        qs = Process.objects.all().order_by("-created_at")
-    return render(request, "publications/process_list.html", {"processes": qs})
+        page = keyset_page(qs, cursor=cursor, page_size=PROCESS_LIST_PAGE_SIZE)
+
+    # ссылка на следующую страницу сохраняет текущие фильтры
+    next_query = None
+    if page.has_next:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_query = params.urlencode()
+
+    return render(request, "publications/process_list_page.html", {
+        "processes": page.items,
+        "filter_form": filter_form,
+        "next_query": next_query,
+        "fuzzy": fuzzy,
+    })
+
+
+def _search_rows(qs, text):
+    # как в списке: нечёткий поиск — только если полнотекстовый ничего не дал
+    found = False
+    for row in iter_rows(search_processes(qs, text)):
+        found = True
+        yield row
+    if not found:
+        fuzzy = fuzzy_search_processes(qs, text)
+        if fuzzy is not None:
+            yield from iter_rows(fuzzy)
+
+
+@staff_member_required
+def process_export(request):
+    """
+    Потоковая выгрузка заявок (?format=csv|xlsx) с фильтрами списка процессов.
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        raise Http404("Неизвестный формат выгрузки.")
+    content_type, render_rows = FORMATS[fmt]
+
+    filter_form = ProcessListFilterForm(request.GET)
+    qs = filter_form.filter(Process.objects.all())
+    rows = _search_rows(qs, filter_form.search_text()) if filter_form.search_text() else iter_rows(qs)
+    response = StreamingHttpResponse(render_rows(rows), content_type=content_type)
+    filename = f"processes_{timezone.localdate():%Y%m%d}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 @login_required
@@ -81,32 +170,36 @@ def process_create(request):
 
     if request.method == "POST":
         p_form = ProcessCreateForm(request.POST)
-        d_form = DocumentsForm(request.POST, request.FILES)
+        d_form = DocumentsForm(request.POST, request.FILES, user=request.user)
         formset = CoAuthorFormSet(request.POST, queryset=CoAuthor.objects.none())
 
         if p_form.is_valid() and d_form.is_valid() and formset.is_valid():
-            process = p_form.save(commit=False)
-            process.author = request.user
-            process.save()
-
-            # docs
-            docs = d_form.save(commit=False)
-            docs.process = process
-            docs.save()
-
-            # coauthors
-            for f in formset:
-                if f.cleaned_data and not f.cleaned_data.get("DELETE", False):
-                    obj = f.save(commit=False)
-                    obj.process = process
-                    obj.save()
-
-            start_or_advance_after_creation(process)
-            messages.success(request, f"Заявка создана: #{process.pk}")
-            return redirect("publications:process_detail", pk=process.pk)
+            try:
+                with transaction.atomic():
+                    process = p_form.save(commit=False)
+                    process.author = request.user
+                    process.save()
+
+                    # docs
+                    docs = d_form.save(commit=False)
+                    docs.process = process
+                    docs.save()
+
+                    # coauthors
+                    for f in formset:
+                        if f.cleaned_data and not f.cleaned_data.get("DELETE", False):
+                            obj = f.save(commit=False)
+                            obj.process = process
+                            obj.save()
+            except UploadError as exc:
+                messages.error(request, str(exc))
+            else:
+                start_or_advance_after_creation(process)
+                messages.success(request, f"Заявка создана: #{process.pk}")
+                return redirect("publications:process_detail", pk=process.pk)
     else:
         p_form = ProcessCreateForm()
-        d_form = DocumentsForm()
+        d_form = DocumentsForm(user=request.user)
         formset = CoAuthorFormSet(queryset=CoAuthor.objects.none())
 
     templates = PublicationTemplate.objects.filter(department=request.user.department).order_by("name")
@@ -118,13 +211,39 @@ def process_create(request):
     )
 
 
+def _check_process_access(user, process: Process):
+    if user.role == User.Role.AUTHOR and process.author_id != user.pk and not user.is_superuser:
+        raise Http404()
+
+
+def _detail_context(request, process, **extra) -> dict:
+    """
+    Контекст карточки заявки: история файлов, а проверяющим — ещё и что изменилось
+    в последней версии (diff считается один раз и кэшируется в DocumentVersion).
+    """
+    documents = getattr(process, "documents", None)
+    history = []
+    if documents is not None:
+        history = document_history(documents, with_diff=request.user.role != User.Role.AUTHOR)
+    return {"process": process, "document_history": history, **extra}
+
+
+def _detail_last_modified(request, pk: int):
+    # документы, соавторы (signals.touch_process) и вердикты рецензентов
+    # (services.reviewer_submit_many) при изменении тоже сдвигают Process.updated_at
+    row = Process.objects.filter(pk=pk).values_list("updated_at", "author_id").first()
+    if row is None or (request.user.role == User.Role.AUTHOR and row[1] != request.user.pk):
+        return None
+    return row[0]
+
+
 @login_required
+@conditional_page(_detail_last_modified)
 def process_detail(request, pk: int):
-    process = get_object_or_404(Process, pk=pk)
+    process = get_process_aggregate(pk)
 
     # access control:
-    if request.user.role == User.Role.AUTHOR and process.author != request.user and not request.user.is_superuser:
-        raise Http404()
+    _check_process_access(request.user, process)
 
     # Actions by author: resubmit after fixes
     if request.method == "POST" and request.user.role == User.Role.AUTHOR:
@@ -140,16 +259,45 @@ def process_detail(request, pk: int):
             messages.success(request, "Повторно отправлено в ОЭК.")
             return redirect("publications:process_detail", pk=process.pk)
 
-    return render(request, "publications/process_detail.html", {"process": process})
+    return render(request, "publications/process_detail.html", _detail_context(request, process))
 
 
 @login_required
 def template_download(request, pk: int):
     tpl = get_object_or_404(PublicationTemplate, pk=pk)
-    if not tpl.file:
+    return serve_file(request, tpl.file, as_attachment=True)
+
+
+DOCUMENT_FIELDS = ("article_file", "bibliography_file", "filled_template_file")
+
+
+@login_required
+def process_document(request, pk: int, field: str):
+    if field not in DOCUMENT_FIELDS:
+        raise Http404()
+    process = get_object_or_404(Process.objects.select_related("documents"), pk=pk)
+    _check_process_access(request.user, process)
+    documents = getattr(process, "documents", None)
+    if documents is None:
         raise Http404()
+    return serve_file(request, getattr(documents, field), as_attachment=True)
 
-    return FileResponse(tpl.file.open("rb"), as_attachment=True, filename=tpl.file.name.split("/")[-1])
+
+@login_required
+def document_version_download(request, pk: int, version_pk: int):
+    version = get_object_or_404(
+        DocumentVersion.objects.select_related("documents__process").defer("text", "diff"),
+        pk=version_pk, documents__process_id=pk,
+    )
+    _check_process_access(request.user, version.documents.process)
+    return serve_file(request, version.file, as_attachment=True)
+
+
+@login_required
+def coauthor_consent_download(request, process_pk: int, coauthor_pk: int):
+    coauthor = get_object_or_404(CoAuthor.objects.select_related("process"), pk=coauthor_pk, process_id=process_pk)
+    _check_process_access(request.user, coauthor.process)
+    return serve_file(request, coauthor.consent_file, as_attachment=True)
 
 
 @login_required
@@ -176,13 +324,16 @@ def upload_coauthor_consent(request, process_pk: int, coauthor_pk: int):
 
 @role_required(User.Role.LIBRARY_HEAD)
 def library_tasks(request):
-    processes = Process.objects.filter(status=Process.Status.LIBRARY_REVIEW).order_by("created_at")
-    return render(request, "publications/library_tasks.html", {"processes": processes})
+    queue_html = queues.status_queue("tasks", Process.Status.LIBRARY_REVIEW, lambda: _render_queue(
+        "library_queue.html",
+        Process.objects.filter(status=Process.Status.LIBRARY_REVIEW).select_related("author").order_by("created_at"),
+    ))
+    return render(request, "publications/library_tasks.html", {"queue_html": queue_html, "batch_form": BatchDecisionForm()})
 
 
 @role_required(User.Role.LIBRARY_HEAD)
 def library_decide(request, pk: int):
-    process = get_object_or_404(Process, pk=pk)
+    process = get_process_aggregate(pk)
 
     if process.status != Process.Status.LIBRARY_REVIEW:
         messages.warning(request, "Эта заявка сейчас не на этапе библиотеки.")
@@ -201,25 +352,118 @@ def library_decide(request, pk: int):
                 messages.warning(request, "Выберите 'Согласовано' или 'Отклонено'.")
                 return redirect("publications:library_decide", pk=process.pk)
 
-            library_apply_decision(process, approved=approved, comment=obj.comment, librarian=request.user)
-            messages.success(request, "Решение сохранено.")
+            if library_apply_decision(process, approved=approved, comment=obj.comment, librarian=request.user):
+                messages.success(request, "Решение сохранено.")
+            else:
+                messages.warning(request, "Заявка уже ушла с этапа библиотеки, решение не применено.")
             return redirect("publications:library_tasks")
     else:
         form = LibraryDecisionForm(instance=ld)
 
-    return render(request, "publications/process_detail.html", {"process": process, "library_form": form})
+    return render(request, "publications/process_detail.html", _detail_context(request, process, library_form=form))
+
+
+def _render_queue(template: str, items) -> str:
+    """
+    HTML списка очереди для кэша queues; "" — очередь пуста.
+    Рендерится без request: csrf-токен и формы остаются в шаблоне страницы.
+    """
+    items = list(items)
+    if not items:
+        return ""
+    return render_to_string(f"publications/partials/{template}", {"items": items})
+
+
+def _selected_ids(request) -> list:
+    return list(dict.fromkeys(int(v) for v in request.POST.getlist("selected") if v.isdigit()))
+
+
+def _missing(ids, processes) -> list:
+    # отмеченные, но не найденные (удалены) заявки — тоже в отчёт
+    found = {p.pk for p in processes}
+    return [BatchResult(pk, False, "") for pk in ids if pk not in found]
+
+
+def _missing_assignments(user, ids, assignments) -> list:
+    # отмеченные назначения, которые не попали в пакет: рецензия уже отправлена или назначения нет
+    found = {a.pk for a in assignments}
+    rest = [pk for pk in ids if pk not in found]
+    decided = {
+        a.pk: a for a in ReviewerAssignment.objects.filter(pk__in=rest, reviewer=user).select_related("process")
+    }
+    return [
+        BatchResult(decided[pk].process_id, False, decided[pk].process.status, note="Рецензия уже отправлена")
+        if pk in decided else BatchResult(None, False, "", note=f"Назначение #{pk} не найдено")
+        for pk in rest
+    ]
+
+
+def _render_batch_result(request, title, results, back_url):
+    applied = sum(r.applied for r in results)
+    messages.info(request, f"Применено: {applied} из {len(results)}.")
+    return render(request, "publications/batch_result.html", {"title": title, "results": results, "back_url": back_url})
+
+
+@role_required(User.Role.LIBRARY_HEAD)
+@require_POST
+def library_decide_batch(request):
+    form = BatchDecisionForm(request.POST)
+    ids = _selected_ids(request)
+    if not ids or not form.is_valid():
+        messages.warning(request, "Отметьте заявки и выберите решение.")
+        return redirect("publications:library_tasks")
+
+    processes = list(Process.objects.filter(pk__in=ids).order_by("pk"))
+    comments = form.comments(request.POST, ids)
+    results = library_apply_decisions(
+        [(p, comments[p.pk]) for p in processes], approved=form.approved, librarian=request.user,
+    )
+    return _render_batch_result(
+        request, "Пакетное решение библиотеки", results + _missing(ids, processes), reverse("publications:library_tasks"),
+    )
 
 
 @role_required(User.Role.REVIEWER)
 def reviewer_tasks(request):
-    assignments = ReviewerAssignment.objects.filter(reviewer=request.user).order_by("-process__created_at")
-    return render(request, "publications/reviewer_tasks.html", {"assignments": assignments})
+    queue_html = queues.reviewer_queue(request.user.pk, lambda: _render_queue(
+        "reviewer_queue.html",
+        ReviewerAssignment.objects.filter(reviewer=request.user).select_related("process").order_by("-process__created_at"),
+    ))
+    return render(request, "publications/reviewer_tasks.html", {"queue_html": queue_html, "batch_form": BatchVerdictForm()})
+
+
+@role_required(User.Role.REVIEWER)
+@require_POST
+def reviewer_submit_batch(request):
+    """
+    Один вердикт по нескольким назначениям текущего рецензента (отмечаются id назначений).
+    """
+    form = BatchVerdictForm(request.POST)
+    ids = _selected_ids(request)
+    if not ids or not form.is_valid():
+        messages.warning(request, "Отметьте заявки и выберите вердикт.")
+        return redirect("publications:reviewer_tasks")
+
+    assignments = list(
+        ReviewerAssignment.objects.select_related("process", "reviewer")
+        .filter(pk__in=ids, reviewer=request.user, verdict=ReviewerAssignment.Verdict.PENDING)
+        .order_by("process_id")
+    )
+    comments = form.comments(request.POST, ids)
+    results = reviewer_submit_many([(a, comments[a.pk]) for a in assignments], verdict=form.cleaned_data["decision"])
+    return _render_batch_result(
+        request, "Пакетная отправка рецензий", results + _missing_assignments(request.user, ids, assignments),
+        reverse("publications:reviewer_tasks"),
+    )
 
 
 @role_required(User.Role.REVIEWER)
 def reviewer_submit_view(request, assignment_pk: int):
-    assignment = get_object_or_404(ReviewerAssignment, pk=assignment_pk, reviewer=request.user)
-    process = assignment.process
+    assignment = get_object_or_404(
+        ReviewerAssignment.objects.select_related("reviewer"), pk=assignment_pk, reviewer=request.user
+    )
+    process = get_process_aggregate(assignment.process_id)
+    assignment.process = process
 
     if process.status != Process.Status.INTERNAL_REVIEW:
         messages.warning(request, "Эта заявка сейчас не на этапе активного рецензирования.")
@@ -232,24 +476,52 @@ def reviewer_submit_view(request, assignment_pk: int):
             if a.verdict == a.Verdict.PENDING:
                 messages.warning(request, "Выберите итоговый вердикт.")
                 return redirect("publications:reviewer_submit", assignment_pk=assignment.pk)
-            reviewer_submit(assignment, verdict=a.verdict, comment=a.comment)
-            messages.success(request, "Рецензия отправлена.")
+            if reviewer_submit(assignment, verdict=a.verdict, comment=a.comment):
+                messages.success(request, "Рецензия отправлена.")
+            else:
+                messages.warning(request, "Этап рецензирования по заявке уже завершён, рецензия не принята.")
             return redirect("publications:reviewer_tasks")
     else:
         form = ReviewerVerdictForm(instance=assignment)
 
-    return render(request, "publications/process_detail.html", {"process": process, "reviewer_form": form, "assignment": assignment})
+    return render(request, "publications/process_detail.html", _detail_context(request, process, reviewer_form=form, assignment=assignment))
 
 
 @role_required(User.Role.OEK)
 def oek_tasks(request):
-    processes = Process.objects.filter(status=Process.Status.OEK_REVIEW).order_by("created_at")
-    return render(request, "publications/oek_tasks.html", {"processes": processes})
+    queue_html = queues.status_queue("tasks", Process.Status.OEK_REVIEW, lambda: _render_queue(
+        "oek_queue.html",
+        Process.objects.filter(status=Process.Status.OEK_REVIEW).select_related("author").order_by("created_at"),
+    ))
+    return render(request, "publications/oek_tasks.html", {"queue_html": queue_html, "batch_form": OEKBatchDecisionForm()})
+
+
+@role_required(User.Role.OEK)
+@require_POST
+def oek_decide_batch(request):
+    form = OEKBatchDecisionForm(request.POST)
+    ids = _selected_ids(request)
+    if not ids or not form.is_valid():
+        messages.warning(request, "Отметьте заявки и выберите решение.")
+        return redirect("publications:oek_tasks")
+
+    processes = list(Process.objects.filter(pk__in=ids).order_by("pk"))
+    comments = form.comments(request.POST, ids)
+    results = oek_apply_decisions(
+        [(p, comments[p.pk]) for p in processes],
+        approved=form.approved,
+        oek_user=request.user,
+        defense_datetime=form.cleaned_data.get("defense_datetime"),
+        defense_room=form.cleaned_data.get("defense_room", ""),
+    )
+    return _render_batch_result(
+        request, "Пакетное решение ОЭК", results + _missing(ids, processes), reverse("publications:oek_tasks"),
+    )
 
 
 @role_required(User.Role.OEK)
 def oek_decide_view(request, pk: int):
-    process = get_object_or_404(Process, pk=pk)
+    process = get_process_aggregate(pk)
 
     if process.status != Process.Status.OEK_REVIEW:
         messages.warning(request, "Эта заявка сейчас не на этапе ОЭК.")
@@ -270,7 +542,7 @@ def oek_decide_view(request, pk: int):
             defense_datetime = form.cleaned_data.get("defense_datetime")
             defense_room = form.cleaned_data.get("defense_room", "")
 
-            oek_apply_decision(
+            applied = oek_apply_decision(
                 process,
                 approved=approved,
                 comment=obj.comment,
@@ -278,14 +550,26 @@ def oek_decide_view(request, pk: int):
                 defense_datetime=defense_datetime,
                 defense_room=defense_room,
             )
-            messages.success(request, "Решение ОЭК сохранено.")
+            if applied:
+                messages.success(request, "Решение ОЭК сохранено.")
+            else:
+                messages.warning(request, "Заявка уже ушла с этапа ОЭК, решение не применено.")
             return redirect("publications:oek_tasks")
     else:
         form = OEKDecisionForm(instance=od, initial={
             "defense_room": process.defense_room,
         })
 
-    return render(request, "publications/process_detail.html", {"process": process, "oek_form": form})
+    return render(request, "publications/process_detail.html", _detail_context(request, process, oek_form=form))
+
+def _lock_in_status(process: Process, status: str) -> bool:
+    """
+    Блокирует строку заявки до конца транзакции и проверяет, что она всё ещё в status.
+    Двойная отправка формы ждёт первую и видит уже новый статус, а не пишет
+    ту же версию файла второй раз (uniq_document_version).
+    """
+    return Process.objects.select_for_update().filter(pk=process.pk, status=status).exists()
+
 
 @login_required
 def reviewer_rework_view(request, pk: int):
@@ -298,14 +582,22 @@ def reviewer_rework_view(request, pk: int):
     docs = process.documents
 
     if request.method == "POST":
-        form = ReviewerReworkUploadForm(request.POST, request.FILES, instance=docs)
+        form = ReviewerReworkUploadForm(request.POST, request.FILES, instance=docs, user=request.user)
         if form.is_valid():
-            form.save()
-            author_resubmit_after_internal_fix(process)
-            messages.success(request, "Файлы обновлены и заявка отправлена на повторное рецензирование.")
-            return redirect("publications:process_detail", pk=process.pk)
+            try:
+                with transaction.atomic():
+                    if not _lock_in_status(process, Process.Status.INTERNAL_REVIEW_NEEDS_FIX):
+                        messages.warning(request, "Доработанные файлы уже отправлены.")
+                        return redirect("publications:process_detail", pk=process.pk)
+                    form.save()
+                    author_resubmit_after_internal_fix(process)
+            except UploadError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, "Файлы обновлены и заявка отправлена на повторное рецензирование.")
+                return redirect("publications:process_detail", pk=process.pk)
     else:
-        form = ReviewerReworkUploadForm(instance=docs)
+        form = ReviewerReworkUploadForm(instance=docs, user=request.user)
 
     return render(request, "publications/reviewer_rework.html", {"process": process, "form": form})
 
@@ -321,14 +613,97 @@ def bibliography_rework_view(request, pk: int):
     docs = process.documents
 
     if request.method == "POST":
-        form = BibliographyReworkUploadForm(request.POST, request.FILES, instance=docs)
+        form = BibliographyReworkUploadForm(request.POST, request.FILES, instance=docs, user=request.user)
         if form.is_valid():
-            form.save()
-            # вызовем сервис, который вернёт в LIBRARY_REVIEW и создаст задачу библиотеке
-            author_resubmit_after_library_fix(process)
-            messages.success(request, "Список литературы обновлён и отправлен на повторную проверку библиотеки.")
-            return redirect("publications:process_detail", pk=process.pk)
+            try:
+                with transaction.atomic():
+                    if not _lock_in_status(process, Process.Status.LIBRARY_NEEDS_FIX):
+                        messages.warning(request, "Исправленный список литературы уже отправлен.")
+                        return redirect("publications:process_detail", pk=process.pk)
+                    form.save()
+                    # вызовем сервис, который вернёт в LIBRARY_REVIEW и создаст задачу библиотеке
+                    author_resubmit_after_library_fix(process)
+            except UploadError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, "Список литературы обновлён и отправлен на повторную проверку библиотеки.")
+                return redirect("publications:process_detail", pk=process.pk)
     else:
-        form = BibliographyReworkUploadForm(instance=docs)
+        form = BibliographyReworkUploadForm(instance=docs, user=request.user)
+
+    return render(request, "publications/bibliography_rework.html", {"process": process, "form": form})
+
+
+# --- докачиваемая загрузка файлов (JSON API для static/js/chunked_upload.js) ---
+
+def _upload_payload(session: UploadSession) -> dict:
+    return {
+        "id": str(session.pk),
+        "field": session.field,
+        "status": session.status,
+        "size": session.size,
+        "chunk_size": settings.UPLOAD_CHUNK_SIZE,
+        "parts": list(session.parts.values_list("index", flat=True)),
+    }
+
+
+def _json_body(request) -> dict:
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        raise UploadError("Некорректный JSON.")
+    if not isinstance(data, dict):
+        raise UploadError("Некорректный JSON.")
+    return data
+
 
-    return render(request, "publications/bibliography_rework.html", {"process": process, "form": form})
\ No newline at end of file
+@login_required
+@require_POST
+def upload_start(request):
+    try:
+        data = _json_body(request)
+        session = start_upload(
+            request.user, str(data.get("field", "")), str(data.get("filename", "")),
+            int(data.get("size") or 0), str(data.get("sha256", "")),
+        )
+    except (UploadError, ValueError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(_upload_payload(session), status=201)
+
+
+@login_required
+@require_GET
+def upload_status(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    return JsonResponse(_upload_payload(session))
+
+
+@login_required
+@require_http_methods(["PUT"])
+def upload_part(request, upload_id, index: int):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    try:
+        part = store_part(session, index, request, request.headers.get("X-Chunk-SHA256", ""))
+    except UploadError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({"index": part.index, "size": part.size, "sha256": part.sha256})
+
+
+@login_required
+@require_POST
+def upload_complete(request, upload_id):
+    """
+    Склеивает части. Если передан {"process": id} — сразу прикрепляет файл к заявке,
+    иначе id загрузки отправляется вместе с формой (<поле>_upload).
+    """
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    try:
+        data = _json_body(request)
+        session = complete_upload(session)
+        if data.get("process"):
+            process = get_object_or_404(Process, pk=int(data["process"]), author=request.user)
+            attach_upload(session, process)
+            session.refresh_from_db()
+    except (UploadError, ValueError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(_upload_payload(session))
@@ -0,0 +1,431 @@
+"""
+Табличный движок переходов по Process.Status.
+
+Каждый переход — строка таблицы TRANSITIONS: событие, исходный и целевой статус,
+необязательный guard, побочные эффекты и уведомления. При импорте таблица
+проверяется и компилируется в словарь (событие, статус) -> кандидаты, так что
+выбор перехода — один lookup без запросов к БД. Уведомления всех переходов
+одного вызова (в т.ч. пакетного fire_many) уходят одним notify_bulk.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.directory import directory
+from apps.notifications.utils import notify_bulk
+from . import queues
+from .models import Process, LibraryDecision, ReviewerAssignment, OEKDecision
+from .selectors import least_loaded_reviewer_ids
+
+User = get_user_model()
+
+S = Process.Status
+# статусы до рецензирования: у таких заявок ещё нет назначений рецензентам
+BEFORE_REVIEW = {S.DRAFT, S.WAITING_COAUTHOR_CONSENTS, S.LIBRARY_REVIEW, S.LIBRARY_NEEDS_FIX}
+PROCESS_LINK = "/process/{pk}/"
+
+
+@dataclass
+class TransitionContext:
+    process: Process
+    params: dict
+    # кэш справочных выборок, общий для всех переходов одного пакета
+    lookups: dict
+    notices: list = field(default_factory=list)
+    reviewer_ids: list | None = None
+
+    def lookup(self, key, loader):
+        if key not in self.lookups:
+            self.lookups[key] = loader()
+        return self.lookups[key]
+
+    def verdict_counts(self) -> Counter:
+        return self.lookup(
+            ("verdicts", self.process.pk),
+            lambda: Counter(self.process.review_assignments.values_list("verdict", flat=True)),
+        )
+
+
+# --- получатели -------------------------------------------------------------
+
+def author(ctx):
+    return [ctx.process.author_id]
+
+
+def first_with_role(role):
+    def resolve(ctx):
+        uid = directory.first_id(role)
+        return [uid] if uid else []
+    return resolve
+
+
+def all_with_role(role):
+    def resolve(ctx):
+        return directory.user_ids(role)
+    return resolve
+
+
+def assigned_reviewers(ctx):
+    if ctx.reviewer_ids is None:
+        ctx.reviewer_ids = list(ctx.process.review_assignments.values_list("reviewer_id", flat=True))
+    return ctx.reviewer_ids
+
+
+@dataclass(frozen=True)
+class Notice:
+    recipients: Callable
+    message: str  # форматируется с pk=<id заявки> и параметрами вызова
+    link: str = PROCESS_LINK
+    attach_process: bool = True
+
+
+@dataclass(frozen=True)
+class Transition:
+    event: str
+    source: str
+    target: str
+    guard: Callable | None = None
+    effects: tuple = ()
+    notices: tuple = ()
+    # поля заявки, которые меняют эффекты (сохраняются вместе со статусом)
+    fields: tuple = ()
+
+
+# --- guards -----------------------------------------------------------------
+
+def has_coauthors(ctx):
+    return ctx.process.coauthors.exists()
+
+
+def no_coauthors(ctx):
+    return not has_coauthors(ctx)
+
+
+def all_coauthor_consents_uploaded(ctx):
+    return all(bool(c.consent_file) for c in ctx.process.coauthors.all())
+
+
+def is_mifi(ctx):
+    return ctx.process.is_mifi
+
+
+def not_mifi(ctx):
+    return not ctx.process.is_mifi
+
+
+def reviewers_reject(ctx):
+    # rule: if 2 of 3 NOT -> rejected
+    return ctx.verdict_counts()[ReviewerAssignment.Verdict.NOT_RECOMMEND] >= 2
+
+
+def reviewers_request_fix(ctx):
+    return ctx.verdict_counts()[ReviewerAssignment.Verdict.RECOMMEND_AFTER_FIX] >= 1
+
+
+def reviewers_recommend(ctx):
+    return ctx.verdict_counts()[ReviewerAssignment.Verdict.RECOMMEND] >= 2
+
+
+# --- эффекты ----------------------------------------------------------------
+# Эффект получает список контекстов всех заявок пакета, прошедших один и тот же
+# переход, и по возможности работает с ними одним запросом.
+
+def _upsert_decisions(model, ctxs, **values):
+    """
+    INSERT ... ON CONFLICT (process) DO UPDATE: решения всех заявок пакета одним запросом.
+    Значение-функция вычисляется для каждой заявки отдельно.
+    """
+    model.objects.bulk_create(
+        [model(process=ctx.process, **{k: v(ctx) if callable(v) else v for k, v in values.items()}) for ctx in ctxs],
+        update_conflicts=True,
+        unique_fields=["process"],
+        update_fields=list(values),
+    )
+
+
+def open_library_decision(ctxs):
+    LibraryDecision.objects.bulk_create([LibraryDecision(process=ctx.process) for ctx in ctxs], ignore_conflicts=True)
+
+
+def reset_library_decision(ctxs):
+    # сбрасываем решение библиотеки в ожидание
+    _upsert_decisions(LibraryDecision, ctxs, decision=LibraryDecision.Decision.PENDING, decided_at=None)
+
+
+def record_library_decision(decision):
+    def effect(ctxs):
+        _upsert_decisions(
+            LibraryDecision, ctxs,
+            librarian=lambda ctx: ctx.params.get("librarian"),
+            comment=lambda ctx: ctx.params.get("comment", ""),
+            decided_at=timezone.now(),
+            decision=decision,
+        )
+    return effect
+
+
+def assign_reviewers(ctxs):
+    # по одной заявке: загрузка рецензентов меняется после каждого назначения
+    for ctx in ctxs:
+        # если подходящих рецензентов меньше трёх — назначаем всех подходящих
+        chosen = least_loaded_reviewer_ids(ctx.process)
+        ReviewerAssignment.objects.bulk_create(
+            [ReviewerAssignment(process=ctx.process, reviewer_id=r) for r in chosen],
+            ignore_conflicts=True,
+        )
+        ctx.reviewer_ids = list(chosen)
+
+
+def reset_reviewers(ctxs):
+    # set all to pending, clear decided_at/comment/verdict
+    ReviewerAssignment.objects.filter(process__in=[ctx.process.pk for ctx in ctxs]).update(
+        verdict=ReviewerAssignment.Verdict.PENDING, comment="", decided_at=None,
+    )
+
+
+def open_oek_decision(ctxs):
+    OEKDecision.objects.bulk_create([OEKDecision(process=ctx.process) for ctx in ctxs], ignore_conflicts=True)
+
+
+def record_oek_decision(decision):
+    def effect(ctxs):
+        _upsert_decisions(
+            OEKDecision, ctxs,
+            oek_user=lambda ctx: ctx.params.get("oek_user"),
+            comment=lambda ctx: ctx.params.get("comment", ""),
+            decided_at=timezone.now(),
+            decision=decision,
+        )
+    return effect
+
+
+def schedule_defense(ctxs):
+    for ctx in ctxs:
+        if ctx.params.get("defense_datetime"):
+            ctx.process.defense_datetime = ctx.params["defense_datetime"]
+        if ctx.params.get("defense_room") is not None:
+            ctx.process.defense_room = ctx.params["defense_room"]
+
+
+# --- общие фрагменты таблицы -----------------------------------------------
+
+TO_LIBRARY = dict(
+    effects=(open_library_decision,),
+    notices=(
+        Notice(first_with_role(User.Role.LIBRARY_HEAD), "Новая задача: проверить литературу по заявке #{pk}",
+               link="/tasks/library/", attach_process=False),
+        Notice(author, "Заявка #{pk} отправлена в библиотеку на проверку."),
+    ),
+)
+
+TO_OEK = dict(
+    effects=(open_oek_decision,),
+    notices=(
+        Notice(first_with_role(User.Role.OEK), "Новая задача ОЭК: проверить заявку #{pk}",
+               link="/tasks/oek/", attach_process=False),
+        Notice(author, "Заявка #{pk} отправлена в ОЭК."),
+    ),
+)
+
+LIBRARY_APPROVED = Notice(author, "Библиотека согласовала заявку #{pk}.")
+
+
+TRANSITIONS = (
+    # создание заявки
+    Transition("submit", S.DRAFT, S.WAITING_COAUTHOR_CONSENTS, guard=has_coauthors, notices=(
+        Notice(author, "Заявка #{pk}: загрузите согласия соавторов."),
+    )),
+    Transition("submit", S.DRAFT, S.LIBRARY_REVIEW, guard=no_coauthors, **TO_LIBRARY),
+    Transition("consents_uploaded", S.WAITING_COAUTHOR_CONSENTS, S.LIBRARY_REVIEW,
+               guard=all_coauthor_consents_uploaded, **TO_LIBRARY),
+
+    # библиотека
+    Transition("library_approve", S.LIBRARY_REVIEW, S.INTERNAL_REVIEW, guard=is_mifi,
+               effects=(record_library_decision(LibraryDecision.Decision.APPROVED), assign_reviewers),
+               notices=(
+                   Notice(assigned_reviewers, "Новая рецензия: заявка #{pk}", link="/tasks/reviewer/", attach_process=False),
+                   Notice(author, "Заявка #{pk} отправлена на внутреннее рецензирование."),
+                   LIBRARY_APPROVED,
+               )),
+    Transition("library_approve", S.LIBRARY_REVIEW, S.OEK_REVIEW, guard=not_mifi,
+               effects=(record_library_decision(LibraryDecision.Decision.APPROVED), *TO_OEK["effects"]),
+               notices=(*TO_OEK["notices"], LIBRARY_APPROVED)),
+    Transition("library_reject", S.LIBRARY_REVIEW, S.LIBRARY_NEEDS_FIX,
+               effects=(record_library_decision(LibraryDecision.Decision.REJECTED),),
+               notices=(Notice(author, "Библиотека отклонила заявку #{pk}. Комментарий: {comment}"),)),
+    Transition("resubmit_library", S.LIBRARY_NEEDS_FIX, S.LIBRARY_REVIEW,
+               effects=(reset_library_decision,),
+               notices=(
+                   Notice(first_with_role(User.Role.LIBRARY_HEAD), "Повторная проверка: литература по заявке #{pk}",
+                          link="/tasks/library/", attach_process=False),
+                   Notice(author, "Заявка #{pk} повторно отправлена в библиотеку на проверку."),
+               )),
+
+    # внутреннее рецензирование: итог подводится, когда не осталось PENDING
+    Transition("review_complete", S.INTERNAL_REVIEW, S.REJECTED, guard=reviewers_reject, notices=(
+        Notice(author, "Заявка #{pk} отклонена по результатам рецензирования (>=2 'Не рекомендовать')."),
+    )),
+    Transition("review_complete", S.INTERNAL_REVIEW, S.INTERNAL_REVIEW_NEEDS_FIX, guard=reviewers_request_fix, notices=(
+        Notice(author, "Заявка #{pk}: требуется исправление по рецензиям и повторная отправка."),
+    )),
+    Transition("review_complete", S.INTERNAL_REVIEW, S.OEK_REVIEW, guard=reviewers_recommend, **TO_OEK),
+    Transition("review_complete", S.INTERNAL_REVIEW, S.INTERNAL_REVIEW_NEEDS_FIX, notices=(
+        Notice(author, "Заявка #{pk}: требуется уточнение/исправление по рецензиям."),
+    )),
+    Transition("resubmit_internal", S.INTERNAL_REVIEW_NEEDS_FIX, S.INTERNAL_REVIEW,
+               effects=(reset_reviewers,),
+               notices=(
+                   Notice(assigned_reviewers, "Повторная рецензия: заявка #{pk}", link="/tasks/reviewer/", attach_process=False),
+                   Notice(author, "Заявка #{pk} отправлена на повторное рецензирование."),
+               )),
+
+    # ОЭК
+    Transition("oek_approve", S.OEK_REVIEW, S.READY_FOR_DEFENSE,
+               effects=(record_oek_decision(OEKDecision.Decision.APPROVED), schedule_defense),
+               fields=("defense_datetime", "defense_room"),
+               notices=(
+                   Notice(author, "ОЭК согласовал заявку #{pk}. Статус: готово к защите."),
+                   Notice(all_with_role(User.Role.COMMISSION), "Новая заявка готова к защите: #{pk}", attach_process=False),
+               )),
+    Transition("oek_reject", S.OEK_REVIEW, S.OEK_NEEDS_FIX,
+               effects=(record_oek_decision(OEKDecision.Decision.REJECTED),),
+               notices=(Notice(author, "ОЭК отклонил заявку #{pk}. Комментарий: {comment}"),)),
+    Transition("resubmit_oek", S.OEK_NEEDS_FIX, S.OEK_REVIEW, notices=(
+        Notice(first_with_role(User.Role.OEK), "Повторная проверка ОЭК: заявка #{pk}", link="/tasks/oek/", attach_process=False),
+        Notice(author, "Заявка #{pk} повторно отправлена в ОЭК."),
+    )),
+)
+
+
+def compile_transitions(transitions) -> dict:
+    """
+    (событие, исходный статус) -> кортеж кандидатов в порядке объявления.
+    Проверяет статусы и то, что безусловный переход стоит последним
+    (иначе кандидаты после него недостижимы).
+    """
+    statuses = set(S.values)
+    table = {}
+    for t in transitions:
+        if t.source not in statuses or t.target not in statuses:
+            raise ImproperlyConfigured(f"Workflow: unknown status in {t.event}: {t.source} -> {t.target}")
+        candidates = table.setdefault((t.event, t.source), [])
+        if candidates and candidates[-1].guard is None:
+            raise ImproperlyConfigured(f"Workflow: unreachable transition {t.event}: {t.source} -> {t.target}")
+        candidates.append(t)
+    return {key: tuple(candidates) for key, candidates in table.items()}
+
+
+TABLE = compile_transitions(TRANSITIONS)
+EVENTS = frozenset(event for event, _ in TABLE)
+
+
+def lock_processes(processes):
+    """
+    SELECT ... FOR UPDATE по строкам заявок (в порядке pk — без взаимоблокировок);
+    актуальные статусы переносятся в объекты. Разные заявки друг друга не ждут.
+    """
+    by_pk = {p.pk: p for p in processes}
+    rows = Process.objects.select_for_update().filter(pk__in=by_pk).order_by("pk").values_list("pk", "status")
+    for pk, status in rows:
+        by_pk[pk].status = status
+
+
+def apply_locked(items, event: str, lookups: dict, notices: list) -> list:
+    """
+    Применяет событие к уже заблокированным заявкам; items — пары (заявка, параметры).
+    Заявки, выбравшие один переход, обрабатываются вместе: эффекты получают их
+    списком, статус ставится одним UPDATE. Уведомления добавляются в notices.
+    Возвращает список bool в порядке items.
+    """
+    if event not in EVENTS:
+        raise ValueError(f"Unknown workflow event: {event}")
+
+    groups = {}  # id(перехода) -> (переход, [контексты])
+    results = []
+    for process, params in items:
+        ctx = TransitionContext(process=process, params=params, lookups=lookups)
+        for t in TABLE.get((event, process.status), ()):
+            if t.guard is None or t.guard(ctx):
+                groups.setdefault(id(t), (t, []))[1].append(ctx)
+                results.append(True)
+                break
+        else:
+            results.append(False)
+
+    now = timezone.now()
+    reviewed = []
+    for t, ctxs in groups.values():
+        for effect in t.effects:
+            effect(ctxs)
+        # очереди исходного и целевого статусов изменились (queues.py)
+        queues.bump_statuses([t.source, t.target])
+        if not {t.source, t.target} <= BEFORE_REVIEW:
+            reviewed += [ctx.process.pk for ctx in ctxs]
+
+        processes = [ctx.process for ctx in ctxs]
+        for process in processes:
+            process.status = t.target
+            process.updated_at = now
+        if len(processes) == 1:
+            processes[0].save(update_fields=["status", "updated_at", *t.fields])
+        elif t.fields:
+            Process.objects.bulk_update(processes, ["status", "updated_at", *t.fields])
+        else:
+            Process.objects.filter(pk__in=[p.pk for p in processes]).update(status=t.target, updated_at=now)
+
+        for ctx in ctxs:
+            fmt = {**ctx.params, "pk": ctx.process.pk}
+            for n in t.notices:
+                notices.append((
+                    n.recipients(ctx), n.message.format(**fmt), n.link.format(**fmt),
+                    ctx.process if n.attach_process else None,
+                ))
+
+    if reviewed:
+        # в списке рецензента виден статус заявки и сбрасываемые вердикты
+        queues.bump_reviewers(
+            ReviewerAssignment.objects.filter(process__in=reviewed).values_list("reviewer_id", flat=True)
+        )
+    return results
+
+
+def fire_locked(process: Process, event: str, params: dict, lookups: dict, notices: list) -> bool:
+    return apply_locked([(process, params)], event, lookups, notices)[0]
+
+
+def fire(process: Process, event: str, **params) -> bool:
+    """
+    Событие для одной заявки в транзакции под блокировкой строки.
+    False — из текущего статуса такого перехода нет (или guard не пропустил).
+    """
+    return fire_batch([(process, {})], event, **params)[0]
+
+
+def fire_batch(items, event: str, **params) -> list:
+    """
+    Одно событие для многих заявок с индивидуальными параметрами
+    (items — пары (заявка, dict), общие параметры — в **params): одна транзакция,
+    одна блокировка всех строк, set-based запись и одна пакетная рассылка.
+    Возвращает список bool в порядке items.
+    """
+    items = [(process, {**params, **item_params}) for process, item_params in items]
+    notices = []
+    with transaction.atomic():
+        lock_processes([process for process, _ in items])
+        results = apply_locked(items, event, {}, notices)
+        notify_bulk(notices)
+    return results
+
+
+def fire_many(processes, event: str, **params) -> list:
+    """
+    Одно событие с общими параметрами для многих заявок. Возвращает применённые заявки.
+    """
+    processes = list(processes)
+    results = fire_batch([(p, {}) for p in processes], event, **params)
+    return [p for p, ok in zip(processes, results) if ok]
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,14 +20,18 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # local apps
     "apps.accounts",
     "apps.publications",
     "apps.notifications",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    # первым: время и SQL всего запроса, включая сессию и аутентификацию
+    "apps.monitoring.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
 
@@ -100,8 +105,97 @@ LOGOUT_REDIRECT_URL = "accounts:login"
 
 AUTH_USER_MODEL = "accounts.User"
 
+# пользователь для AuthenticationMiddleware берётся из кэша (apps.accounts.backends)
+AUTHENTICATION_BACKENDS = ["apps.accounts.backends.CachedModelBackend"]
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+
+# Кэш: locmem — один процесс; file — несколько воркеров одного узла (общий каталог);
+# redis — несколько узлов и отдельный воркер уведомлений (сервис cache в docker-compose).
+# Инвалидация кэша пользователей и версии очередей видны всем процессам только для
+# file и redis, поэтому при нескольких воркерах gunicorn (WEB_CONCURRENCY,
+# docker/entrypoint.sh) по умолчанию file, а locmem запрещён.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file" if WEB_CONCURRENCY > 1 else "locmem")
+if CACHE_BACKEND == "locmem" and WEB_CONCURRENCY > 1:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND=locmem не годится для {WEB_CONCURRENCY} воркеров: "
+        "сбросы кэша не дойдут до остальных процессов. Используйте file или redis."
+    )
+_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "oek"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", "/tmp/oek_cache"),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://cache:6379/0"),
+}
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.getenv("CACHE_LOCATION", _CACHE_BACKENDS[CACHE_BACKEND][1]),
+        "KEY_PREFIX": "oek",
+        "TIMEOUT": 300,
+    }
+}
+
+# сессия читается из кэша, в БД пишется только при изменении
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 # Whitenoise static files compression (optional)
+# Загруженные файлы: по умолчанию с дедупликацией по sha256 (apps.publications.storage,
+# чистка — manage.py gc_blobs); django.core.files.storage.FileSystemStorage — без неё
 STORAGES = {
-    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "default": {
+        "BACKEND": os.getenv("MEDIA_STORAGE_BACKEND", "apps.publications.storage.ContentAddressedStorage"),
+    },
     "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
-}
\ No newline at end of file
+}
+
+# Отдача документов после проверки прав (apps.publications.sendfile):
+# "" — Django/gunicorn (os.sendfile), "nginx" — X-Accel-Redirect, "xsendfile" — X-Sendfile
+DOCUMENTS_SENDFILE_BACKEND = os.getenv("DOCUMENTS_SENDFILE_BACKEND", "")
+# internal-location nginx, смотрящая в MEDIA_ROOT
+DOCUMENTS_ACCEL_REDIRECT_PREFIX = os.getenv("DOCUMENTS_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+
+# Докачиваемая загрузка файлов по частям (apps.publications.uploads)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+UPLOAD_MAX_FILE_SIZE = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(512 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "48"))
+
+# Server-Timing и гистограммы по маршрутам (apps.monitoring)
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "1") == "1"
+
+# Кэш справочника ролей (apps.accounts.directory), секунды; сбрасывается сигналами User
+ROLE_DIRECTORY_TTL = int(os.getenv("ROLE_DIRECTORY_TTL", "300"))
+
+# HTML очередей сотрудников (apps.publications.queues), секунды; устаревает по версиям статусов
+QUEUE_CACHE_TTL = int(os.getenv("QUEUE_CACHE_TTL", "600"))
+
+# Размер пачки для notify_many (bulk_create уведомлений при рассылках)
+NOTIFICATIONS_BULK_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_BULK_BATCH_SIZE", "500"))
+
+# Доставка уведомлений через транзакционный outbox (manage.py run_notification_worker).
+# По умолчанию выключено: in-app уведомления пишутся синхронно, как раньше;
+# docker-compose включает его для web, где рядом работает сервис worker.
+NOTIFICATIONS_USE_OUTBOX = os.getenv("NOTIFICATIONS_USE_OUTBOX", "0") == "1"
+NOTIFICATIONS_DELIVERY_CHANNELS = [
+    c.strip() for c in os.getenv("NOTIFICATIONS_DELIVERY_CHANNELS", "inapp").split(",") if c.strip()
+]
+NOTIFICATIONS_CHANNEL_BACKENDS = {
+    "inapp": "apps.notifications.channels.InAppChannel",
+    "file": "apps.notifications.channels.FileSinkChannel",
+}
+NOTIFICATIONS_FILE_SINK_PATH = os.getenv("NOTIFICATIONS_FILE_SINK_PATH", str(BASE_DIR / "notifications_sink.jsonl"))
+NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATIONS_OUTBOX_MAX_ATTEMPTS", "8"))
+NOTIFICATIONS_OUTBOX_RETRY_BASE_SECONDS = 30
+NOTIFICATIONS_OUTBOX_RETRY_MAX_SECONDS = 3600
+# Аренда забранной воркером пачки: не дождались результата — сообщения снова в очереди
+NOTIFICATIONS_OUTBOX_CLAIM_SECONDS = 300
+# Прочитанные уведомления старше стольких дней переносит в архив manage.py archive_notifications
+NOTIFICATIONS_RETENTION_DAYS = int(os.getenv("NOTIFICATIONS_RETENTION_DAYS", "180"))
+
+# Живые уведомления (SSE, apps.notifications.live) отдаёт ASGI-сервис events.
+# URL потока для браузера: по умолчанию тот же origin (прокси ведёт путь на ASGI);
+# если ASGI на другом порту/домене — полный URL, а origin страниц — в *_ORIGINS.
+NOTIFICATIONS_STREAM_URL = os.getenv("NOTIFICATIONS_STREAM_URL", "/notifications/stream/")
+NOTIFICATIONS_STREAM_ORIGINS = [
+    o.strip() for o in os.getenv("NOTIFICATIONS_STREAM_ORIGINS", "").split(",") if o.strip()
+]
+NOTIFICATIONS_STREAM_MAX_SECONDS = int(os.getenv("NOTIFICATIONS_STREAM_MAX_SECONDS", "300"))
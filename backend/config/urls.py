@@ -9,6 +9,7 @@ urlpatterns = [
     path("", include("apps.publications.urls")),
     path("accounts/", include("apps.accounts.urls")),
     path("notifications/", include("apps.notifications.urls")),
+    path("monitoring/", include("apps.monitoring.urls")),
 ]
 
 if settings.DEBUG:
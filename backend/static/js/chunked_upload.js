@@ -0,0 +1,97 @@
+// Докачиваемая загрузка файлов формы частями (API: apps/publications/uploads.py).
+// Каждая часть отправляется с SHA-256; после обрыва повторная отправка формы
+// продолжает с недостающих частей. Без WebCrypto (не https) форма уходит обычным multipart.
+(function () {
+  "use strict";
+  if (!window.fetch || !window.crypto || !window.crypto.subtle) return;
+
+  const MAX_ATTEMPTS = 5;
+
+  function hex(buffer) {
+    return Array.from(new Uint8Array(buffer), (b) => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  async function api(form, url, options) {
+    const token = form.querySelector("[name=csrfmiddlewaretoken]").value;
+    options.headers = Object.assign({ "X-CSRFToken": token }, options.headers || {});
+    options.credentials = "same-origin";
+    const response = await fetch(url, options);
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.error || response.statusText);
+    return data;
+  }
+
+  async function openSession(form, input, file) {
+    const base = form.dataset.uploadUrl;
+    const key = ["chunked-upload", input.name, file.name, file.size, file.lastModified].join(":");
+    const saved = localStorage.getItem(key);
+    if (saved) {
+      try {
+        const session = await api(form, base + saved + "/", { method: "GET" });
+        if (session.status === "ACTIVE") return { session, key };
+      } catch (e) { /* сессия устарела — начинаем заново */ }
+    }
+    const session = await api(form, base, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ field: input.name, filename: file.name, size: file.size }),
+    });
+    localStorage.setItem(key, session.id);
+    return { session, key };
+  }
+
+  async function uploadFile(form, input, status) {
+    const file = input.files[0];
+    const base = form.dataset.uploadUrl;
+    const { session, key } = await openSession(form, input, file);
+    const received = new Set(session.parts);
+    const total = Math.max(1, Math.ceil(file.size / session.chunk_size));
+
+    for (let i = 0; i < total; i++) {
+      if (received.has(i)) continue;
+      const body = await file.slice(i * session.chunk_size, (i + 1) * session.chunk_size).arrayBuffer();
+      const sha = hex(await crypto.subtle.digest("SHA-256", body));
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await api(form, base + session.id + "/parts/" + i + "/", {
+            method: "PUT", headers: { "X-Chunk-SHA256": sha }, body,
+          });
+          break;
+        } catch (e) {
+          if (attempt >= MAX_ATTEMPTS) throw e;
+          await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+        }
+      }
+      status.textContent = file.name + ": " + Math.round(((i + 1) * 100) / total) + "%";
+    }
+
+    await api(form, base + session.id + "/complete/", {
+      method: "POST", headers: { "Content-Type": "application/json" }, body: "{}",
+    });
+    localStorage.removeItem(key);
+    return session.id;
+  }
+
+  document.querySelectorAll("form[data-chunked-upload]").forEach((form) => {
+    const status = document.createElement("p");
+    status.className = "muted";
+    form.appendChild(status);
+
+    form.addEventListener("submit", async (event) => {
+      const inputs = Array.from(form.querySelectorAll("input[type=file]")).filter(
+        (input) => input.files.length && form.querySelector("[name=" + input.name + "_upload]")
+      );
+      if (!inputs.length) return;
+      event.preventDefault();
+      try {
+        for (const input of inputs) {
+          form.querySelector("[name=" + input.name + "_upload]").value = await uploadFile(form, input, status);
+          input.value = "";
+        }
+        form.submit();
+      } catch (e) {
+        status.textContent = "Ошибка загрузки: " + e.message + ". Отправьте форму ещё раз — загрузка продолжится.";
+      }
+    });
+  });
+})();
@@ -0,0 +1,42 @@
+// Живые уведомления (SSE, apps/notifications/live.py): бейдж в меню растёт без
+// перезагрузки, на странице уведомлений новые строки добавляются сверху.
+// Ответ 204 (WSGI без ASGI-сервиса, SQLite) закрывает поток — всё как раньше.
+(function () {
+  "use strict";
+  const script = document.currentScript;
+  if (!window.EventSource || !script) return;
+
+  const url = script.dataset.streamUrl;
+  const crossOrigin = new URL(url, window.location.href).origin !== window.location.origin;
+  const source = new EventSource(url, { withCredentials: crossOrigin });
+
+  function bumpBadge() {
+    const badge = document.querySelector("[data-unread-badge]");
+    if (!badge) return;
+    badge.textContent = String((parseInt(badge.textContent, 10) || 0) + 1);
+    badge.hidden = false;
+  }
+
+  function prependToList(item) {
+    const list = document.querySelector("[data-notification-list]");
+    if (!list) return;
+    const li = document.createElement("li");
+    li.className = "unread";
+    const div = document.createElement("div");
+    const when = document.createElement("b");
+    when.textContent = new Date(item.created_at).toLocaleString("ru-RU");
+    div.append(when, " — " + item.message + " | ");
+    const open = document.createElement("a");
+    open.href = "/notifications/" + item.id + "/";
+    open.textContent = "открыть";
+    div.append(open);
+    li.append(div);
+    list.prepend(li);
+  }
+
+  source.addEventListener("notification", function (event) {
+    const item = JSON.parse(event.data);
+    bumpBadge();
+    prependToList(item);
+  });
+})();
@@ -3,6 +3,9 @@ set -e
 
 cd /app
 
+# число воркеров gunicorn; settings выбирает по нему кэш, общий для процессов
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-2}"
+
 echo "Applying migrations..."
 python manage.py migrate --noinput
 
@@ -13,4 +16,5 @@ echo "Seeding demo data (idempotent)..."
 python manage.py seed_demo || true
 
 echo "Starting gunicorn..."
-gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
+# gthread: выгрузки отдаются потоково дольше --timeout, а heartbeat воркера идёт из главного потока
+gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers "$WEB_CONCURRENCY" --worker-class gthread --threads 4 --timeout 120